@@ -0,0 +1,26 @@
+"""UnixBench Python-scripted Run.
+
+Importing the package has no side effects.  Directories are set up and
+the benchmark programs built only when a Runner is run or the command
+line entry point is used.
+"""
+
+import importlib
+
+__all__ = ["Runner", "PassResult", "BenchResult", "RunResult", "BenchmarkError", "main", "version"]
+
+_exports = {
+    'Runner': "api",
+    'PassResult': "results",
+    'BenchResult': "results",
+    'RunResult': "results",
+    'BenchmarkError': "utils",
+    'main': "cli",
+    'version': "config",
+}
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module("." + _exports[name], __name__), name)
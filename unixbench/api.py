@@ -0,0 +1,125 @@
+"""In-process API for running the benchmarks.
+
+    from unixbench import Runner
+
+    runner = Runner(tests=["syscall", "pipe"], copies=[1, 4],
+                    onPass=lambda p: print(p.bench, p.number, p.score))
+    for run in runner.run():
+        print(run.copies, run.index)
+"""
+
+import os
+
+from . import config
+from .build import preChecks
+from .energy import findRaplDomains
+from .execute import runMix, runTests
+from .interference import parseStressorSpec
+from .metrics import metricsBench, metricsRun, startMetrics
+from .plan import defaultCopies, expandTests, parseMixSpec
+from .results import BenchResult, PassResult, RunResult
+from .sysinfo import getSystemInfo
+from .tuning import applyTuning, restoreTuning
+from .utils import logFile_
+from .xserver import describeDisplay, needsDisplay, startXServer, stopXServer
+
+runOptions = ('throttleAction', 'throttleRetries', 'minFreqRatio', 'steadyState', 'dropRule', 'aggregate',
+              'bootstrap', 'warmup', 'interference', 'energy')
+
+
+class Runner:
+    def __init__(self, tests=None, copies=None, iterations=None, baseDir=None, build=True, buildCache=None,
+                 profile=None, isolateCpus=None, sched=None, headless=False, mix=None, metricsDir=None, verbose=0,
+                 onPass=None, onBench=None, **options):
+        for k in options:
+            if k not in runOptions:
+                raise TypeError(f"unknown run option \"{k}\"")
+        self.tests = expandTests(tests) if tests else list(config.index)
+        self.copies = list(copies) if copies else None
+        self.iterations = iterations
+        self.baseDir = baseDir
+        self.build = build
+        self.buildCache = buildCache
+        self.profile = profile
+        self.isolateCpus = isolateCpus
+        self.sched = sched
+        self.headless = headless
+        # {"dhry2reg": 8, "pipe": 4} or ["dhry2reg:8", "pipe:4"]
+        self.mix = None
+        if mix:
+            self.mix = parseMixSpec(mix) if not isinstance(mix, dict) else parseMixSpec(
+                "%s:%d" % (b, n) for b, n in mix.items())
+        if self.mix and 'throttleAction' in options and options['throttleAction'] == "rerun":
+            raise RuntimeError("Run: throttleAction \"rerun\" is not supported with a mix (use \"drop\")")
+        self.metricsDir = metricsDir
+        self.metrics = None
+        self.verbose = verbose
+        self.onPass = onPass
+        self.onBench = onBench
+        self.options = options
+        if 'interference' in options:
+            # {'stressors': ["membw@2-3", ...], 'victims': ["syscall", "shell", ...]}
+            victims = options['interference'].get('victims')
+            self.options['interference'] = {
+                'stressors': [parseStressorSpec(s) if isinstance(s, str) else s
+                              for s in options['interference']['stressors']],
+                'victims': expandTests(victims) if victims else None,
+            }
+        self.systemInfo = None
+        self.logFile = None
+
+    def _passDone(self, bench, copies, number, presult, warmup):
+        if self.onPass:
+            self.onPass(PassResult.fromDict(bench, copies, number, presult, warmup))
+
+    def _benchDone(self, bresult, copies):
+        metricsBench(self.metrics, bresult, copies)
+        if self.onBench:
+            self.onBench(BenchResult.fromDict(bresult, copies))
+
+    def run(self):
+        config.setupDirs(self.baseDir)
+        if self.iterations:
+            config.setIterations(self.iterations)
+
+        if self.build:
+            manifest = preChecks(self.buildCache)
+        else:
+            os.environ['LANG'] = config.language
+            manifest = None
+        tuning = None
+        display = None
+        try:
+            if self.profile or self.isolateCpus or self.sched:
+                tuning = applyTuning(self.profile or "default", self.isolateCpus, self.sched)
+            tests = [b for b, n in self.mix] if self.mix else self.tests
+            if self.headless and needsDisplay(tests):
+                display = startXServer()
+            self.systemInfo = getSystemInfo(describeDisplay(display) if display else None)
+            self.systemInfo['build'] = manifest
+            self.systemInfo['tuning'] = tuning
+            if 'energy' in self.options and self.options['energy']:
+                self.systemInfo['energy'] = findRaplDomains()
+            self.logFile = logFile_(self.systemInfo) + ".log"
+            self.metrics = startMetrics(self.metricsDir, self.systemInfo) if self.metricsDir else None
+
+            runOpts = dict(self.options)
+            if 'energy' in runOpts:
+                runOpts['energy'] = self.systemInfo['energy']['domains'] if runOpts['energy'] else None
+            runOpts['onPass'] = self._passDone
+            runOpts['onBench'] = self._benchDone
+
+            if self.mix:
+                results = runMix(self.mix, self.verbose, self.logFile, self.systemInfo, runOpts)
+                metricsRun(self.metrics, results)
+                return [RunResult.fromDict(results)]
+
+            runs = []
+            for c in self.copies if self.copies else defaultCopies(self.systemInfo):
+                results = runTests(self.tests, self.verbose, self.logFile, c, self.systemInfo, runOpts)
+                metricsRun(self.metrics, results)
+                runs.append(RunResult.fromDict(results))
+            return runs
+        finally:
+            stopXServer(display)
+            restoreTuning(tuning)
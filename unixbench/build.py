@@ -0,0 +1,217 @@
+"""Building the benchmark programs, with a shared build cache."""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+
+from . import config
+from .utils import abortRun, getCmdOutput
+
+# CFLAGS for the package programs when neither the build nor the
+# environment sets any; also what the build key records.
+defaultCflags = "-O2"
+
+
+def hashFile(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hashSources():
+    # Everything that goes into the binaries: the sources and the Makefile.
+    h = hashlib.sha256()
+    paths = [os.path.join(config.BASEDIR, "Makefile")]
+    srcDir = os.path.join(config.BASEDIR, "src")
+    for root, dirs, files in os.walk(srcDir):
+        dirs.sort()
+        paths.extend(os.path.join(root, f) for f in sorted(files))
+    for path in paths:
+        if os.path.isfile(path):
+            h.update(os.path.relpath(path, config.BASEDIR).encode("utf-8") + b"\0")
+            h.update(hashFile(path).encode("ascii"))
+    for f in packageSources():
+        h.update(b"package/" + f.encode("utf-8") + b"\0")
+        h.update(hashFile(os.path.join(config.PKGSRCDIR, f)).encode("ascii"))
+    return h.hexdigest()
+
+
+def packageSources():
+    if not os.path.isdir(config.PKGSRCDIR):
+        return []
+    return sorted(f for f in os.listdir(config.PKGSRCDIR) if f.endswith(".c"))
+
+
+def buildCflags(makeVars):
+    return makeVars.get('CFLAGS') or os.getenv("CFLAGS") or defaultCflags
+
+
+def buildPackagePrograms(binDir, makeVars):
+    # One self-contained source file per program; no Makefile needed.
+    cc = makeVars.get('CC', os.getenv("CC", config.cCompiler))
+    cflags = buildCflags(makeVars)
+    for f in packageSources():
+        src = os.path.join(config.PKGSRCDIR, f)
+        if os.system(f"{cc} {cflags} -o \"{os.path.join(binDir, f[:-2])}\" \"{src}\" -pthread"):
+            abortRun(f"building \"{f}\" failed")
+
+
+def getBuildKey(makeVars=None):
+    makeVars = makeVars if makeVars else {}
+    cc = makeVars.get('CC', os.getenv("CC", config.cCompiler))
+    try:
+        ccVersion = getCmdOutput(f"{cc} --version 2>/dev/null | head -n 1")
+    except RuntimeError:
+        ccVersion = "unknown"
+    build = {
+        'compiler': cc,
+        'compilerVersion': ccVersion,
+        'cflags': buildCflags(makeVars),
+        'makeVars': {k: v for k, v in sorted(makeVars.items())},
+        'arch': os.uname().machine,
+        'sourceHash': hashSources(),
+    }
+    key = hashlib.sha256(json.dumps(build, sort_keys=True).encode("utf-8")).hexdigest()
+    build['key'] = key[:16]
+    return build
+
+
+def isBinary(path):
+    try:
+        with open(path, "rb") as fd:
+            return fd.read(4) == b"\x7fELF"
+    except OSError:
+        return False
+
+
+def listArtifacts(binDir):
+    return sorted(f for f in os.listdir(binDir) if os.path.isfile(os.path.join(binDir, f)) and
+                  isBinary(os.path.join(binDir, f)))
+
+
+def readManifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fd:
+            return json.load(fd)
+    except (OSError, ValueError):
+        return None
+
+
+def writeManifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fd:
+        json.dump(manifest, fd, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def manifestValid(manifest, binDir):
+    for name, digest in manifest['artifacts'].items():
+        path = os.path.join(binDir, name)
+        if not os.path.exists(path) or hashFile(path) != digest:
+            return False
+    return True
+
+
+def buildPrograms(buildCache=None, binDir=None, makeVars=None, jobs=None):
+    binDir = binDir if binDir else config.BINDIR
+    makeVars = makeVars if makeVars else {}
+    build = getBuildKey(makeVars)
+    manifestFile = os.path.join(binDir, "build-manifest.json")
+
+    # Binaries already in place from an identical build.
+    manifest = readManifest(manifestFile)
+    if manifest and manifest['key'] == build['key'] and manifestValid(manifest, binDir):
+        manifest['source'] = "existing"
+        return manifest
+
+    cacheDir = os.path.join(buildCache, build['key']) if buildCache else None
+    cached = readManifest(os.path.join(cacheDir, "build-manifest.json")) if cacheDir else None
+    if cached and manifestValid(cached, cacheDir):
+        for name in cached['artifacts']:
+            shutil.copy2(os.path.join(cacheDir, name), os.path.join(binDir, name))
+        cached['source'] = "cache"
+        writeManifest(manifestFile, cached)
+        return cached
+
+    jobs = jobs if jobs else (len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count())
+    makeArgs = " ".join(f"{k}=\"{v}\"" for k, v in sorted(makeVars.items()))
+    if binDir != config.BINDIR:
+        makeArgs += f" PROGDIR=\"{binDir}\""
+    retcode = os.system(f"make -j{jobs or 1} all {makeArgs}")
+    if retcode:
+        abortRun("\"make all\" failed")
+    buildPackagePrograms(binDir, makeVars)
+
+    manifest = dict(build)
+    manifest['built'] = time.strftime("%Y-%m-%d %H:%M:%S")
+    manifest['host'] = os.uname().nodename
+    manifest['artifacts'] = {name: hashFile(os.path.join(binDir, name)) for name in listArtifacts(binDir)}
+    writeManifest(manifestFile, manifest)
+
+    if cacheDir and not os.path.exists(cacheDir):
+        # Publish atomically so concurrent runs never see a partial entry.
+        os.makedirs(buildCache, exist_ok=True)
+        tmpDir = tempfile.mkdtemp(prefix=build['key'] + ".", dir=buildCache)
+        for name in manifest['artifacts']:
+            shutil.copy2(os.path.join(binDir, name), os.path.join(tmpDir, name))
+        writeManifest(os.path.join(tmpDir, "build-manifest.json"), manifest)
+        try:
+            os.rename(tmpDir, cacheDir)
+        except OSError:
+            shutil.rmtree(tmpDir, ignore_errors=True)
+
+    manifest['source'] = "build"
+    return manifest
+
+
+def describeBuild(build):
+    return "%s%s; key %s (%s)" % (
+        build['compilerVersion'] or build['compiler'],
+        ", CFLAGS \"%s\"" % build['cflags'] if build['cflags'] else "",
+        build['key'], build['source']
+    )
+
+
+def parseMatrixSpec(spec):
+    name, sep, rest = spec.partition("=")
+    if not sep or not name or not rest.split():
+        raise RuntimeError(f"Run: bad matrix build \"{spec}\", expected NAME=CC [CFLAGS...]")
+    parts = rest.split(None, 1)
+    return {'name': name, 'cc': parts[0], 'cflags': parts[1] if len(parts) > 1 else ""}
+
+
+def prepareMatrixBuild(build, buildCache=None):
+    # Each build gets its own program directory next to config.BINDIR, seeded
+    # with the scripts and data files the benchmarks expect to find there.
+    binDir = os.path.join(config.BASEDIR, "matrix", build['name'])
+    os.makedirs(binDir, exist_ok=True)
+    for f in os.listdir(config.BINDIR):
+        src = os.path.join(config.BINDIR, f)
+        if os.path.isfile(src) and not isBinary(src) and f != "build-manifest.json":
+            shutil.copy2(src, os.path.join(binDir, f))
+    build['binDir'] = binDir
+    # A build without flags gets the same CFLAGS as the default build.
+    makeVars = {'CC': build['cc']}
+    if build['cflags']:
+        makeVars['CFLAGS'] = build['cflags']
+    build['manifest'] = buildPrograms(buildCache, binDir, makeVars)
+    return build
+
+
+def preChecks(buildCache=None):
+    os.environ['LANG'] = config.language
+
+    manifest = buildPrograms(buildCache)
+
+    with open(os.path.join(config.TMPDIR, "kill_run"), 'w') as fd:
+        fd.write("echo kill -9 %d" % os.getpid())
+
+    os.chmod(os.path.join(config.TMPDIR, "kill_run"), stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
+
+    return manifest
@@ -0,0 +1,172 @@
+"""Reproducibility bundles and replay.
+
+A bundle is a gzipped tar archive holding everything a run depended on:
+the program directory (with a SHA-256 of every file), the resolved
+parameters and plan, the test specifications and iteration counts, the
+UB_* environment, the system fingerprint, every result with its raw pass
+outputs, and the report, HTML report and log.  Replaying a bundle runs
+the bundled programs with the bundled parameters and compares the scores.
+"""
+
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+
+from . import config
+from .build import hashFile
+from .utils import abortRun
+
+bundleFormat = 1
+
+# Where a run keeps its files is local to each host, so these are not replayed.
+localEnv = ('UB_BINDIR', 'UB_TMPDIR', 'UB_RESULTDIR', 'UB_TESTDIR')
+
+# System fields that make two hosts comparable.
+fingerprintKeys = ('system', 'osRel', 'mach', 'numCpus', 'effectiveCpus', 'language')
+
+
+def fingerprint(sysInfo):
+    fp = {k: sysInfo.get(k) for k in fingerprintKeys}
+    fp['cpus'] = sorted(set(c.get('model', "") for c in (sysInfo.get('cpus') or {}).values()))
+    fp['cgroup'] = sysInfo.get('cgroup')
+    return fp
+
+
+def hashPrograms(binDir):
+    return {f: hashFile(os.path.join(binDir, f)) for f in sorted(os.listdir(binDir))
+            if os.path.isfile(os.path.join(binDir, f))}
+
+
+def replayParams(params, copies):
+    # The plan as it was resolved: default copy counts and budget-fitted
+    # iterations depend on the host and must not be recomputed on replay.
+    params = dict(params, copies=copies, iterations=config.longIterCount, bundle=None, replay=None, plan=False)
+    params.pop('budget', None)
+    return params
+
+
+def runRecord(results):
+    return {
+        'copies': results['copies'],
+        'start': results['start'],
+        'end': results['end'],
+        'index': results.get('index', {}),
+        'mix': results.get('mix'),
+        'tests': results['list'],
+    }
+
+
+def addJson(tar, name, data):
+    raw = json.dumps(data, indent=2, sort_keys=True, default=str).encode("utf-8")
+    info = tarfile.TarInfo(name)
+    info.size = len(raw)
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(raw))
+
+
+def writeBundle(path, params, copies, tests, plan, sysInfo, runs, reportFile):
+    manifest = {
+        'format': bundleFormat,
+        'version': config.version,
+        'created': time.time(),
+        'params': replayParams(params, copies),
+        'plan': plan,
+        'iterations': {'long': config.longIterCount, 'short': config.shortIterCount},
+        'testParams': {t: config.testParams[t] for t in tests if t in config.testParams},
+        'env': {k: v for k, v in os.environ.items() if k.startswith("UB_") or k == "LANG"},
+        'fingerprint': fingerprint(sysInfo),
+        'system': sysInfo,
+        'programs': hashPrograms(config.BINDIR),
+        'runs': [runRecord(r) for r in runs],
+    }
+    with tarfile.open(path, "w:gz") as tar:
+        addJson(tar, "manifest.json", manifest)
+        tar.add(config.BINDIR, arcname="pgms")
+        for suffix in ("", ".html", ".log"):
+            if os.path.exists(reportFile + suffix):
+                tar.add(reportFile + suffix, arcname="results/report" + suffix)
+    return path
+
+
+def openBundle(path):
+    if not os.path.isfile(path):
+        raise RuntimeError(f"Run: no such bundle \"{path}\"")
+    directory = tempfile.mkdtemp(prefix="replay-", dir=config.TMPDIR)
+    with tarfile.open(path, "r:gz") as tar:
+        if hasattr(tarfile, "tar_filter"):
+            tar.extraction_filter = tarfile.tar_filter
+        tar.extractall(directory)
+    with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as fd:
+        manifest = json.load(fd)
+    if manifest['format'] != bundleFormat:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise RuntimeError(f"Run: unsupported bundle format {manifest['format']} in \"{path}\"")
+
+    binDir = os.path.join(directory, "pgms")
+    changed = [f for f, digest in manifest['programs'].items()
+               if not os.path.isfile(os.path.join(binDir, f)) or hashFile(os.path.join(binDir, f)) != digest]
+    if changed:
+        shutil.rmtree(directory, ignore_errors=True)
+        abortRun("bundle programs do not match their hashes: %s" % ", ".join(changed))
+    return dict(manifest, path=os.path.abspath(path), directory=directory, binDir=binDir)
+
+
+def startReplay(replay):
+    # Run the bundled programs with the bundled test specifications.
+    for k, v in replay['env'].items():
+        if k not in localEnv:
+            os.environ[k] = v
+    config.BINDIR = replay['binDir']
+    os.environ['UB_BINDIR'] = replay['binDir']
+    config.testParams.update(replay['testParams'])
+    config.longIterCount = replay['iterations']['long']
+    config.shortIterCount = replay['iterations']['short']
+    params = dict(replay['params'], replay=replay)
+    if params['sched']:
+        params['sched'] = tuple(params['sched'])
+    return params
+
+
+def finishReplay(replay):
+    shutil.rmtree(replay['directory'], ignore_errors=True)
+
+
+def planKey(plan):
+    return [(e['bench'], e['copies'], e['passes'], e['warmup']) for e in plan]
+
+
+def diffReplay(replay, plan, sysInfo, runs):
+    diff = {
+        'bundle': replay['path'],
+        'created': replay['created'],
+        'planChanged': planKey(plan) != planKey(replay['plan']),
+        'system': [],
+        'tests': [],
+    }
+    was = replay['fingerprint']
+    now = fingerprint(sysInfo)
+    for k in sorted(now):
+        if now[k] != was.get(k):
+            diff['system'].append((k, was.get(k), now[k]))
+
+    def scores(runList):
+        return {(r['copies'], bench): r['tests'][bench].get('score')
+                for r in runList for bench in r['tests']}
+
+    before = scores(replay['runs'])
+    after = scores([runRecord(r) for r in runs])
+    for key in sorted(set(before) | set(after), key=lambda k: (k[0] or 0, k[1])):
+        old, new = before.get(key), after.get(key)
+        diff['tests'].append({
+            'copies': key[0],
+            'test': key[1],
+            'bundle': old,
+            'replay': new,
+            'delta': new / old - 1.0 if old and new is not None else None,
+        })
+    return diff
@@ -0,0 +1,131 @@
+"""Continuous canary mode.
+
+Runs a short subset of tests, one pass each with reduced durations, at a
+fixed interval.  Scores are kept in a rolling per-test window in a state
+file; a score that strays from the window's median by more than the
+threshold raises an alert instead of joining the window.  The interval is
+stretched whenever a round's CPU time would exceed the budget, and rounds
+are skipped while the system is busy.
+"""
+
+import json
+import os
+import subprocess
+import time
+
+from . import config
+from .execute import runTests
+from .metrics import metricsCanary
+from .utils import formatDuration, printLog
+
+canaryTests = ["syscall", "pipe", "context1", "fsbuffer"]
+
+
+def loadCanaryState(path):
+    if not os.path.exists(path):
+        return {'tests': {}, 'rounds': 0}
+    with open(path, "r", encoding="utf-8") as fd:
+        return json.load(fd)
+
+
+def saveCanaryState(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fd:
+        json.dump(state, fd, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def cpuTime():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def checkDrift(state, results, opts):
+    checks = []
+    for bench in results['list']:
+        bresult = results[bench]
+        if 'score' not in bresult:
+            continue
+        window = state['tests'].setdefault(bench, [])
+        check = {'test': bench, 'score': bresult['score'], 'baseline': None, 'drift': None, 'alert': False}
+        if len(window) >= opts['minHistory']:
+            check['baseline'] = median(window)
+            check['drift'] = bresult['score'] / check['baseline'] - 1.0
+            check['alert'] = abs(check['drift']) * 100 > opts['threshold']
+        # Outliers stay out of the window so a degraded host keeps alerting
+        # rather than becoming the new baseline.
+        if not check['alert']:
+            window.append(bresult['score'])
+            del window[:-opts['window']]
+        checks.append(check)
+    return checks
+
+
+def raiseAlert(check, opts, sysInfo):
+    line = "%s %s: %s %.1f vs. baseline %.1f (%+.1f%%)" % (
+        time.strftime("%Y-%m-%d %H:%M:%S"), sysInfo['name'], check['test'],
+        check['score'], check['baseline'], check['drift'] * 100)
+    with open(opts['alertFile'], "a", encoding="utf-8") as fd:
+        fd.write(line + "\n")
+    if opts['alertCmd']:
+        env = dict(os.environ,
+                   UB_CANARY_HOST=sysInfo['name'],
+                   UB_CANARY_TEST=check['test'],
+                   UB_CANARY_SCORE="%.1f" % check['score'],
+                   UB_CANARY_BASELINE="%.1f" % check['baseline'],
+                   UB_CANARY_DRIFT="%.4f" % check['drift'])
+        subprocess.call(opts['alertCmd'], shell=True, env=env)
+    return line
+
+
+def describeChecks(checks):
+    return ", ".join("%s %.1f%s%s" % (
+        c['test'], c['score'],
+        " (%+.1f%%)" % (c['drift'] * 100) if c['drift'] is not None else "",
+        " ALERT" if c['alert'] else ""
+    ) for c in checks)
+
+
+def runCanary(tests, opts, sysInfo, runOpts, metrics=None):
+    config.setIterations(1)
+    runOpts = dict(runOpts, duration=opts['duration'])
+    logFile = os.path.join(config.RESULTDIR, "canary.log")
+    state = loadCanaryState(opts['stateFile'])
+    cpus = sysInfo['effectiveCpus'] or sysInfo['numCpus'] or 1
+
+    rounds = 0
+    while opts['rounds'] is None or rounds < opts['rounds']:
+        rounds += 1
+        start = time.time()
+        load = os.getloadavg()[0] / cpus
+        if load > opts['maxLoad']:
+            printLog(logFile, "\n# canary round skipped: load %.2f per CPU\n" % load)
+            print("%s canary: skipped, load %.2f per CPU" % (time.strftime("%Y-%m-%d %H:%M:%S"), load), flush=True)
+            wait = opts['interval']
+        else:
+            cpuStart = cpuTime()
+            results = runTests(tests, 0, logFile, 1, sysInfo, runOpts)
+            cost = cpuTime() - cpuStart
+            checks = checkDrift(state, results, opts)
+            state['rounds'] += 1
+            saveCanaryState(opts['stateFile'], state)
+
+            # Keep the average CPU use at or below the budget.
+            wait = max(opts['interval'], cost / opts['cpuBudget'])
+            print("%s canary: %s; cpu %.1fs, next in %s" % (
+                time.strftime("%Y-%m-%d %H:%M:%S"), describeChecks(checks), cost, formatDuration(wait)
+            ), flush=True)
+            for check in checks:
+                if check['alert']:
+                    print("ALERT %s" % raiseAlert(check, opts, sysInfo), flush=True)
+            metricsCanary(metrics, checks, cost)
+
+        if opts['rounds'] is None or rounds < opts['rounds']:
+            time.sleep(max(0, wait - (time.time() - start)))
+    return 0
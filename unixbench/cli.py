@@ -0,0 +1,437 @@
+"""Command line entry point."""
+
+import argparse
+import os
+import sys
+
+from . import config
+from .build import parseMatrixSpec, preChecks, prepareMatrixBuild, writeManifest
+from .bundle import diffReplay, finishReplay, openBundle, startReplay, writeBundle
+from .canary import canaryTests, runCanary
+from .compilebench import findCompilers, runCompileBench
+from .energy import findRaplDomains
+from .execute import runMix, runTests
+from .interference import parseStressorSpec, stressorKinds
+from .metrics import metricsBench, metricsFile, metricsRun, startMetrics
+from .plan import buildCompilePlan, buildMixPlan, buildPlan, buildShellPlan, buildSyscallPlan, defaultCopies, \
+    expandTests, fitIterations, parseMixSpec, printPlan
+from .progress import startProgress, stopProgress
+from .report import displaySystem, displaySystemHtml, runFooterHtml, runHeaderHtml, summarizeCompile, \
+    summarizeCompileHtml, summarizeMatrix, summarizeMatrixHtml, summarizeReplay, summarizeReplayHtml, summarizeRun, \
+    summarizeRunHtml, summarizeShellSweep, summarizeShellSweepHtml, summarizeSyscalls, summarizeSyscallsHtml
+from .scoring import aggregators
+from .shellload import runShellSweep, sweepLevels
+from .syscost import callTime, runSyscallBreakdown, syscalls, writeBreakdown
+from .sysinfo import getSystemInfo
+from .tuning import applyTuning, profiles, restoreTuning
+from .utils import BenchmarkError, logFile_, number, parseCpuList, parseDuration
+from .xserver import describeDisplay, needsDisplay, startXServer, stopXServer, xServer
+
+
+def parseArgs():
+    arg = argparse.ArgumentParser(description="UnixBench Python-scripted Run")
+    arg.add_argument("-q", "--quiet", action="store_true", dest="quiet", default=False, help="quiet mode")
+    arg.add_argument("-v", "--verbose", action="store_true", dest="verbose", default=False, help="verbose mode")
+    arg.add_argument("-i", "--iterations", dest="iterations", type=int, help="iterations")
+    arg.add_argument("-c", "--copies", dest="copies", type=int, nargs="+", help="copies")
+    arg.add_argument("--throttle", dest="throttle", choices=["flag", "rerun", "drop", "off"], default="flag",
+                     help="what to do with passes that ran thermally throttled (rerun is not available with --mix)")
+    arg.add_argument("--throttle-retries", dest="throttle_retries", type=int, default=2,
+                     help="maximum re-runs of a throttled pass")
+    arg.add_argument("--min-freq-ratio", dest="min_freq_ratio", type=float,
+                     help="treat a pass as throttled when CPU frequency falls below this fraction of max")
+    arg.add_argument("--warmup", dest="warmup", type=str, nargs="+", metavar="[TEST=]N",
+                     help="unscored warm-up passes, for all tests or per test")
+    arg.add_argument("--steady-state", action="store_true", dest="steady_state", default=False,
+                     help="only score passes after the pass scores stop shifting")
+    arg.add_argument("--drop", dest="drop", choices=["lowest-third", "none"], default="lowest-third",
+                     help="rule for dropping scored passes with --aggregate legacy")
+    arg.add_argument("--aggregate", dest="aggregate", choices=sorted(aggregators.keys()), default="legacy",
+                     help="how pass scores make the test score (legacy: geometric mean after --drop)")
+    arg.add_argument("--bootstrap", dest="bootstrap", type=int, default=1000, metavar="N",
+                     help="bootstrap resamples for the 95%% confidence intervals (0 to disable)")
+    arg.add_argument("--progress", dest="progress", nargs="?", const="auto", choices=["auto", "tty", "line", "off"],
+                     default="off", help="live progress with ETA (\"line\" for non-interactive logs)")
+    arg.add_argument("--plan", action="store_true", dest="plan", default=False,
+                     help="print the execution schedule and time estimate without running anything")
+    arg.add_argument("--budget", dest="budget", type=str, metavar="TIME",
+                     help="reduce iterations so the run fits in TIME (e.g. 20m, 1h30m, 900)")
+    arg.add_argument("--build-cache", dest="build_cache", type=str, metavar="DIR",
+                     default=os.getenv("UB_BUILDCACHE", os.path.join(os.path.expanduser("~"), ".cache", "unixbench")),
+                     help="shared cache of built benchmark programs")
+    arg.add_argument("--no-build-cache", action="store_true", dest="no_build_cache", default=False,
+                     help="always build the benchmark programs locally")
+    arg.add_argument("--matrix", dest="matrix", type=str, nargs="+", metavar="NAME=CC [CFLAGS]",
+                     help="build and run the tests once per toolchain/flags combination and compare them")
+    arg.add_argument("--profile", dest="profile", choices=sorted(profiles.keys()),
+                     help="tune the system for benchmarking and restore it afterwards")
+    arg.add_argument("--isolate-cpus", dest="isolate_cpus", type=str, metavar="LIST",
+                     help="run the benchmark copies only on these CPUs (e.g. 2-7)")
+    arg.add_argument("--sched", dest="sched", type=str, metavar="POLICY[:PRIO]",
+                     help="scheduling policy for the copies (other, batch, fifo, rr)")
+    arg.add_argument("--headless", action="store_true", dest="headless", default=False,
+                     help="run the graphics tests on a private %s server with software rendering" % xServer)
+    arg.add_argument("--interfere", dest="interfere", type=str, nargs="+", metavar="KIND[:N][@CPUS]",
+                     help="re-run victim tests with co-runner stressors (%s)" % ", ".join(stressorKinds))
+    arg.add_argument("--victim", dest="victim", type=str, nargs="+", metavar="TEST",
+                     help="tests to run under interference (default: all)")
+    arg.add_argument("--mix", dest="mix", type=str, nargs="+", metavar="TEST:N",
+                     help="run a mix of tests concurrently, e.g. dhry2reg:8 pipe:4 fsdisk:2 shell8:2")
+    arg.add_argument("--metrics-dir", dest="metrics_dir", type=str, metavar="DIR",
+                     default=os.getenv("UB_METRICSDIR"),
+                     help="write OpenMetrics gauges to DIR/%s (node_exporter textfile collector)" % metricsFile)
+    arg.add_argument("--canary", action="store_true", dest="canary", default=False,
+                     help="keep running short canary rounds and alert when scores drift (default tests: %s)"
+                          % " ".join(canaryTests))
+    arg.add_argument("--canary-interval", dest="canary_interval", type=str, default="15m", metavar="TIME",
+                     help="time between canary rounds")
+    arg.add_argument("--canary-duration", dest="canary_duration", type=int, default=2, metavar="SECS",
+                     help="run time of each canary test")
+    arg.add_argument("--canary-cpu-budget", dest="canary_cpu_budget", type=float, default=0.01, metavar="FRACTION",
+                     help="average share of one CPU the canary may use; longer intervals are used to stay below it")
+    arg.add_argument("--canary-max-load", dest="canary_max_load", type=float, default=0.5, metavar="LOAD",
+                     help="skip a round while the 1-minute load average per CPU is above this")
+    arg.add_argument("--canary-threshold", dest="canary_threshold", type=float, default=10.0, metavar="PCT",
+                     help="alert when a score differs from the rolling baseline by more than PCT percent")
+    arg.add_argument("--canary-window", dest="canary_window", type=int, default=20, metavar="N",
+                     help="scores kept per test for the rolling baseline")
+    arg.add_argument("--canary-alert-cmd", dest="canary_alert_cmd", type=str, metavar="CMD",
+                     help="command run on each alert, with UB_CANARY_* variables set")
+    arg.add_argument("--canary-rounds", dest="canary_rounds", type=int, metavar="N",
+                     help="stop after N rounds (default: run until killed)")
+    arg.add_argument("--shell-sweep", dest="shell_sweep", nargs="?", const="auto", metavar="N,N,...",
+                     help="run the shell-script workload at each concurrency (default: 1 to 2 x CPUs)")
+    arg.add_argument("--shell-bundle", dest="shell_bundle", type=str, metavar="DIR",
+                     help="directory of scripts for --shell-sweep (default: builtin sort/grep/awk/od set)")
+    arg.add_argument("--shell-time", dest="shell_time", type=int, default=20, metavar="SECS",
+                     help="seconds to run each --shell-sweep level")
+    arg.add_argument("--compile", dest="compile", nargs="?", const="gcc,clang", metavar="CC,CC,...",
+                     help="time make -jN builds of a generated C project for each copy count (default: gcc,clang)")
+    arg.add_argument("--syscalls", dest="syscalls", action="store_true",
+                     help="measure ns per call for a set of system calls at each copy count")
+    arg.add_argument("--energy", action="store_true", dest="energy", default=False,
+                     help="meter package and DRAM energy with RAPL and report score per watt")
+    arg.add_argument("--bundle", dest="bundle", type=str, metavar="FILE",
+                     help="write programs, plan, environment, system and results to a .tar.gz for replay")
+    arg.add_argument("--replay", dest="replay", type=str, metavar="FILE",
+                     help="rerun the plan from a --bundle archive with its programs and compare the scores")
+    arg.add_argument("test_list", metavar="test list", type=str, nargs="*", help="test items name")
+
+    args = arg.parse_args()
+    params = {
+        'tests': [],
+        'throttleAction': args.throttle,
+        'throttleRetries': args.throttle_retries,
+        'minFreqRatio': args.min_freq_ratio,
+        'steadyState': args.steady_state,
+        'dropRule': args.drop,
+        'aggregate': args.aggregate,
+        'bootstrap': args.bootstrap,
+        'progress': args.progress,
+        'plan': False,
+        'buildCache': None if args.no_build_cache else args.build_cache,
+        'matrix': [parseMatrixSpec(m) for m in args.matrix] if args.matrix else None,
+        'profile': args.profile,
+        'isolateCpus': parseCpuList(args.isolate_cpus) if args.isolate_cpus else None,
+        'sched': None,
+        'headless': args.headless,
+        'mix': parseMixSpec(args.mix) if args.mix else None,
+        'metricsDir': args.metrics_dir,
+        'canary': None,
+        'shellSweep': None,
+        'compile': args.compile.split(",") if args.compile else None,
+        'syscalls': args.syscalls,
+        'energy': args.energy,
+        'bundle': os.path.abspath(args.bundle) if args.bundle else None,
+        'replay': None,
+    }
+    if args.shell_sweep:
+        params['shellSweep'] = {
+            'levels': None if args.shell_sweep == "auto" else [int(n) for n in args.shell_sweep.split(",")],
+            'bundle': os.path.abspath(args.shell_bundle) if args.shell_bundle else None,
+            'duration': args.shell_time,
+        }
+    elif args.shell_bundle:
+        raise RuntimeError("Run: --shell-bundle needs --shell-sweep")
+    if args.canary:
+        params['canary'] = {
+            'interval': parseDuration(args.canary_interval),
+            'duration': args.canary_duration,
+            'cpuBudget': args.canary_cpu_budget,
+            'maxLoad': args.canary_max_load,
+            'threshold': args.canary_threshold,
+            'window': args.canary_window,
+            'minHistory': min(5, args.canary_window),
+            'alertCmd': args.canary_alert_cmd,
+            'rounds': args.canary_rounds,
+        }
+    if args.sched:
+        policy, _, prio = args.sched.partition(":")
+        if policy.lower() not in ("other", "batch", "idle", "fifo", "rr"):
+            raise RuntimeError(f"Run: unknown scheduling policy \"{policy}\"")
+        params['sched'] = (policy.lower(), int(prio) if prio else 0)
+    if args.interfere:
+        params['interference'] = {
+            'stressors': [parseStressorSpec(s) for s in args.interfere],
+            'victims': expandTests(args.victim) if args.victim else None,
+        }
+    elif args.victim:
+        raise RuntimeError("Run: --victim needs --interfere")
+    if args.quiet:
+        params['verbose'] = 0
+    if args.verbose:
+        params['verbose'] = 1
+    if args.warmup:
+        params['warmup'] = {}
+        for spec in args.warmup:
+            test, _, n = spec.rpartition("=")
+            if test and test not in config.testParams:
+                raise RuntimeError(f"Run: unknown test \"{test}\" in --warmup")
+            params['warmup'][test if test else '*'] = int(n)
+    if args.iterations:
+        params['iterations'] = args.iterations
+    if args.copies:
+        # if 'copies' not in params or not isinstance(params['copies'], list):
+        #     params['copies'] = []
+        params['copies'] = args.copies
+    if args.test_list:
+        if 'all' in args.test_list:
+            params['tests'] = expandTests(list(config.testList.keys()))
+        else:
+            for i in args.test_list:
+                if i not in config.testList:
+                    raise RuntimeError(f"Run: unknown test \"{i}\"")
+            params['tests'] = expandTests(args.test_list)
+    if args.plan:
+        params['plan'] = True
+    if args.budget:
+        params['budget'] = parseDuration(args.budget)
+    standalone = [opt for opt, on in (("--compile", args.compile), ("--shell-sweep", args.shell_sweep),
+                                      ("--syscalls", args.syscalls)) if on]
+    if standalone and args.test_list:
+        # These run instead of the regular tests, never alongside them.
+        raise RuntimeError("Run: %s cannot be combined with named tests (%s); run the tests separately" % (
+            " and ".join(standalone), " ".join(args.test_list)))
+    if args.mix and args.throttle == "rerun":
+        # A mix pass cannot be re-run for one component; use drop instead.
+        raise RuntimeError("Run: --throttle rerun is not supported with --mix (use drop)")
+    if args.bundle and (args.matrix or args.canary):
+        raise RuntimeError("Run: --bundle cannot record --matrix or --canary runs")
+    if args.replay:
+        # Everything but the output options comes from the bundle.
+        params = {'replayFile': os.path.abspath(args.replay), 'bundle': params['bundle'], 'plan': params['plan'],
+                  'progress': params['progress']}
+    return params
+
+
+def main():
+    params = parseArgs()
+    config.setupDirs()
+    tuning = None
+    replay = None
+    display = None
+    try:
+        if 'replayFile' in params:
+            replay = openBundle(params['replayFile'])
+            params = dict(startReplay(replay), bundle=params['bundle'], plan=params['plan'],
+                          progress=params['progress'])
+        if not params['plan'] and (params['profile'] or params['isolateCpus'] or params['sched']):
+            tuning = applyTuning(params['profile'] or "default", params['isolateCpus'], params['sched'])
+        graphics = [b for b, n in params['mix']] if params['mix'] else params['tests']
+        if not params['plan'] and 'headless' in params and params['headless'] and needsDisplay(graphics):
+            display = startXServer()
+        return runMain(params, tuning, display)
+    except BenchmarkError as e:
+        print("\n" + ("*" * 46), file=sys.stderr)
+        print("Run: %s; aborting" % e)
+        return 1
+    finally:
+        stopXServer(display)
+        restoreTuning(tuning)
+        if replay:
+            finishReplay(replay)
+
+
+def runMain(params, tuning=None, display=None):
+    verbose = params['verbose'] if 'verbose' in params and params['verbose'] else 1
+    if 'iterations' in params and params['iterations']:
+        config.setIterations(params['iterations'])
+
+    tests = params['tests'] if 'tests' in params else {}
+    if len(tests) <= 0:
+        tests = canaryTests if params['canary'] else config.index
+
+    runOpts = {
+        'throttleAction': params['throttleAction'],
+        'throttleRetries': params['throttleRetries'],
+        'minFreqRatio': params['minFreqRatio'],
+        'steadyState': params['steadyState'],
+        'dropRule': params['dropRule'],
+    }
+    for k in ('aggregate', 'bootstrap', 'warmup'):
+        if k in params:
+            runOpts[k] = params[k]
+    if 'interference' in params:
+        runOpts['interference'] = params['interference']
+
+    if params['plan']:
+        os.environ['LANG'] = config.language
+        build = None
+    elif params['replay']:
+        # The bundled programs run as they are; nothing is rebuilt.
+        os.environ['LANG'] = config.language
+        build = params['replay']['system']['build']
+    else:
+        build = preChecks(params['buildCache'])
+    systemInfo = getSystemInfo(describeDisplay(display) if display else None)
+    systemInfo['build'] = build
+    systemInfo['tuning'] = tuning
+    if 'energy' in params and params['energy']:
+        systemInfo['energy'] = findRaplDomains()
+        runOpts['energy'] = systemInfo['energy']['domains']
+
+    if params['canary'] and not params['plan']:
+        canary = dict(params['canary'],
+                      stateFile=os.path.join(config.RESULTDIR, "canary-%s.json" % systemInfo['name']),
+                      alertFile=os.path.join(config.RESULTDIR, "canary-alerts.log"))
+        metrics = startMetrics(params['metricsDir'], systemInfo) if params['metricsDir'] else None
+        return runCanary(tests, canary, systemInfo, runOpts, metrics)
+    if params['canary']:
+        # Plan a single canary round.
+        config.setIterations(1)
+        runOpts['duration'] = params['canary']['duration']
+
+    copies = params['copies'] if 'copies' in params and params['copies'] else defaultCopies(systemInfo)
+
+    shellSweep = params['shellSweep']
+    if shellSweep and not shellSweep['levels']:
+        shellSweep = dict(shellSweep, levels=sweepLevels(systemInfo['effectiveCpus'] or systemInfo['numCpus'] or 1))
+
+    compilers = findCompilers(params['compile']) if params['compile'] else None
+
+    builds = params['matrix'] if params['matrix'] else [None]
+    # The compile benchmark, the shell sweep and the syscall breakdown use
+    # the copy counts themselves; no regular tests run alongside them.
+    levels = copies
+    if compilers or shellSweep or params['syscalls']:
+        copies = []
+    if params['mix']:
+        # A mix sets its own copy counts; the -c list does not apply.
+        copies = [None]
+
+    def buildRunPlan():
+        plan = []
+        if compilers:
+            plan.extend(buildCompilePlan(compilers, levels, config.shortIterCount))
+        if shellSweep:
+            plan.extend(buildShellPlan(shellSweep['levels'], shellSweep['duration']))
+        if params['syscalls']:
+            plan.extend(buildSyscallPlan(levels, config.shortIterCount, len(syscalls), callTime))
+        for c in copies:
+            for b in builds:
+                plan.extend(buildMixPlan(params['mix'], runOpts) if params['mix'] else buildPlan(tests, [c], runOpts))
+        return plan
+
+    if 'budget' in params:
+        config.setIterations(fitIterations(buildRunPlan, params['budget']))
+    plan = buildRunPlan()
+
+    if params['plan']:
+        printPlan(plan, params['budget'] if 'budget' in params else None, sys.stdout)
+        return 0
+
+    if params['matrix']:
+        for b in builds:
+            prepareMatrixBuild(b, params['buildCache'])
+
+    os.system(f"cat \"{os.path.join(config.BINDIR, 'unixbench.logo')}\"")
+
+    runOpts['progress'] = startProgress(plan, params['progress'])
+    metrics = startMetrics(params['metricsDir'], systemInfo) if params['metricsDir'] else None
+
+    if verbose > 1:
+        print("Tests to run: %s" % ", ".join(tests))
+
+    reportFile = logFile_(systemInfo)
+    reportHtml = reportFile + ".html"
+    logFile = reportFile + ".log"
+    if build:
+        writeManifest(reportFile + ".build.json", build)
+
+    runs = []
+    reportFd = reportFd2 = None
+    try:
+        reportFd = open(reportFile, "w", encoding="utf-8")
+        #reportFd = sys.stdout
+        reportFd2 = open(reportHtml, "w", encoding="utf-8")
+
+        print("   BYTE UNIX Benchmarks (Version %s)\n" % config.version, file=reportFd)
+        runHeaderHtml(systemInfo, reportFd2)
+
+        displaySystem(systemInfo, reportFd)
+        displaySystemHtml(systemInfo, reportFd2)
+
+        for c in copies:
+            if verbose > 1 and c:
+                print("Run with %s" % number(c, "copy", "copies"))
+            matrix = []
+            for b in builds:
+                opts = runOpts if b is None else dict(runOpts, binDir=b['binDir'], build=b)
+                if metrics:
+                    opts = dict(opts, onBench=lambda bresult, n, b=b: metricsBench(metrics, bresult, n, b))
+                if params['mix']:
+                    results = runMix(params['mix'], verbose, logFile, systemInfo, opts)
+                else:
+                    results = runTests(tests, verbose, logFile, c, systemInfo, opts)
+                metricsRun(metrics, results)
+
+                summarizeRun(systemInfo, results, verbose, reportFd)
+                summarizeRunHtml(systemInfo, results, verbose, reportFd2)
+                matrix.append(results)
+                runs.append(results)
+
+            if params['matrix']:
+                summarizeMatrix(matrix, reportFd)
+                summarizeMatrixHtml(matrix, reportFd2)
+
+        if compilers:
+            compileBench = runCompileBench(compilers, levels, config.shortIterCount, logFile,
+                                           runOpts['progress'])
+            summarizeCompile(compileBench, reportFd)
+            summarizeCompileHtml(compileBench, reportFd2)
+
+        if shellSweep:
+            sweep = runShellSweep(shellSweep['levels'], shellSweep['bundle'], shellSweep['duration'], logFile,
+                                  runOpts['progress'])
+            summarizeShellSweep(sweep, reportFd)
+            summarizeShellSweepHtml(sweep, reportFd2)
+
+        if params['syscalls']:
+            breakdown = runSyscallBreakdown(levels, config.shortIterCount, logFile, runOpts['progress'])
+            writeBreakdown(reportFile + ".syscalls.json", breakdown)
+            summarizeSyscalls(breakdown, reportFd)
+            summarizeSyscallsHtml(breakdown, reportFd2)
+
+        if params['replay']:
+            diff = diffReplay(params['replay'], plan, systemInfo, runs)
+            summarizeReplay(diff, reportFd)
+            summarizeReplayHtml(diff, reportFd2)
+
+        runFooterHtml(reportFd2)
+
+    finally:
+        stopProgress(runOpts['progress'])
+        if reportFd and not reportFd.closed:
+            reportFd.close()
+        if reportFd2 and not reportFd2.closed:
+            reportFd2.close()
+
+    if params['bundle']:
+        writeBundle(params['bundle'], params, levels, tests, plan, systemInfo, runs, reportFile)
+
+    if verbose > 0:
+        print()
+        print("========================================================================")
+        os.system(f"cat \"{reportFile}\"")
+
+    return 0
@@ -0,0 +1,199 @@
+"""Compile-throughput benchmark.
+
+Generates a self-contained C project (a fixed-seed set of modules with
+headers, structs, switch-heavy functions and a Makefile) and times clean
+builds of it with "make -jN" for each job count and compiler.  The same
+seed gives the same sources everywhere, so results are comparable across
+hosts without shipping a source tree.
+"""
+
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import time
+
+from . import config
+from .progress import progressBench, progressBenchDone
+from .utils import abortRun, printLog
+
+compileFiles = 120
+
+projectMakefile = """\
+CC ?= cc
+CFLAGS ?= -O2
+SRCS := $(wildcard src/*.c)
+OBJS := $(SRCS:src/%.c=obj/%.o)
+
+all: bench
+
+bench: $(OBJS)
+\t$(CC) -o $@ $(OBJS)
+
+obj/%.o: src/%.c include/common.h | obj
+\t$(CC) $(CFLAGS) -Iinclude -c -o $@ $<
+
+obj:
+\tmkdir -p obj
+
+clean:
+\trm -rf obj bench
+"""
+
+commonHeader = """\
+#ifndef COMMON_H
+#define COMMON_H
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+struct item {
+    long key;
+    double weight;
+    char name[24];
+};
+
+static inline long mix(long a, long b)
+{
+    a ^= b + 0x9e3779b97f4a7c15L + (a << 6) + (a >> 2);
+    return a;
+}
+#endif
+"""
+
+
+def moduleSource(i, rnd):
+    lines = ['#include "common.h"', '#include "mod%03d.h"' % i, ""]
+    nfuncs = rnd.randint(4, 10)
+    for f in range(nfuncs):
+        cases = rnd.randint(8, 24)
+        lines.append("static long m%d_f%d(struct item *it, int n, long seed)" % (i, f))
+        lines.append("{")
+        lines.append("    long acc = seed;")
+        lines.append("    for (int k = 0; k < n; k++) {")
+        lines.append("        switch ((acc + k) %% %d) {" % cases)
+        for c in range(cases):
+            op = rnd.choice([
+                "acc = mix(acc, it[k].key * %d);" % rnd.randint(2, 99),
+                "it[k].weight = it[k].weight * %d.5 + acc;" % rnd.randint(1, 9),
+                "acc += (long)snprintf(it[k].name, sizeof(it[k].name), \"m%d-%%ld\", acc);" % c,
+                "acc -= it[(k + %d) %% n].key >> %d;" % (rnd.randint(1, 7), rnd.randint(1, 5)),
+            ])
+            lines.append("        case %d: %s break;" % (c, op))
+        lines.append("        }")
+        lines.append("    }")
+        lines.append("    return acc;")
+        lines.append("}")
+        lines.append("")
+
+    lines.append("static int m%d_cmp(const void *a, const void *b)" % i)
+    lines.append("{")
+    lines.append("    const struct item *x = a, *y = b;")
+    lines.append("    return (x->key > y->key) - (x->key < y->key);")
+    lines.append("}")
+    lines.append("")
+    lines.append("long mod%03d_run(long seed)" % i)
+    lines.append("{")
+    lines.append("    struct item it[32];")
+    lines.append("    for (int k = 0; k < 32; k++) {")
+    lines.append("        it[k].key = mix(seed, k);")
+    lines.append("        it[k].weight = k;")
+    lines.append("        it[k].name[0] = 0;")
+    lines.append("    }")
+    lines.append("    qsort(it, 32, sizeof(it[0]), m%d_cmp);" % i)
+    lines.append("    long acc = seed;")
+    for f in range(nfuncs):
+        lines.append("    acc = m%d_f%d(it, 32, acc);" % (i, f))
+    lines.append("    return acc;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generateProject(directory, files=compileFiles):
+    rnd = random.Random(1983)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.join(directory, "src"))
+    os.makedirs(os.path.join(directory, "include"))
+    with open(os.path.join(directory, "Makefile"), "w") as fd:
+        fd.write(projectMakefile)
+    with open(os.path.join(directory, "include", "common.h"), "w") as fd:
+        fd.write(commonHeader)
+
+    for i in range(files):
+        with open(os.path.join(directory, "include", "mod%03d.h" % i), "w") as fd:
+            fd.write("long mod%03d_run(long seed);\n" % i)
+        with open(os.path.join(directory, "src", "mod%03d.c" % i), "w") as fd:
+            fd.write(moduleSource(i, rnd))
+
+    with open(os.path.join(directory, "src", "main.c"), "w") as fd:
+        fd.write('#include "common.h"\n')
+        for i in range(files):
+            fd.write('#include "mod%03d.h"\n' % i)
+        fd.write("\nint main(void)\n{\n    long acc = 1;\n")
+        for i in range(files):
+            fd.write("    acc = mod%03d_run(acc);\n" % i)
+        fd.write('    printf("%ld\\n", acc);\n    return 0;\n}\n')
+    return files + 1
+
+
+def findCompilers(names):
+    found = []
+    for name in names:
+        if shutil.which(name):
+            found.append(name)
+    if not found:
+        abortRun("no compiler found for the compile benchmark (tried %s)" % ", ".join(names))
+    return found
+
+
+def makeBuild(directory, cc, jobs):
+    subprocess.run(["make", "-s", "clean"], cwd=directory, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    start = time.monotonic()
+    res = subprocess.run(["make", "-s", "-j%d" % jobs, "CC=" + cc, "all"], cwd=directory,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.monotonic() - start
+    if res.returncode != 0:
+        abortRun("compile benchmark build with %s failed: %s" % (cc, res.stderr.decode("utf-8", "replace")[-500:]))
+    return elapsed
+
+
+def runCompileBench(compilers, levels, passes, logFile, progress=None):
+    directory = os.path.join(config.TMPDIR, "compile-project")
+    nfiles = generateProject(directory)
+    bench = {
+        'files': nfiles,
+        'passes': passes,
+        'start': time.time(),
+        'builds': [],
+    }
+    try:
+        for cc in compilers:
+            # Untimed build to bring the compiler and headers into the cache.
+            makeBuild(directory, cc, max(levels))
+            for n in levels:
+                progressBench(progress, "compile", n)
+                times = [makeBuild(directory, cc, n) for i in range(passes)]
+                wall = statistics.median(times)
+                build = {
+                    'compiler': cc,
+                    'jobs': n,
+                    'times': times,
+                    'wall': wall,
+                    'filesPerMin': nfiles * 60.0 / wall,
+                    'speedup': None,
+                }
+                single = [b for b in bench['builds'] if b['compiler'] == cc and b['jobs'] == 1]
+                if single:
+                    build['speedup'] = single[0]['wall'] / wall
+                elif n == 1:
+                    build['speedup'] = 1.0
+                bench['builds'].append(build)
+                printLog(logFile, "# compile: %s -j%d: %s s; %.1f files/min\n" % (
+                    cc, n, ", ".join("%.2f" % t for t in times), build['filesPerMin']))
+                progressBenchDone(progress)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    bench['end'] = time.time()
+    return bench
@@ -0,0 +1,714 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##############################################################
+# UnixBench - Release 5.1.3, based on:
+# The BYTE UNIX Benchmarks - Release 3
+#         Module: Run   SID: 3.11 5/15/91 19:30:14
+# Original Byte benchmarks written by:
+#       Ben Smith,              Tom Yager at BYTE Magazine
+#       ben@bytepb.byte.com     tyager@bytepb.byte.com
+# BIX:  bensmith                tyager
+#
+# Compatible to Python script was written by:
+#       Ruilx Alxa  GT-Soft Studio
+#
+##############################################################
+# General Purpose Benchmark
+# based on the work by Ken McDonell,
+#                         Computer Science, Monash University
+##############################################################
+"""Benchmark configuration and test specifications.
+
+Importing this module has no side effects: the working directories are
+only resolved (and created) by setupDirs().  Test options may refer to
+them as "{BINDIR}" and "{TMPDIR}"; they are expanded when a benchmark is
+run, and relative "prog" names are looked up in the program directory.
+Tests with "copyMode": "thread" get the copy count as "{COPIES}".
+"""
+
+import os
+
+#####################
+# Configuration
+#####################
+version = "5.1.3"
+language = "en_US.utf8"
+longIterCount = 10
+shortIterCount = 3
+cCompiler = "gcc"
+
+# Benchmark programs that ship with this package rather than with the
+# UnixBench source tree; built into BINDIR along with the others.
+PKGSRCDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+
+BASEDIR = None
+BINDIR = None
+TMPDIR = None
+RESULTDIR = None
+TESTDIR = None
+
+
+def getDir(var, default):
+    val = os.getenv(var, default)
+    wd = os.getcwd()
+    if not os.path.exists(val):
+        os.mkdir(val)
+    os.chdir(val)
+    val = os.getcwd()
+    os.chdir(wd)
+    os.environ[var] = val
+    return val
+
+
+def setupDirs(baseDir=None, binDir=None, tmpDir=None, resultDir=None, testDir=None):
+    global BASEDIR, BINDIR, TMPDIR, RESULTDIR, TESTDIR
+    BASEDIR = (baseDir if baseDir else os.getcwd()).strip()
+    for var, val in (('UB_BINDIR', binDir), ('UB_TMPDIR', tmpDir),
+                     ('UB_RESULTDIR', resultDir), ('UB_TESTDIR', testDir)):
+        if val:
+            os.environ[var] = val
+    BINDIR = getDir('UB_BINDIR', os.path.join(BASEDIR, "pgms"))
+    TMPDIR = getDir('UB_TMPDIR', os.path.join(BASEDIR, "tmp"))
+    RESULTDIR = getDir('UB_RESULTDIR', os.path.join(BASEDIR, "results"))
+    TESTDIR = getDir('UB_TESTDIR', os.path.join(BASEDIR, "testdir"))
+
+
+def setIterations(iterations):
+    global longIterCount, shortIterCount
+    longIterCount = iterations
+    shortIterCount = max(1, int((iterations + 1) // 3))
+
+
+# Test Specifications
+testCats = {
+    'system': {'name': "System Benchmarks", 'maxCopies': 16},
+    '2d': {'name': "2D Graphics Benchmarks", 'maxCopies': 1},
+    '3d': {'name': "3D Graphics Benchmarks", 'maxCopies': 1},
+    'misc': {'name': "Non-Index Benchmarks", 'maxCopies': 16},
+    'vm': {'name': "Virtual Memory Benchmarks", 'maxCopies': 256},
+    'thread': {'name': "Threading Benchmarks", 'maxCopies': 256},
+    'proc': {'name': "Process Creation Benchmarks", 'maxCopies': 256},
+}
+arithmetic = [
+    "arithoh", "short", "int", "long", "float", "double", "whetstone-double"
+]
+fs = [
+    "fstime-w", "fstime-r", "fstime",
+    "fsbuffer-w", "fsbuffer-r", "fsbuffer",
+    "fsdisk-w", "fsdisk-r", "fsdisk"
+]
+oldsystem = [
+    "execl", "fstime", "fsbuffer", "fsdisk", "pipe", "context1", "spawn",
+    "syscall"
+]
+system = [
+    "shell1", "shell8", "shell16"
+]
+system.extend(oldsystem)
+index = [
+    "dhry2reg", "whetstone-double"
+]
+index.extend(oldsystem)
+index.extend(["shell1", "shell8"])
+vm = [
+    "vm-fault4k", "vm-faultthp", "vm-mmap", "vm-mprotect", "vm-fork16", "vm-fork256", "vm-madvise"
+]
+threads = [
+    "thread-mutexturn", "thread-futex", "thread-condvar", "thread-lock", "thread-create"
+]
+procs = [
+    "proc-fork", "proc-fork-1g", "proc-fork-8g",
+    "proc-forkexec", "proc-forkexec-1g", "proc-forkexec-8g",
+    "proc-vfork", "proc-vfork-1g", "proc-vfork-8g",
+    "proc-spawn", "proc-spawn-1g", "proc-spawn-8g",
+    "proc-clone", "proc-clone-1g", "proc-clone-8g"
+]
+graphics = [
+    "2d-rects", "2d-ellipse", "2d-aashapes", "2d-text", "2d-blit",
+    "2d-window", "ubgears"
+]
+
+testList = {
+    # Individual tests.
+    "dhry2reg": None,
+    "whetstone-double": None,
+    "syscall": None,
+    "pipe": None,
+    "context1": None,
+    "spawn": None,
+    "execl": None,
+    "fstime-w": None,
+    "fstime-r": None,
+    "fstime": None,
+    "fsbuffer-w": None,
+    "fsbuffer-r": None,
+    "fsbuffer": None,
+    "fsdisk-w": None,
+    "fsdisk-r": None,
+    "fsdisk": None,
+    "shell1": None,
+    "shell8": None,
+    "shell16": None,
+    "short": None,
+    "int": None,
+    "long": None,
+    "float": None,
+    "double": None,
+    "arithoh": None,
+    "C": None,
+    "dc": None,
+    "hanoi": None,
+    "grep": None,
+    "sysexec": None,
+
+    "2d-rects": None,
+    "2d-lines": None,
+    "2d-circle": None,
+    "2d-ellipse": None,
+    "2d-shapes": None,
+    "2d-aashapes": None,
+    "2d-polys": None,
+    "2d-text": None,
+    "2d-blit": None,
+    "2d-window": None,
+
+    "ubgears": None,
+
+    "vm-fault4k": None,
+    "vm-faultthp": None,
+    "vm-mmap": None,
+    "vm-mprotect": None,
+    "vm-fork16": None,
+    "vm-fork256": None,
+    "vm-madvise": None,
+
+    "thread-mutexturn": None,
+    "thread-futex": None,
+    "thread-condvar": None,
+    "thread-lock": None,
+    "thread-create": None,
+
+    "proc-fork": None,
+    "proc-fork-1g": None,
+    "proc-fork-8g": None,
+    "proc-forkexec": None,
+    "proc-forkexec-1g": None,
+    "proc-forkexec-8g": None,
+    "proc-vfork": None,
+    "proc-vfork-1g": None,
+    "proc-vfork-8g": None,
+    "proc-spawn": None,
+    "proc-spawn-1g": None,
+    "proc-spawn-8g": None,
+    "proc-clone": None,
+    "proc-clone-1g": None,
+    "proc-clone-8g": None,
+
+    "arithmetic": arithmetic,
+    "dhry": ["dhry2reg"],
+    "dhrystone": ["dhry2reg"],
+    "whets": ["whetstone-double"],
+    "whetstone": ["whetstone-double"],
+    "load": ["shell"],
+    "misc": ["C", "dc", "hanoi"],
+    "speed": [arithmetic, system],
+    "oldsystem": oldsystem,
+    "system": system,
+    "fs": fs,
+    "shell": ["shell1", "shell8", "shell16"],
+    "graphics": graphics,
+    "vm": vm,
+    "threads": threads,
+    "proc": procs,
+
+    "index": index,
+
+    "gindex": [index, graphics]
+}
+
+baseParams = {
+    "prog": None,
+    "options": "",
+    "repeat": "short",
+    "stdout": 1,
+    "stdin": "",
+    "logmsg": "",
+    "warmup": 0,
+    # "process": one process per copy; "thread": one process running
+    # "{COPIES}" threads, so the copies share an address space.
+    "copyMode": "process",
+    # Memory in MB the test touches, once and per copy; it is skipped
+    # when less is available.
+    "memoryMB": 0,
+    "copyMemoryMB": 0,
+    # Needs transparent huge pages; skipped when they are "never".
+    "thp": False,
+}
+
+testParams = {
+    "dhry2reg": {
+        "logmsg": "Dhrystone 2 using register variables",
+        "cat": 'system',
+        "options": "10",
+        "repeat": 'long',
+    },
+    "whetstone-double": {
+        "logmsg": "Double-Precision Whetstone",
+        "cat": 'system',
+        "repeat": 'long',
+    },
+    "syscall": {
+        "logmsg": "System Call Overhead",
+        "cat": 'system',
+        "repeat": 'long',
+        "options": "10",
+    },
+    "context1": {
+        "logmsg": "Pipe-based Context Switching",
+        "cat": 'system',
+        "repeat": 'long',
+        "options": "10",
+    },
+    "pipe": {
+        "logmsg": "Pipe Throughput",
+        "cat": 'system',
+        "repeat": 'long',
+        "options": "10",
+    },
+    "spawn": {
+        "logmsg": "Process Creation",
+        "cat": 'system',
+        "options": "30",
+    },
+    "execl": {
+        "logmsg": "Execl Throughput",
+        "cat": 'system',
+        "options": "30",
+    },
+    "fstime-w": {
+        "logmsg": "File Write 1024 bufsize 2000 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-w -t 30 -d \"{TMPDIR}\" -b 1024 -m 2000",
+    },
+    "fstime-r": {
+        "logmsg": "File Read 1024 bufsize 2000 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-r -t 30 -d \"{TMPDIR}\" -b 1024 -m 2000",
+    },
+    "fstime": {
+        "logmsg": "File Copy 1024 bufsize 2000 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-c -t 30 -d \"{TMPDIR}\" -b 1024 -m 2000",
+    },
+    "fsbuffer-w": {
+        "logmsg": "File Write 256 bufsize 500 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-w -t 30 -d \"{TMPDIR}\" -b 256 -m 500",
+    },
+    "fsbuffer-r": {
+        "logmsg": "File Read 256 bufsize 500 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-r -t 30 -d \"{TMPDIR}\" -b 256 -m 500",
+    },
+    "fsbuffer": {
+        "logmsg": "File Copy 256 bufsize 500 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-c -t 30 -d \"{TMPDIR}\" -b 256 -m 500",
+    },
+    "fsdisk-w": {
+        "logmsg": "File Write 4096 bufsize 8000 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-w -t 30 -d \"{TMPDIR}\" -b 4096 -m 8000",
+    },
+    "fsdisk-r": {
+        "logmsg": "File Read 4096 bufsize 8000 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-r -t 30 -d \"{TMPDIR}\" -b 4096 -m 8000",
+    },
+    "fsdisk": {
+        "logmsg": "File Copy 4096 bufsize 8000 maxblocks",
+        "cat": 'system',
+        "prog": "fstime",
+        "options": "-c -t 30 -d \"{TMPDIR}\" -b 4096 -m 8000",
+    },
+    "shell1": {
+        "logmsg": "Shell Scripts (1 concurrent)",
+        "cat": 'system',
+        "prog": "looper",
+        "options": "60 \"{BINDIR}/multi.sh\" 1",
+    },
+    "shell8": {
+        "logmsg": "Shell Scripts (8 concurrent)",
+        "cat": 'system',
+        "prog": "looper",
+        "options": "60 \"{BINDIR}/multi.sh\" 8",
+    },
+    "shell16": {
+        "logmsg": "Shell Scripts (16 concurrent)",
+        "cat": 'system',
+        "prog": "looper",
+        "options": "60 \"{BINDIR}/multi.sh\" 16",
+    },
+    "2d-rects": {
+        "logmsg": "2D graphics: rectangles",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "rects 3 2",
+    },
+    "2d-lines": {
+        "logmsg": "2D graphics: lines",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "lines 3 2",
+    },
+    "2d-circle": {
+        "logmsg": "2D graphics: circles",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "circle 3 2",
+    },
+    "2d-ellipse": {
+        "logmsg": "2D graphics: ellipses",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "ellipse 3 2",
+    },
+    "2d-shapes": {
+        "logmsg": "2D graphics: polygons",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "shapes 3 2",
+    },
+    "2d-aashapes": {
+        "logmsg": "2D graphics: aa polygons",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "aashapes 3 2",
+    },
+    "2d-polys": {
+        "logmsg": "2D graphics: complex polygons",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "polys 3 2",
+    },
+    "2d-text": {
+        "logmsg": "2D graphics: text",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "text 3 2",
+    },
+    "2d-blit": {
+        "logmsg": "2D graphics: images and blits",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "blit 3 2",
+    },
+    "2d-window": {
+        "logmsg": "2D graphics: windows",
+        "cat": '2d',
+        "prog": "gfx-x11",
+        "options": "window 3 2",
+    },
+    "ubgears": {
+        "logmsg": "3D graphics: gears",
+        "cat": '3d',
+        "options": "-time 20 -v",
+    },
+
+    "vm-fault4k": {
+        "logmsg": "Page Faults (4K anonymous)",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "fault4k 10 {COPIES}",
+        "copyMemoryMB": 64,
+        "copyMode": "thread",
+    },
+    "vm-faultthp": {
+        "logmsg": "Page Faults (THP anonymous)",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "faultthp 10 {COPIES}",
+        "copyMemoryMB": 258,
+        "thp": True,
+        "copyMode": "thread",
+    },
+    "vm-mmap": {
+        "logmsg": "mmap/munmap Churn",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "mmap 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "vm-mprotect": {
+        "logmsg": "mprotect Toggling",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "mprotect 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "vm-fork16": {
+        "logmsg": "Fork with 16 MB RSS",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "fork 10 {COPIES} 16",
+        "memoryMB": 16,
+        "copyMode": "thread",
+    },
+    "vm-fork256": {
+        "logmsg": "Fork with 256 MB RSS",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "fork 10 {COPIES} 256",
+        "memoryMB": 256,
+        "copyMode": "thread",
+    },
+    "vm-madvise": {
+        "logmsg": "MADV_DONTNEED Reclaim",
+        "cat": 'vm',
+        "prog": "vmtest",
+        "options": "madvise 10 {COPIES}",
+        "copyMemoryMB": 64,
+        "copyMode": "thread",
+    },
+
+    "thread-mutexturn": {
+        "logmsg": "Mutex Turn Passing (yield)",
+        "cat": 'thread',
+        "prog": "threadtest",
+        "options": "mutexturn 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "thread-futex": {
+        "logmsg": "Futex Ping-Pong",
+        "cat": 'thread',
+        "prog": "threadtest",
+        "options": "futex 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "thread-condvar": {
+        "logmsg": "Condition Variable Wakeup",
+        "cat": 'thread',
+        "prog": "threadtest",
+        "options": "condvar 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "thread-lock": {
+        "logmsg": "Contended Mutex Throughput",
+        "cat": 'thread',
+        "prog": "threadtest",
+        "options": "lock 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "thread-create": {
+        "logmsg": "Thread Create/Join",
+        "cat": 'thread',
+        "prog": "threadtest",
+        "options": "create 10 {COPIES}",
+        "copyMode": "thread",
+    },
+
+    "proc-fork": {
+        "logmsg": "fork+exit, tiny RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "fork 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "proc-fork-1g": {
+        "logmsg": "fork+exit, 1 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "fork 10 {COPIES} 1024",
+        "memoryMB": 1024,
+        "copyMode": "thread",
+    },
+    "proc-fork-8g": {
+        "logmsg": "fork+exit, 8 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "fork 10 {COPIES} 8192",
+        "memoryMB": 8192,
+        "copyMode": "thread",
+    },
+    "proc-forkexec": {
+        "logmsg": "fork+exec, tiny RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "forkexec 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "proc-forkexec-1g": {
+        "logmsg": "fork+exec, 1 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "forkexec 10 {COPIES} 1024",
+        "memoryMB": 1024,
+        "copyMode": "thread",
+    },
+    "proc-forkexec-8g": {
+        "logmsg": "fork+exec, 8 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "forkexec 10 {COPIES} 8192",
+        "memoryMB": 8192,
+        "copyMode": "thread",
+    },
+    "proc-vfork": {
+        "logmsg": "vfork+exec, tiny RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "vfork 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "proc-vfork-1g": {
+        "logmsg": "vfork+exec, 1 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "vfork 10 {COPIES} 1024",
+        "memoryMB": 1024,
+        "copyMode": "thread",
+    },
+    "proc-vfork-8g": {
+        "logmsg": "vfork+exec, 8 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "vfork 10 {COPIES} 8192",
+        "memoryMB": 8192,
+        "copyMode": "thread",
+    },
+    "proc-spawn": {
+        "logmsg": "posix_spawn, tiny RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "spawn 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "proc-spawn-1g": {
+        "logmsg": "posix_spawn, 1 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "spawn 10 {COPIES} 1024",
+        "memoryMB": 1024,
+        "copyMode": "thread",
+    },
+    "proc-spawn-8g": {
+        "logmsg": "posix_spawn, 8 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "spawn 10 {COPIES} 8192",
+        "memoryMB": 8192,
+        "copyMode": "thread",
+    },
+    "proc-clone": {
+        "logmsg": "clone(CLONE_VM)+exec, tiny RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "clone 10 {COPIES}",
+        "copyMode": "thread",
+    },
+    "proc-clone-1g": {
+        "logmsg": "clone(CLONE_VM)+exec, 1 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "clone 10 {COPIES} 1024",
+        "memoryMB": 1024,
+        "copyMode": "thread",
+    },
+    "proc-clone-8g": {
+        "logmsg": "clone(CLONE_VM)+exec, 8 GB RSS",
+        "cat": 'proc',
+        "prog": "spawntest",
+        "options": "clone 10 {COPIES} 8192",
+        "memoryMB": 8192,
+        "copyMode": "thread",
+    },
+
+    "C": {
+        "logmsg": f"C Compiler Throughput ({cCompiler})",
+        "cat": 'misc',
+        "prog": "looper",
+        "options": f"60 {cCompiler} cctest.c",
+    },
+    "arithoh": {
+        "logmsg": "Arithoh",
+        "cat": 'misc',
+        "options": "10",
+    },
+    "short": {
+        "logmsg": "Arithmetic Test (short)",
+        "cat": 'misc',
+        "options": "10",
+    },
+    "int": {
+        "logmsg": "Arithmetic Test (int)",
+        "cat": 'misc',
+        "options": "10",
+    },
+    "long": {
+        "logmsg": "Arithmetic Test (long)",
+        "cat": 'misc',
+        "options": "10",
+    },
+    "float": {
+        "logmsg": "Arithmetic Test (float)",
+        "cat": 'misc',
+        "options": "10",
+    },
+    "double": {
+        "logmsg": "Arithmetic Test (double)",
+        "cat": 'misc',
+        "options": "10",
+    },
+    "dc": {
+        "logmsg": "Dc: sqrt(2) to 99 decimal places",
+        "cat": 'misc',
+        "prog": "looper",
+        "options": "30 dc",
+        "stdin": "dc.dat",
+    },
+    "hanoi": {
+        "logmsg": "Recursion Test -- Tower of Hanoi",
+        "cat": 'misc',
+        "options": "20",
+    },
+    "grep": {
+        "logmsg": "Grep a large file (system's grep)",
+        "cat": 'misc',
+        "prog": "looper",
+        "options": "30 grep -c gimp large.txt",
+    },
+    "sysexec": {
+        "logmsg": "Exec System Call Overhead",
+        "cat": 'misc',
+        "repeat": 'long',
+        "prog": "syscall",
+        "options": "10 exec",
+    },
+}
+
+x86CpuFlags = {
+    'pae': "Physical Address Ext",
+    'sep': "SYSENTER/SYSEXIT",
+    'syscall': "SYSCALL/SYSRET",
+    'mmx': "MMX",
+    'mmxext': "AMD MMX",
+    'cxmmx': "Cyrix MMX",
+    'xmm': "Streaming SIMD",
+    'xmm2': "Streaming SIMD-2",
+    'xmm3': "Streaming SIMD-3",
+    'ht': "Hyper-Threading",
+    'ia64': "IA-64 processor",
+    'lm': "x86-64",
+    'vmx': "Intel virtualization",
+    'svm': "AMD virtualization",
+}
+
@@ -0,0 +1,171 @@
+"""Energy metering with the RAPL powercap counters.
+
+The package and DRAM energy counters under /sys/class/powercap/intel-rapl
+(also used by the AMD RAPL driver) are read around every pass.  Each
+counter is a microjoule total that wraps at max_energy_range_uj; a
+sampling thread reads it often enough that at most one wrap falls between
+two readings.  Joules, average watts and score per watt are attached to
+each test and category index.  When the counters are missing or not
+readable the meter is off and the reason is recorded with the system
+information.
+"""
+
+import os
+import re
+import threading
+import time
+
+from .utils import readSysFile
+
+powercapDir = "/sys/class/powercap"
+
+# Seconds between counter readings; far below the wrap time of any
+# domain (hundreds of seconds at full power).
+sampleInterval = 10.0
+
+
+def findRaplDomains(base=powercapDir):
+    # Package zones are intel-rapl:N, their core/uncore/dram subzones
+    # intel-rapl:N:M.  Core and uncore are part of the package total and
+    # psys covers the whole platform, so only package and DRAM are summed.
+    if not os.path.isdir(base):
+        return {'domains': [], 'reason': f"no {base}"}
+    domains = []
+    unreadable = []
+    for zone in sorted(os.listdir(base)):
+        m = re.match(r'intel-rapl:(\d+)(?::\d+)?$', zone)
+        if not m:
+            continue
+        path = os.path.join(base, zone)
+        name = readSysFile(os.path.join(path, "name"))
+        if name == "dram":
+            name = "dram-" + m.group(1)
+        elif not name or not name.startswith("package-"):
+            continue
+        maxRange = readSysFile(os.path.join(path, "max_energy_range_uj"))
+        energy = readSysFile(os.path.join(path, "energy_uj"))
+        if energy is None or not energy.isdigit():
+            unreadable.append(name)
+            continue
+        domains.append({
+            'name': name,
+            'file': os.path.join(path, "energy_uj"),
+            'maxRange': int(maxRange) if maxRange and maxRange.isdigit() else None,
+        })
+    if domains:
+        return {'domains': domains, 'reason': None}
+    if unreadable:
+        # energy_uj is root-only since the kernel fix for CVE-2020-8694.
+        return {'domains': [], 'reason': "cannot read %s energy counters (root only)" % ", ".join(unreadable)}
+    return {'domains': [], 'reason': "no RAPL package domains"}
+
+
+def describeEnergyMeter(meter):
+    if meter['domains']:
+        return "RAPL " + ", ".join(d['name'] for d in meter['domains'])
+    return "unavailable (%s)" % meter['reason']
+
+
+def readCounters(domains):
+    counters = {}
+    for d in domains:
+        val = readSysFile(d['file'])
+        counters[d['name']] = int(val) if val and val.isdigit() else None
+    return counters
+
+
+def sampleEnergy(mon):
+    counters = readCounters(mon['domains'])
+    for d in mon['domains']:
+        last, now = mon['last'][d['name']], counters[d['name']]
+        if last is None or now is None:
+            mon['failed'] = True
+            continue
+        delta = now - last
+        if delta < 0:
+            if d['maxRange'] is None:
+                mon['failed'] = True
+                continue
+            delta += d['maxRange']
+        mon['microjoules'][d['name']] += delta
+        mon['last'][d['name']] = now
+
+
+def energyMonitorLoop(mon):
+    while not mon['stop'].wait(mon['interval']):
+        sampleEnergy(mon)
+
+
+def startEnergyMeter(domains, interval=sampleInterval):
+    if not domains:
+        return None
+    mon = {
+        'domains': domains,
+        'interval': interval,
+        'last': readCounters(domains),
+        'microjoules': {d['name']: 0 for d in domains},
+        'failed': False,
+        'start': time.monotonic(),
+        'stop': threading.Event(),
+    }
+    mon['thread'] = threading.Thread(target=energyMonitorLoop, args=(mon,), daemon=True)
+    mon['thread'].start()
+    return mon
+
+
+def stopEnergyMeter(mon):
+    if not mon:
+        return None
+    mon['stop'].set()
+    mon['thread'].join()
+    sampleEnergy(mon)
+    elapsed = time.monotonic() - mon['start']
+    if mon['failed'] or elapsed <= 0:
+        return None
+    domains = {name: uj / 1e6 for name, uj in mon['microjoules'].items()}
+    joules = sum(domains.values())
+    return {
+        'joules': joules,
+        'watts': joules / elapsed,
+        'elapsed': elapsed,
+        'domains': domains,
+    }
+
+
+def summarizeEnergy(bresult):
+    # Over the passes that made the score; score per watt is work per joule.
+    passes = [p['energy'] for p in bresult['passes']
+              if 'energy' in p and p['energy'] and 'dropReason' not in p]
+    if not passes or 'score' not in bresult:
+        return None
+    watts = sum(e['watts'] for e in passes) / len(passes)
+    return {
+        'joules': sum(e['joules'] for e in passes) / len(passes),
+        'watts': watts,
+        'scorePerWatt': bresult['score'] / watts if watts else None,
+        'domains': {name: sum(e['domains'][name] for e in passes) / len(passes) for name in passes[0]['domains']},
+    }
+
+
+def energyIndex(results):
+    # Joules per pass summed over the indexed tests of a category, their
+    # mean power, and the category index per watt of that power.
+    energy = {}
+    for cat, iscore in results.get('index', {}).items():
+        metered = [results[b]['energy'] for b in results['list']
+                   if results[b]['cat'] == cat and 'index' in results[b] and results[b].get('energy')]
+        if not metered:
+            continue
+        watts = sum(e['watts'] for e in metered) / len(metered)
+        energy[cat] = {
+            'joules': sum(e['joules'] for e in metered),
+            'watts': watts,
+            'indexPerWatt': iscore / watts if watts else None,
+        }
+    return energy
+
+
+def describeEnergy(energy, label):
+    perWatt = energy['scorePerWatt'] if 'scorePerWatt' in energy else energy['indexPerWatt']
+    return "%.1f J, %.1f W, %s/W" % (
+        energy['joules'], energy['watts'], "%.4g %s" % (perWatt, label) if perWatt is not None else "---")
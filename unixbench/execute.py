@@ -0,0 +1,598 @@
+"""Running benchmark programs and collecting their pass results."""
+
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+
+from . import config
+from .energy import energyIndex, startEnergyMeter, stopEnergyMeter, summarizeEnergy
+from .interference import describeStressors, interferenceResult, isVictim, startStressors, stopStressors
+from .plan import describeMix, mixDuration, passCount, testSkip, warmupCount, withDuration
+from .progress import progressBench, progressBenchDone, progressPass
+from .scoring import combinePassResults, copyFairness, describeFairness, describeRusage, indexResults, mixIndex, \
+    passRusage, summarizeFairness, summarizeRusage
+from .sysinfo import diffCgroupThrottle, readCgroupThrottle, startThermalMonitor, stopThermalMonitor, summarizeThermal
+from .utils import abortRun, command, mergeParams, number, printLog
+
+
+def startCommand(cmd):
+    cmdPid, cmdFd = command(cmd)
+    return {
+        'pid': cmdPid,
+        'proc': cmdFd,
+        'start': time.monotonic(),
+        'end': None,
+        'rusage': None,
+    }
+
+
+def rusageDict(ru):
+    return {
+        'utime': ru.ru_utime,
+        'stime': ru.ru_stime,
+        'maxrss': ru.ru_maxrss,
+        'minflt': ru.ru_minflt,
+        'majflt': ru.ru_majflt,
+        'nvcsw': ru.ru_nvcsw,
+        'nivcsw': ru.ru_nivcsw,
+    }
+
+
+def reapCommand(c):
+    pid, status, ru = os.wait4(c['pid'], 0)
+    c['end'] = time.monotonic()
+    c['rusage'] = rusageDict(ru)
+    c['proc'].returncode = os.waitstatus_to_exitcode(status)
+
+
+def killCommands(ctxt, killed):
+    killed.append(True)
+    for c in ctxt:
+        if c['end'] is None:
+            c['proc'].kill()
+
+
+def waitCommands(ctxt, timeout=300):
+    # Reap each copy with wait4() as soon as it exits, so that its elapsed
+    # time ends then and its resource usage is collected.  The harness
+    # sleeps until a copy exits instead of waking up to check, and only
+    # waits for our own pids: stressors are children of this process too.
+    try:
+        fds = {os.pidfd_open(c['pid']): c for c in ctxt}
+    except (AttributeError, OSError):
+        return waitCommandsInOrder(ctxt, timeout)
+    poller = select.poll()
+    for fd in fds:
+        poller.register(fd, select.POLLIN)
+    try:
+        while fds:
+            remaining = min(c['start'] for c in fds.values()) + timeout - time.monotonic()
+            events = poller.poll(remaining * 1000) if remaining > 0 else []
+            if not events:
+                c = min(fds.values(), key=lambda c: c['start'])
+                raise subprocess.TimeoutExpired(c['proc'].args, timeout)
+            for fd, event in events:
+                reapCommand(fds.pop(fd))
+                poller.unregister(fd)
+                os.close(fd)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def waitCommandsInOrder(ctxt, timeout):
+    # Without pidfds: one blocking wait4() per copy, oldest first, and a
+    # timer that kills the copies if they overrun.
+    killed = []
+    timer = threading.Timer(timeout, killCommands, (ctxt, killed))
+    timer.daemon = True
+    timer.start()
+    try:
+        for c in ctxt:
+            reapCommand(c)
+    finally:
+        timer.cancel()
+    if killed:
+        raise subprocess.TimeoutExpired(ctxt[0]['proc'].args, timeout)
+
+
+def finishCommand(ctxt):
+    cmdFd = ctxt['proc']
+    output = cmdFd.stdout.read().decode("utf-8")
+
+    elTime = ctxt['end'] - ctxt['start']
+    output += ("elapsed|%f\n" % elTime)
+
+    if cmdFd.poll() is not None:
+        cmdFd.terminate()
+    if not cmdFd.stdin.closed:
+        cmdFd.stdin.close()
+    if not cmdFd.stdout.closed:
+        cmdFd.stdout.close()
+    if not cmdFd.stderr.closed:
+        cmdFd.stderr.close()
+    status = cmdFd.returncode
+    output += ("status|%d\n" % status)
+
+    return output
+
+
+def readResults(pid, output):
+    presult = {
+        'pid': pid,
+        'ERROR': "",
+    }
+    for line in output.split('\n'):
+        line: str = line.strip()
+        splitParams = line.split('|')
+        field = splitParams[0]
+        if len(splitParams) <= 1:
+            presult['ERROR'] += ("\n" if presult['ERROR'] else "")
+            presult['ERROR'] += field
+        elif len(splitParams) == 2:
+            presult[field] = splitParams[1]
+        else:
+            # Store the values in separate fields, named "FIELD{i}".
+            for x in range(len(splitParams) -1):
+                presult[f"{field}{x}"] = splitParams[x + 1]
+
+    if presult['status'] != 0 and ('ERROR' not in presult):
+        presult['ERROR'] = f"command returned status {presult['status']}"
+
+    return presult
+
+
+def runCommands(commands):
+    # All copies are started before any is waited for, so they really
+    # run in parallel.  If starting or waiting fails, the copies already
+    # running are killed.
+    ctxt = []
+    try:
+        for cmd in commands:
+            ctxt.append(startCommand(cmd))
+        waitCommands(ctxt)
+    except BaseException:
+        for c in ctxt:
+            if c['proc'].poll() is None:
+                c['proc'].kill()
+        raise
+    return [(c, finishCommand(c)) for c in ctxt]
+
+
+def executeCommands(commands):
+    pres = []
+    for c, output in runCommands(commands):
+        presult = readResults(c['pid'], output)
+        presult['start'] = c['start']
+        presult['rusage'] = c['rusage']
+        pres.append(presult)
+
+    return pres
+
+
+def executeBenchmark(command, copies):
+    return executeCommands([command] * copies)
+
+
+def runOnePass(params, verbose, logFile, copies):
+    command = params['command']
+    if verbose > 1:
+        print()
+        print(f"COMMAND: \"{command}\"")
+        print(f"COPIES: \"{copies}\"")
+
+    pwd = os.getcwd()
+    os.chdir(config.TESTDIR)
+
+    copyResults = executeBenchmark(*copyCommands(params, copies))
+    printLog(logFile, "\n")
+
+    os.chdir(pwd)
+
+    return sumCopies(params, copyResults, logFile, copies)
+
+
+def copyCommands(params, copies):
+    if params['copyMode'] == "thread":
+        return params['command'].replace("{COPIES}", str(copies)), 1
+    return params['command'], copies
+
+
+def runMixPass(mix, verbose, logFile):
+    commands = []
+    for comp in mix:
+        if verbose > 1:
+            print()
+            print(f"COMMAND: \"{comp['params']['command']}\"")
+            print(f"COPIES: \"{comp['copies']}\"")
+        command, n = copyCommands(comp['params'], comp['copies'])
+        commands.extend([command] * n)
+
+    pwd = os.getcwd()
+    os.chdir(config.TESTDIR)
+
+    copyResults = executeCommands(commands)
+    printLog(logFile, "\n")
+
+    os.chdir(pwd)
+
+    presult = {'components': {}}
+    start = 0
+    for comp in mix:
+        printLog(logFile, "# component: %s x %d\n" % (comp['bench'], comp['copies']))
+        n = copyCommands(comp['params'], comp['copies'])[1]
+        presult['components'][comp['bench']] = sumCopies(comp['params'], copyResults[start:start + n], logFile,
+                                                             comp['copies'])
+        start += n
+    return presult
+
+
+def sumCopies(params, copyResults, logFile, workers=None):
+    copies = len(copyResults)
+    count = time = elap = 0
+    perCopy = []
+    first = min(res['start'] for res in copyResults)
+
+    for res in copyResults:
+        for k in sorted(res.keys()):
+            printLog(logFile, f"# {k}: {res[k]}\n")
+        printLog(logFile, "\n")
+
+        if 'ERROR' in res and res['ERROR']:
+            name = params['logmsg']
+            abortRun(f"\"{name}\": {res['ERROR']}")
+
+        perCopy.append({
+            'count': float(res['COUNT0']),
+            'time': float(res['TIME']) if 'TIME' in res and res['TIME'] else float(res['elapsed']),
+            'elapsed': float(res['elapsed']),
+            'offset': res['start'] - first,
+            'rusage': res['rusage'],
+        })
+        count += perCopy[-1]['count']
+        time += perCopy[-1]['time']
+        elap += perCopy[-1]['elapsed']
+
+    passResult = copyResults[0]
+    passResult['COUNT0'] = count
+    passResult['TIME'] = time / copies
+    passResult['elapsed'] = elap / copies
+    passResult['copyResults'] = perCopy
+    passResult['fairness'] = copyFairness(perCopy) if copies > 1 else None
+    if passResult['fairness']:
+        printLog(logFile, "# fairness: %s; slowest copy %d\n\n" % (
+            describeFairness(passResult['fairness']), passResult['fairness']['straggler'] + 1))
+    # A thread-mode copy is one process running all the workers.
+    passResult['rusage'] = passRusage(perCopy, workers or copies)
+    if passResult['rusage']:
+        printLog(logFile, "# rusage: %s\n\n" % describeRusage(passResult['rusage']))
+
+    return passResult
+
+
+def expandParams(params, binDir):
+    params = dict(params)
+    if params['prog'] and not os.path.isabs(params['prog']):
+        params['prog'] = os.path.join(binDir, params['prog'])
+    params['options'] = params['options'].replace("{BINDIR}", binDir).replace("{TMPDIR}", config.TMPDIR)
+    return params
+
+
+def runMeasuredPass(params, verbose, logFile, copies, cgroup, runOpts, mix=None):
+    if sys.platform == 'linux':
+        os.sync()
+        time.sleep(1)
+        os.sync()
+        time.sleep(2)
+
+    thermalOn = not runOpts or 'throttleAction' not in runOpts or runOpts['throttleAction'] != "off"
+    minFreqRatio = runOpts['minFreqRatio'] if runOpts and 'minFreqRatio' in runOpts else None
+
+    energyDomains = runOpts['energy'] if runOpts and 'energy' in runOpts else None
+
+    throttleStart = readCgroupThrottle(cgroup)
+    thermal = startThermalMonitor() if thermalOn else None
+    energy = startEnergyMeter(energyDomains)
+    presult = runMixPass(mix, verbose, logFile) if mix else runOnePass(params, verbose, logFile, copies)
+    presult['energy'] = stopEnergyMeter(energy)
+    presult['thermal'] = stopThermalMonitor(thermal, minFreqRatio)
+    presult['cgroupThrottle'] = diffCgroupThrottle(throttleStart, readCgroupThrottle(cgroup))
+    if mix:
+        # The meter sees the whole machine, so every component carries
+        # the energy of the whole mix pass.
+        for cresult in presult['components'].values():
+            cresult['thermal'] = presult['thermal']
+            cresult['cgroupThrottle'] = presult['cgroupThrottle']
+            cresult['energy'] = presult['energy']
+
+    if presult['cgroupThrottle']:
+        printLog(logFile, "# cgroup throttled: %d of %d periods, %.1f ms\n\n" % (
+            presult['cgroupThrottle']['throttled'],
+            presult['cgroupThrottle']['periods'],
+            presult['cgroupThrottle']['throttledUsec'] / 1000.0
+        ))
+    if presult['thermal']:
+        printLog(logFile, "# thermal: %s%s\n\n" % (
+            "max %.1fC" % presult['thermal']['maxTemp'] if presult['thermal']['maxTemp'] is not None else "no sensors",
+            "; THROTTLED: " + "; ".join(presult['thermal']['reasons']) if presult['thermal']['throttled'] else ""
+        ))
+    if presult['energy']:
+        printLog(logFile, "# energy: %.1f J, %.1f W (%s)\n\n" % (
+            presult['energy']['joules'], presult['energy']['watts'],
+            ", ".join("%s %.1f J" % (name, j) for name, j in presult['energy']['domains'].items())
+        ))
+
+    return presult
+
+
+def benchParams(bench, tparams, logFile, runOpts):
+    params = mergeParams(config.baseParams, tparams)
+    if runOpts and 'duration' in runOpts:
+        params = withDuration(params, runOpts['duration'])
+    binDir = runOpts['binDir'] if runOpts and 'binDir' in runOpts else config.BINDIR
+    params = expandParams(params, binDir)
+
+    prog = params['prog'] if 'prog' in params and params['prog'] else os.path.join(binDir, bench)
+    command = "\"%s\" %s" % (prog, params['options'])
+    command += f" < \"{params['stdin']}\"" if params['stdin'] else ""
+    command += " 2>&1"
+    command += f" >> \"{logFile}\"" if params['stdout'] else " > /dev/null"
+    params['command'] = command
+    return params
+
+
+def runBenchmark(bench, tparams, verbose, logFile, copies, sysInfo=None, runOpts=None):
+    params = benchParams(bench, tparams, logFile, runOpts)
+    command, _ = copyCommands(params, copies)
+
+    bresult = {
+        'name': bench,
+        'msg': params['logmsg']
+    }
+
+    progress = runOpts['progress'] if runOpts and 'progress' in runOpts else None
+    dots = verbose > 0 and not progress
+    if dots:
+        print("\n%d x %s " % (copies, params['logmsg']), end="")
+    progressBench(progress, bench, copies)
+
+    printLog(logFile, "\n########################################################")
+    printLog(logFile, "%s -- %s" % (params['logmsg'], number(copies, "copy", "copies")))
+    printLog(logFile, "==> %s\n\n" % command)
+
+    repeats = passCount(params)
+    cgroup = sysInfo['cgroup'] if sysInfo and 'cgroup' in sysInfo else None
+    throttleAction = runOpts['throttleAction'] if runOpts and 'throttleAction' in runOpts else "flag"
+    throttleRetries = runOpts['throttleRetries'] if runOpts and 'throttleRetries' in runOpts else 2
+    warmups = warmupCount(bench, params, runOpts)
+    bresult['warmup'] = []
+    for i in range(1, warmups + 1):
+        printLog(logFile, "#### Warm-up pass %d\n\n" % i)
+
+        if dots:
+            print(" w%d" % i, end="", flush=True)
+
+        presult = runMeasuredPass(params, verbose, logFile, copies, cgroup, runOpts)
+        printLog(logFile, "*Warm-up score: %12.1f\n\n" % float(presult['COUNT0']))
+        bresult['warmup'].append(presult)
+        progressPass(progress, "w%d" % i, presult)
+        if runOpts and 'onPass' in runOpts:
+            runOpts['onPass'](bench, copies, i, presult, True)
+
+    pres = []
+    for i in range(1, repeats + 1):
+        printLog(logFile, "#### Pass %d\n\n" % i)
+
+        if dots:
+            print(" %d" % i, end="", flush=True)
+
+        presult = runMeasuredPass(params, verbose, logFile, copies, cgroup, runOpts)
+
+        retries = 0
+        while throttleAction == "rerun" and retries < throttleRetries and \
+                presult['thermal'] and presult['thermal']['throttled']:
+            presult['invalid'] = "throttled"
+            pres.append(presult)
+            retries += 1
+            printLog(logFile, "#### Pass %d re-run %d (throttled: %s)\n\n" % (
+                i, retries, "; ".join(presult['thermal']['reasons'])))
+            if dots:
+                print("T", end="", flush=True)
+            presult = runMeasuredPass(params, verbose, logFile, copies, cgroup, runOpts)
+            presult['rerunOf'] = i
+
+        if throttleAction == "drop" and presult['thermal'] and presult['thermal']['throttled']:
+            presult['invalid'] = "throttled"
+        pres.append(presult)
+        progressPass(progress, i, presult)
+        if runOpts and 'onPass' in runOpts:
+            runOpts['onPass'](bench, copies, i, presult, False)
+
+    bresult['passes'] = pres
+    if cgroup and cgroup['statFile']:
+        bresult['cgroupThrottle'] = {
+            'throttled': sum(p['cgroupThrottle']['throttled'] for p in pres if p['cgroupThrottle']),
+            'periods': sum(p['cgroupThrottle']['periods'] for p in pres if p['cgroupThrottle']),
+            'throttledUsec': sum(p['cgroupThrottle']['throttledUsec'] for p in pres if p['cgroupThrottle']),
+        }
+    bresult['thermal'] = summarizeThermal(pres)
+    bresult['fairness'] = summarizeFairness(pres)
+    bresult['rusage'] = summarizeRusage(pres)
+
+    combinePassResults(bench, tparams, bresult, logFile, runOpts)
+    bresult['energy'] = summarizeEnergy(bresult)
+
+    if copies == 1:
+        printLog(logFile, "\n>>>> Result of 1 copy\n")
+    else:
+        printLog(logFile, "\n>>>> Sum of %d copies\n" % copies)
+
+    if 'error' in bresult:
+        printLog(logFile, ">>>> error: %s\n" % bresult['error'])
+    for k in ('score', 'time', 'iterations'):
+        if k in bresult:
+            printLog(logFile, ">>>> %s: %s\n" % (k, bresult[k]))
+
+    printLog(logFile, "\n")
+
+    if bench == "C":
+        os.unlink(os.path.join(config.TESTDIR, "cctest.o"))
+        os.unlink(os.path.join(config.TESTDIR, "a.out"))
+    if dots:
+        print()
+    progressBenchDone(progress)
+
+    return bresult
+
+
+def runInterference(bench, params, verbose, logFile, copies, sysInfo, runOpts, baseline):
+    stressors = runOpts['interference']['stressors']
+    printLog(logFile, "\n#### Interference run of %s: %s\n" % (bench, describeStressors(stressors)))
+    opts = {k: v for k, v in runOpts.items() if k not in ('onPass', 'interference')}
+    procs = startStressors(stressors)
+    try:
+        loaded = runBenchmark(bench, params, verbose, logFile, copies, sysInfo, opts)
+    finally:
+        stopStressors(procs)
+    loaded.pop('bootstrap', None)
+    return interferenceResult(baseline, loaded, stressors)
+
+
+def runTests(tests, verbose, logFile, copies, sysInfo=None, runOpts=None):
+    results = {
+        'start': time.time(),
+        'copies': copies,
+        'build': runOpts['build'] if runOpts and 'build' in runOpts else None,
+        'tuning': sysInfo['tuning'] if sysInfo and 'tuning' in sysInfo else None,
+        'graphics': sysInfo['graphics'] if sysInfo and 'graphics' in sysInfo else None,
+    }
+    for bench in tests:
+        if bench not in config.testParams:
+            abortRun(f"unknown benchmark \"{bench}\"")
+        params = config.testParams[bench]
+
+        cat = params['cat']
+        maxCopies = config.testCats[cat]['maxCopies']
+        if copies > maxCopies:
+            continue
+        cgroup = sysInfo['cgroup'] if sysInfo and 'cgroup' in sysInfo else None
+        skip = testSkip(mergeParams(config.baseParams, params), copies, cgroup)
+        if skip:
+            printLog(logFile, "\n########################################################")
+            printLog(logFile, "%s -- skipped (%s)\n" % (params['logmsg'], skip))
+            if verbose > 0:
+                print("\n%s: skipped (%s)" % (params['logmsg'], skip), end="")
+            continue
+
+        bresult = runBenchmark(bench, params, verbose, logFile, copies, sysInfo, runOpts)
+        if isVictim(bench, runOpts):
+            bresult['interference'] = runInterference(bench, params, verbose, logFile, copies, sysInfo, runOpts,
+                                                      bresult)
+        results[bench] = bresult
+        if runOpts and 'onBench' in runOpts:
+            runOpts['onBench'](bresult, copies)
+    results['end'] = time.time()
+
+    finishResults(results)
+    return results
+
+
+def finishResults(results):
+    benches = filter(lambda key: key in results and isinstance(results[key], dict) and "msg" in results[key], results)
+    benchResult = {}
+    for bench in benches:
+        benchResult[results[bench]['msg']] = results[bench]
+
+    benches = {benchResult[k]['name']: benchResult[k] for k in sorted(benchResult.keys())}
+    results['list'] = benches
+
+    indexResults(results)
+    results['energy'] = energyIndex(results)
+    # The bootstrap replicates are only needed for the index intervals.
+    for bench in benches:
+        benches[bench].pop('bootstrap', None)
+
+
+def runMix(mix, verbose, logFile, sysInfo=None, runOpts=None):
+    results = {
+        'start': time.time(),
+        'copies': sum(n for bench, n in mix),
+        'build': runOpts['build'] if runOpts and 'build' in runOpts else None,
+        'tuning': sysInfo['tuning'] if sysInfo and 'tuning' in sysInfo else None,
+        'graphics': sysInfo['graphics'] if sysInfo and 'graphics' in sysInfo else None,
+        'mix': mix,
+    }
+    seconds = mixDuration(mix, runOpts)
+    compOpts = dict(runOpts if runOpts else {}, duration=seconds)
+    comps = []
+    for bench, n in mix:
+        if bench not in config.testParams:
+            abortRun(f"unknown benchmark \"{bench}\"")
+        comps.append({
+            'bench': bench,
+            'copies': n,
+            'params': benchParams(bench, config.testParams[bench], logFile, compOpts),
+        })
+
+    progress = runOpts['progress'] if runOpts and 'progress' in runOpts else None
+    dots = verbose > 0 and not progress
+    if dots:
+        print("\nMix %s " % describeMix(mix), end="")
+    progressBench(progress, "mix", results['copies'])
+
+    printLog(logFile, "\n########################################################")
+    printLog(logFile, "Mix: %s, %d s per pass\n" % (describeMix(mix), seconds))
+    for comp in comps:
+        printLog(logFile, "==> %d x %s\n" % (comp['copies'], copyCommands(comp['params'], comp['copies'])[0]))
+    printLog(logFile, "\n")
+
+    # Every component runs for the same time; the mix takes the pass
+    # count of its shortest-running component type.
+    repeats = min(passCount(c['params']) for c in comps)
+    warmups = max(warmupCount(c['bench'], c['params'], runOpts) for c in comps)
+    cgroup = sysInfo['cgroup'] if sysInfo and 'cgroup' in sysInfo else None
+    throttleAction = runOpts['throttleAction'] if runOpts and 'throttleAction' in runOpts else "flag"
+    bresults = {c['bench']: {'name': c['bench'], 'msg': c['params']['logmsg'], 'copies': c['copies'],
+                             'warmup': [], 'passes': []} for c in comps}
+    for i in range(1, warmups + repeats + 1):
+        warmup = i <= warmups
+        n = i if warmup else i - warmups
+        printLog(logFile, "#### %s %d\n\n" % ("Warm-up pass" if warmup else "Pass", n))
+        if dots:
+            print(" %s%d" % ("w" if warmup else "", n), end="", flush=True)
+
+        presult = runMeasuredPass(None, verbose, logFile, None, cgroup, runOpts, mix=comps)
+        if throttleAction == "drop" and presult['thermal'] and presult['thermal']['throttled']:
+            for cresult in presult['components'].values():
+                cresult['invalid'] = "throttled"
+        for bench, cresult in presult['components'].items():
+            bresults[bench]['warmup' if warmup else 'passes'].append(cresult)
+            if runOpts and 'onPass' in runOpts:
+                runOpts['onPass'](bench, bresults[bench]['copies'], n, cresult, warmup)
+        progressPass(progress, "w%d" % n if warmup else n, presult['components'][comps[0]['bench']])
+
+    for comp in comps:
+        bresult = bresults[comp['bench']]
+        bresult['thermal'] = summarizeThermal(bresult['passes'])
+        bresult['fairness'] = summarizeFairness(bresult['passes'])
+        bresult['rusage'] = summarizeRusage(bresult['passes'])
+        combinePassResults(comp['bench'], config.testParams[comp['bench']], bresult, logFile, runOpts)
+        bresult['energy'] = summarizeEnergy(bresult)
+        printLog(logFile, "\n>>>> %s: sum of %d copies\n" % (comp['bench'], comp['copies']))
+        for k in ('score', 'time', 'iterations'):
+            printLog(logFile, ">>>> %s: %s\n" % (k, bresult[k]))
+        results[comp['bench']] = bresult
+        if runOpts and 'onBench' in runOpts:
+            runOpts['onBench'](bresult, comp['copies'])
+    printLog(logFile, "\n")
+    if dots:
+        print()
+    progressBenchDone(progress)
+    results['end'] = time.time()
+
+    finishResults(results)
+    results['mixIndex'] = mixIndex(results)
+    return results
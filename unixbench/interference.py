@@ -0,0 +1,164 @@
+"""Co-runner stressors for the noisy-neighbor interference mode.
+
+Each stressor is a forked child that saturates one shared resource until
+it is stopped: "cpu" (integer ALU), "membw" (copies well beyond the LLC),
+"llc" (copies sized to the last level cache), "pagecache" (file write and
+read-back churning the page cache) and "disk" (fsync'd writes).  Victim
+benchmarks are run once isolated and once with the stressors active, and
+the slowdown is reported against the isolated score.
+"""
+
+import multiprocessing
+import os
+import signal
+
+from . import config
+from .utils import formatCpuList, parseCpuList, readSysFile
+
+stressorKinds = ("cpu", "membw", "llc", "pagecache", "disk")
+
+
+def parseStressorSpec(spec):
+    # KIND[:N][@CPUS], e.g. "membw:2@4-5"; with CPUs but no count, one
+    # stressor runs on each listed CPU.
+    spec, _, cpus = spec.partition("@")
+    kind, _, count = spec.partition(":")
+    if kind not in stressorKinds:
+        raise RuntimeError(f"Run: unknown stressor \"{kind}\" (use {', '.join(stressorKinds)})")
+    cpus = parseCpuList(cpus) if cpus else None
+    count = int(count) if count else (len(cpus) if cpus else 1)
+    return {'kind': kind, 'count': count, 'cpus': cpus}
+
+
+def isVictim(bench, runOpts):
+    if not runOpts or 'interference' not in runOpts or not runOpts['interference']:
+        return False
+    victims = runOpts['interference']['victims']
+    return not victims or bench in victims
+
+
+def describeStressors(stressors):
+    return ", ".join("%s x%d%s" % (
+        s['kind'], s['count'], " on CPU %s" % formatCpuList(s['cpus']) if s['cpus'] else ""
+    ) for s in stressors)
+
+
+def llcSize():
+    size = readSysFile("/sys/devices/system/cpu/cpu0/cache/index3/size")
+    if size and size[-1] in "KM":
+        return int(size[:-1]) * (1024 if size[-1] == "K" else 1024 * 1024)
+    return 8 * 1024 * 1024
+
+
+def stressCpu(path):
+    x = 1
+    while True:
+        for i in range(100000):
+            x = (x * 1103515245 + 12345) & 0xffffffff
+
+
+def stressCopy(size):
+    src = bytearray(os.urandom(1024)) * (size // 1024)
+    dst = bytearray(len(src))
+    while True:
+        dst[:] = src
+
+
+def stressMemBw(path):
+    stressCopy(max(256 * 1024 * 1024, llcSize() * 16))
+
+
+def stressLlc(path):
+    # Two buffers that together fill most of the LLC.
+    stressCopy(llcSize() * 3 // 8)
+
+
+def stressPageCache(path):
+    block = os.urandom(1024 * 1024)
+    while True:
+        with open(path, "wb") as fd:
+            for i in range(256):
+                fd.write(block)
+        with open(path, "rb") as fd:
+            while fd.read(1024 * 1024):
+                pass
+
+
+def stressDisk(path):
+    block = os.urandom(1024 * 1024)
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            for i in range(128):
+                os.write(fd, block)
+                if i % 8 == 7:
+                    os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+stressFuncs = {
+    'cpu': stressCpu,
+    'membw': stressMemBw,
+    'llc': stressLlc,
+    'pagecache': stressPageCache,
+    'disk': stressDisk,
+}
+
+
+def stressorMain(kind, cpu, path):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    if cpu is not None:
+        os.sched_setaffinity(0, [cpu])
+    stressFuncs[kind](path)
+
+
+def startStressors(stressors):
+    ctx = multiprocessing.get_context("fork")
+    procs = []
+    try:
+        for n, s in enumerate(stressors):
+            for i in range(s['count']):
+                cpu = s['cpus'][i % len(s['cpus'])] if s['cpus'] else None
+                # Two specs of the same kind must not share scratch files.
+                path = os.path.join(config.TMPDIR, "stress-%d-%s-%d" % (n, s['kind'], i))
+                proc = ctx.Process(target=stressorMain, args=(s['kind'], cpu, path), daemon=True)
+                proc.start()
+                procs.append((proc, path))
+    except BaseException:
+        stopStressors(procs)
+        raise
+    return procs
+
+
+def stopStressors(procs):
+    for proc, path in procs:
+        proc.terminate()
+    for proc, path in procs:
+        proc.join(5)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def interferenceResult(baseline, loaded, stressors):
+    slowdown = None
+    if baseline['score'] > 0:
+        slowdown = (1.0 - loaded['score'] / baseline['score']) * 100
+    return {
+        'stressors': stressors,
+        'baseline': baseline['score'],
+        'score': loaded['score'],
+        'slowdown': slowdown,
+        'loaded': loaded,
+    }
+
+
+def describeInterference(interference):
+    return "%.1f isolated, %.1f under %s (%s)" % (
+        interference['baseline'], interference['score'], describeStressors(interference['stressors']),
+        "%.1f%% slowdown" % interference['slowdown'] if interference['slowdown'] is not None else "no baseline"
+    )
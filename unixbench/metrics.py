@@ -0,0 +1,187 @@
+"""OpenMetrics textfile export for the node_exporter textfile collector.
+
+The file is rewritten after every benchmark so a scrape always sees the
+latest complete set of gauges, and replaced by rename so it never sees a
+partial file.
+"""
+
+import math
+import os
+import tempfile
+
+from .scoring import passScore
+
+metricsFile = "unixbench.prom"
+
+gauges = (
+    ('unixbench_score', "Benchmark score (sum over copies)"),
+    ('unixbench_score_ci_low', "Lower bound of the 95% bootstrap confidence interval of the score"),
+    ('unixbench_score_ci_high', "Upper bound of the 95% bootstrap confidence interval of the score"),
+    ('unixbench_index', "Benchmark index value relative to index.base"),
+    ('unixbench_pass_cv', "Coefficient of variation of the scored pass scores"),
+    ('unixbench_copies', "Parallel copies the benchmark ran with"),
+    ('unixbench_copy_fairness', "Lowest per-pass Jain fairness index across the copies"),
+    ('unixbench_copy_min_max_ratio', "Lowest per-pass ratio of the slowest to the fastest copy"),
+    ('unixbench_cpu_efficiency', "CPU time over wall time times copies, averaged over the passes"),
+    ('unixbench_energy_joules', "RAPL package and DRAM energy per scored pass"),
+    ('unixbench_power_watts', "Average RAPL package and DRAM power over the scored passes"),
+    ('unixbench_score_per_watt', "Benchmark score per watt of average power"),
+    ('unixbench_category_index', "Category index score from the last run"),
+    ('unixbench_category_index_ci_low', "Lower bound of the 95% bootstrap confidence interval of the category index"),
+    ('unixbench_category_index_ci_high', "Upper bound of the 95% bootstrap confidence interval of the category index"),
+    ('unixbench_category_index_per_watt', "Category index per watt of average power over its tests"),
+    ('unixbench_mix_index', "Consolidation score of the last mixed-workload run"),
+    ('unixbench_run_duration_seconds', "Wall time of the last run"),
+    ('unixbench_run_timestamp_seconds', "Unix time the last run finished"),
+    ('unixbench_canary_score', "Score of the last canary round"),
+    ('unixbench_canary_baseline', "Rolling canary baseline (median of the window)"),
+    ('unixbench_canary_drift', "Relative drift of the last canary score from the baseline"),
+    ('unixbench_canary_alert', "1 if the last canary score drifted beyond the threshold"),
+    ('unixbench_canary_cpu_seconds', "CPU time used by the last canary round"),
+)
+
+
+def startMetrics(directory, sysInfo):
+    os.makedirs(directory, exist_ok=True)
+    return {
+        'path': os.path.join(directory, metricsFile),
+        'host': sysInfo['name'],
+        'samples': {},
+    }
+
+
+def passCv(bresult):
+    scores = [passScore(p) for p in bresult['passes'] if 'dropReason' not in p]
+    if len(scores) < 2:
+        return 0.0
+    mean = sum(scores) / len(scores)
+    var = sum((s - mean) ** 2 for s in scores) / (len(scores) - 1)
+    return var ** 0.5 / mean if mean else 0.0
+
+
+def escapeLabel(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def formatValue(value):
+    # OpenMetrics spells the special values +Inf, -Inf and NaN; Python's
+    # inf/nan would make the collector reject the whole file.
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def setGauge(metrics, name, labels, value):
+    if value is None:
+        return
+    key = tuple(sorted(labels.items()))
+    metrics['samples'].setdefault(name, {})[key] = value
+
+
+def benchLabels(metrics, bresult, copies, build):
+    labels = {
+        'host': metrics['host'],
+        'test': bresult['name'],
+        'category': bresult['cat'],
+        'copies': copies,
+    }
+    if build:
+        labels['build'] = build['name']
+    return labels
+
+
+def metricsBench(metrics, bresult, copies, build=None):
+    if not metrics or 'score' not in bresult:
+        return
+    copies = bresult['copies'] if 'copies' in bresult else copies
+    labels = benchLabels(metrics, bresult, copies, build)
+    setGauge(metrics, 'unixbench_score', labels, bresult['score'])
+    if 'ci' in bresult and bresult['ci']:
+        setGauge(metrics, 'unixbench_score_ci_low', labels, bresult['ci'][0])
+        setGauge(metrics, 'unixbench_score_ci_high', labels, bresult['ci'][1])
+    setGauge(metrics, 'unixbench_pass_cv', labels, passCv(bresult))
+    setGauge(metrics, 'unixbench_copies', labels, copies)
+    if 'rusage' in bresult and bresult['rusage']:
+        setGauge(metrics, 'unixbench_cpu_efficiency', labels, bresult['rusage']['cpuEfficiency'])
+    if 'fairness' in bresult and bresult['fairness']:
+        setGauge(metrics, 'unixbench_copy_fairness', labels, bresult['fairness']['jain'])
+        setGauge(metrics, 'unixbench_copy_min_max_ratio', labels, bresult['fairness']['minMax'])
+    if 'energy' in bresult and bresult['energy']:
+        setGauge(metrics, 'unixbench_energy_joules', labels, bresult['energy']['joules'])
+        setGauge(metrics, 'unixbench_power_watts', labels, bresult['energy']['watts'])
+        setGauge(metrics, 'unixbench_score_per_watt', labels, bresult['energy']['scorePerWatt'])
+    writeMetrics(metrics)
+
+
+def metricsRun(metrics, results):
+    if not metrics:
+        return
+    build = results['build'] if 'build' in results else None
+    for bench in results['list']:
+        bresult = results[bench]
+        if 'index' in bresult:
+            copies = bresult['copies'] if 'copies' in bresult else results['copies']
+            setGauge(metrics, 'unixbench_index', benchLabels(metrics, bresult, copies, build), bresult['index'])
+
+    labels = {'host': metrics['host'], 'copies': results['copies']}
+    if build:
+        labels['build'] = build['name']
+    for cat, iscore in results.get('index', {}).items():
+        setGauge(metrics, 'unixbench_category_index', dict(labels, category=cat), iscore)
+        ci = results.get('indexCi', {}).get(cat)
+        if ci:
+            setGauge(metrics, 'unixbench_category_index_ci_low', dict(labels, category=cat), ci[0])
+            setGauge(metrics, 'unixbench_category_index_ci_high', dict(labels, category=cat), ci[1])
+        energy = results.get('energy', {}).get(cat)
+        if energy:
+            setGauge(metrics, 'unixbench_category_index_per_watt', dict(labels, category=cat), energy['indexPerWatt'])
+    if 'mixIndex' in results:
+        setGauge(metrics, 'unixbench_mix_index', labels, results['mixIndex'])
+    setGauge(metrics, 'unixbench_run_duration_seconds', labels, results['end'] - results['start'])
+    setGauge(metrics, 'unixbench_run_timestamp_seconds', {'host': metrics['host']}, results['end'])
+    writeMetrics(metrics)
+
+
+def metricsCanary(metrics, checks, cost):
+    if not metrics:
+        return
+    for check in checks:
+        labels = {'host': metrics['host'], 'test': check['test']}
+        setGauge(metrics, 'unixbench_canary_score', labels, check['score'])
+        setGauge(metrics, 'unixbench_canary_baseline', labels, check['baseline'])
+        setGauge(metrics, 'unixbench_canary_drift', labels, check['drift'])
+        setGauge(metrics, 'unixbench_canary_alert', labels, 1 if check['alert'] else 0)
+    setGauge(metrics, 'unixbench_canary_cpu_seconds', {'host': metrics['host']}, cost)
+    writeMetrics(metrics)
+
+
+def formatMetrics(metrics):
+    lines = []
+    for name, help_ in gauges:
+        if name not in metrics['samples']:
+            continue
+        lines.append("# HELP %s %s." % (name, help_))
+        lines.append("# TYPE %s gauge" % name)
+        for key, value in sorted(metrics['samples'][name].items(), key=lambda x: str(x[0])):
+            labels = ",".join("%s=\"%s\"" % (k, escapeLabel(v)) for k, v in key)
+            lines.append("%s{%s} %s" % (name, labels, formatValue(value)))
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def writeMetrics(metrics):
+    directory = os.path.dirname(metrics['path'])
+    # The collector only reads *.prom, so the temporary name must not match.
+    fd, tmp = tempfile.mkstemp(prefix=".unixbench-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(formatMetrics(metrics))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, metrics['path'])
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
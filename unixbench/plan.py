@@ -0,0 +1,254 @@
+"""Resolving test lists into an execution schedule and estimating its duration."""
+
+import re
+import sys
+
+from . import config
+from .interference import isVictim
+from .sysinfo import availableMemory, getCgroupInfo
+from .tuning import readSelected
+from .utils import abortRun, formatDuration, mergeParams, number
+
+
+def expandTests(names):
+    # Groups may nest other groups or lists of tests; resolve them all
+    # down to individual test names.
+    tests = set()
+    for name in names:
+        if isinstance(name, list):
+            tests.update(expandTests(name))
+        elif name in config.testList and isinstance(config.testList[name], list):
+            tests.update(expandTests(config.testList[name]))
+        elif name in config.testParams:
+            tests.add(name)
+        else:
+            raise RuntimeError(f"Run: unknown test \"{name}\"")
+    return sorted(tests)
+
+
+def parseMixSpec(specs):
+    # "dhry2reg:8 pipe:4 ..."; repeated tests add up.
+    mix = {}
+    for spec in specs:
+        bench, _, n = spec.partition(":")
+        if bench not in config.testParams:
+            raise RuntimeError(f"Run: unknown test \"{bench}\" in --mix")
+        if not durationMatch(mergeParams(config.baseParams, config.testParams[bench])['options']):
+            # Its run time could not be aligned with the other components.
+            raise RuntimeError(f"Run: test \"{bench}\" has no run time option and cannot be part of --mix")
+        mix[bench] = mix.get(bench, 0) + (int(n) if n else 1)
+    return list(mix.items())
+
+
+def mixDuration(mix, runOpts=None):
+    # All components run for the same time, so every one of them is
+    # under load from the others for the whole pass.
+    if runOpts and 'duration' in runOpts:
+        return runOpts['duration']
+    return max(testDuration(mergeParams(config.baseParams, config.testParams[bench])) for bench, n in mix)
+
+
+def describeMix(mix):
+    return " + ".join("%d x %s" % (n, bench) for bench, n in mix)
+
+
+def defaultCopies(sysInfo):
+    copies = [1]
+    # Inside a container the cgroup CPU limits, not the host's core
+    # count, decide how many copies can actually run in parallel.
+    if sysInfo['effectiveCpus'] and sysInfo['effectiveCpus'] > 1:
+        copies.append(sysInfo['effectiveCpus'])
+    return copies
+
+
+def quiesceTime():
+    return 3 if sys.platform == 'linux' else 0
+
+
+def durationMatch(opts):
+    # The run time is a -t/-time option, the first argument, or the
+    # argument after a mode name such as "fault4k" (which may contain
+    # digits of its own).
+    return re.search(r'(?:^|\s)-t(?:ime)?\s+(\d+)', opts) or re.match(r'\s*(\d+)\b', opts) \
+        or re.match(r'\s*[a-z][a-z0-9]*\s+(\d+)\b', opts)
+
+
+def testDuration(params):
+    if 'duration' in params:
+        return params['duration']
+    m = durationMatch(params['options'] if 'options' in params else "")
+    return int(m.group(1)) if m else 10
+
+
+def withDuration(params, seconds):
+    # Shorten (or lengthen) a test by rewriting the run time in its
+    # options; tests without one are left alone.
+    m = durationMatch(params['options'])
+    if not m or 'duration' in params:
+        return params
+    params = dict(params)
+    params['options'] = params['options'][:m.start(1)] + str(seconds) + params['options'][m.end(1):]
+    return params
+
+
+def passCount(params):
+    repeats = config.longIterCount if params['repeat'] == 'long' else config.shortIterCount
+    return 1 if params['repeat'] == "single" else repeats
+
+
+def warmupCount(bench, params, runOpts):
+    warmups = params['warmup']
+    if runOpts and 'warmup' in runOpts:
+        warmups = runOpts['warmup'].get(bench, runOpts['warmup'].get('*', warmups))
+    return warmups
+
+
+thpFile = "/sys/kernel/mm/transparent_hugepage/enabled"
+
+
+def testSkip(params, copies, cgroup):
+    # Reason a test cannot run as intended here, or None.
+    if params['thp'] and readSelected(thpFile) in (None, "never"):
+        # The test would silently measure 4K pages instead.
+        return "transparent huge pages are off"
+    need = params['memoryMB'] + params['copyMemoryMB'] * copies
+    if not need:
+        return None
+    avail = availableMemory(cgroup)
+    if avail is None or need << 20 <= avail:
+        return None
+    return "needs %d MB, %d MB available" % (need, avail >> 20)
+
+
+def buildPlan(tests, copies, runOpts=None):
+    plan = []
+    for c in copies:
+        for bench in tests:
+            if bench not in config.testParams:
+                abortRun(f"unknown benchmark \"{bench}\"")
+            params = mergeParams(config.baseParams, config.testParams[bench])
+            if runOpts and 'duration' in runOpts:
+                params = withDuration(params, runOpts['duration'])
+            maxCopies = config.testCats[params['cat']]['maxCopies']
+            entry = {
+                'bench': bench,
+                'msg': params['logmsg'],
+                'copies': c,
+                'passes': passCount(params),
+                'warmup': warmupCount(bench, params, runOpts),
+                'passTime': testDuration(params) + quiesceTime(),
+                'skip': None,
+            }
+            entry['estimate'] = (entry['passes'] + entry['warmup']) * entry['passTime']
+            if c > maxCopies:
+                entry['skip'] = "max %s" % number(maxCopies, "copy", "copies")
+            elif params['memoryMB'] or params['copyMemoryMB'] or params['thp']:
+                entry['skip'] = testSkip(params, c, getCgroupInfo())
+            if entry['skip']:
+                entry['estimate'] = 0
+            plan.append(entry)
+            if isVictim(bench, runOpts) and not entry['skip']:
+                plan.append(dict(entry, msg=entry['msg'][:31] + " [loaded]"))
+    return plan
+
+
+def buildMixPlan(mix, runOpts=None):
+    seconds = mixDuration(mix, runOpts)
+    comps = [(bench, withDuration(mergeParams(config.baseParams, config.testParams[bench]), seconds))
+             for bench, n in mix]
+    entry = {
+        'bench': "mix",
+        'msg': ("Mix " + describeMix(mix))[:40],
+        'copies': sum(n for bench, n in mix),
+        'passes': min(passCount(params) for bench, params in comps),
+        'warmup': max(warmupCount(bench, params, runOpts) for bench, params in comps),
+        'passTime': seconds + quiesceTime(),
+        'skip': None,
+    }
+    entry['estimate'] = (entry['passes'] + entry['warmup']) * entry['passTime']
+    return [entry]
+
+
+def buildShellPlan(levels, duration):
+    return [{
+        'bench': "shell-sweep",
+        'msg': "Shell workload (%d concurrent)" % n,
+        'copies': n,
+        'passes': 1,
+        'warmup': 0,
+        'passTime': duration,
+        'skip': None,
+        'estimate': duration,
+    } for n in levels]
+
+
+def buildCompilePlan(compilers, levels, passes):
+    # Rough guess: half a minute for a serial build of the generated project.
+    return [{
+        'bench': "compile",
+        'msg': "Compile throughput (%s -j%d)" % (cc, n),
+        'copies': n,
+        'passes': passes,
+        'warmup': 0,
+        'passTime': max(5, 30 // n),
+        'skip': None,
+        'estimate': passes * max(5, 30 // n),
+    } for cc in compilers for n in levels]
+
+
+def buildSyscallPlan(levels, passes, calls, callTime):
+    return [{
+        'bench': "syscalls",
+        'msg': "System call costs (%d copies)" % n,
+        'copies': n,
+        'passes': passes,
+        'warmup': 0,
+        'passTime': calls * callTime,
+        'skip': None,
+        'estimate': passes * calls * callTime,
+    } for n in levels]
+
+
+def fitIterations(buildRunPlan, budget):
+    # Largest iteration count (up to the current one) whose whole
+    # schedule, as buildRunPlan() assembles it, fits.
+    saved = (config.longIterCount, config.shortIterCount)
+    best = 1
+    try:
+        for n in range(saved[0], 0, -1):
+            config.setIterations(n)
+            if sum(e['estimate'] for e in buildRunPlan()) <= budget:
+                best = n
+                break
+    finally:
+        config.setIterations(saved[0])
+    return best
+
+
+def printPlan(plan, budget, fd):
+    benches = [e for e in plan if not e['skip']]
+    print("Execution plan: %s, %s; %d long / %d short iterations" % (
+        number(len(set(e['copies'] for e in plan)), "copy count"),
+        number(len(benches), "benchmark run"),
+        config.longIterCount, config.shortIterCount
+    ), file=fd)
+    print(file=fd)
+    print("%4s  %-40s %6s %7s %9s %10s" % ("#", "Test", "Copies", "Passes", "Pass time", "Estimate"), file=fd)
+    n = 0
+    elapsed = 0
+    for entry in plan:
+        if entry['skip']:
+            print("%4s  %-40s %6d  skipped (%s)" % ("-", entry['msg'], entry['copies'], entry['skip']), file=fd)
+            continue
+        n += 1
+        elapsed += entry['estimate']
+        print("%4d  %-40s %6d %7s %8ds %10s" % (
+            n, entry['msg'], entry['copies'],
+            "%d+%d" % (entry['passes'], entry['warmup']) if entry['warmup'] else "%d" % entry['passes'],
+            entry['passTime'], formatDuration(entry['estimate'])
+        ), file=fd)
+    print(file=fd)
+    line = "Estimated wall time: %s" % formatDuration(elapsed)
+    if budget:
+        line += " (budget %s%s)" % (formatDuration(budget), "" if elapsed <= budget else ", EXCEEDED")
+    print(line, file=fd)
@@ -0,0 +1,136 @@
+"""Live progress display with ETA."""
+
+import math
+import sys
+import threading
+import time
+
+from .scoring import passScore
+from .utils import formatDuration
+
+
+def startProgress(plan, mode):
+    if mode == "auto":
+        mode = "tty" if sys.stdout.isatty() else "line"
+    if mode not in ("tty", "line"):
+        return None
+    progress = {
+        'mode': mode,
+        'plan': plan,
+        'entry': -1,
+        'start': time.time(),
+        'doneEstimate': 0.0,
+        'scores': [],
+        'lock': threading.Lock(),
+        'stop': threading.Event(),
+    }
+    if mode == "tty":
+        # Keep the elapsed/ETA clock moving during long passes.
+        progress['thread'] = threading.Thread(target=progressTicker, args=(progress,), daemon=True)
+        progress['thread'].start()
+    return progress
+
+
+def progressTicker(progress):
+    while not progress['stop'].wait(1.0):
+        if progress['entry'] >= 0:
+            renderProgress(progress)
+
+
+def stopProgress(progress):
+    if not progress:
+        return
+    progress['stop'].set()
+    if 'thread' in progress:
+        progress['thread'].join()
+
+
+def progressEta(progress):
+    entry = progress['plan'][progress['entry']] if progress['entry'] >= 0 else None
+    done = progress['doneEstimate']
+    if entry:
+        done += min(progress['passesDone'], entry['passes'] + entry['warmup']) * entry['passTime']
+    remaining = sum(e['estimate'] for e in progress['plan']) - done
+    elapsed = time.time() - progress['start']
+    # Scale the nominal schedule by how far reality has drifted from it.
+    scale = elapsed / done if done > 0 else 1.0
+    return max(0.0, remaining * min(max(scale, 0.5), 4.0))
+
+
+def progressStatus(progress):
+    entry = progress['plan'][progress['entry']]
+    scores = progress['scores']
+    status = {
+        'test': entry['bench'],
+        'copies': entry['copies'],
+        'pass': progress['pass'],
+        'passes': entry['passes'],
+        'score': None,
+        'cv': None,
+        'elapsed': time.time() - progress['start'],
+        'eta': progressEta(progress),
+    }
+    if scores:
+        mean = sum(scores) / len(scores)
+        status['score'] = scores[-1]
+        if len(scores) > 1 and mean > 0:
+            status['cv'] = math.sqrt(sum((x - mean) ** 2 for x in scores) / (len(scores) - 1)) / mean
+    return status
+
+
+def renderProgress(progress, final=False):
+    with progress['lock']:
+        renderProgressLocked(progress, final)
+
+
+def renderProgressLocked(progress, final):
+    st = progressStatus(progress)
+    if progress['mode'] == "line":
+        print("progress: test=%s copies=%d pass=%s/%d score=%s cv=%s elapsed=%ds eta=%ds" % (
+            st['test'], st['copies'], st['pass'], st['passes'],
+            "%.1f" % st['score'] if st['score'] is not None else "-",
+            "%.2f%%" % (st['cv'] * 100) if st['cv'] is not None else "-",
+            st['elapsed'], st['eta']
+        ), flush=True)
+        return
+    text = "[%d/%d] %s x%d  pass %s/%d  score %s  cv %s  elapsed %s  ETA %s" % (
+        progress['entry'] + 1, len(progress['plan']), st['test'], st['copies'],
+        st['pass'], st['passes'],
+        "%.1f %s" % (st['score'], progress['label']) if st['score'] is not None else "-",
+        "%.2f%%" % (st['cv'] * 100) if st['cv'] is not None else "-",
+        formatDuration(st['elapsed']), formatDuration(st['eta'])
+    )
+    print("\r\x1b[K" + text, end="\n" if final else "", flush=True)
+
+
+def progressBench(progress, bench, copies):
+    if not progress:
+        return
+    if progress['entry'] >= 0:
+        progress['doneEstimate'] += progress['plan'][progress['entry']]['estimate']
+    for i in range(progress['entry'] + 1, len(progress['plan'])):
+        entry = progress['plan'][i]
+        if entry['bench'] == bench and entry['copies'] == copies and not entry['skip']:
+            progress['entry'] = i
+            break
+    progress['pass'] = "-"
+    progress['passesDone'] = 0
+    progress['scores'] = []
+    progress['label'] = ""
+    renderProgress(progress)
+
+
+def progressPass(progress, passNo, presult):
+    if not progress:
+        return
+    progress['passesDone'] += 1
+    progress['pass'] = passNo
+    if not isinstance(passNo, str) and 'COUNT0' in presult:
+        progress['scores'].append(passScore(presult))
+        progress['label'] = presult['COUNT2'] if 'COUNT2' in presult else ""
+    renderProgress(progress)
+
+
+def progressBenchDone(progress):
+    if progress and progress['mode'] == "tty":
+        renderProgress(progress, final=True)
@@ -0,0 +1,777 @@
+"""Text and HTML reports."""
+
+import time
+
+from . import config
+from .build import describeBuild
+from .energy import describeEnergy, describeEnergyMeter
+from .interference import describeInterference
+from .plan import describeMix
+from .scoring import describeFairness, describePassRule, describeRusage
+from .sysinfo import cgroupLimited, describeCgroupLimits, describeThermal
+from .tuning import describeTuning
+from .utils import number
+
+
+def displaySystem(info, fd):
+    print("   System %s: %s" % (info['name'], info['system']), file=fd)
+    print("   OS: %s -- %s -- %s" % (info['os'], info['osRel'], info['osVer']), file=fd)
+    print("   Machine: %s (%s)" % (info['mach'], info['platform']), file=fd)
+    print("   Language: %s" % info['language'], file=fd)
+
+    if "cpus" not in info:
+        print("   CPU: no details avaliable", file=fd)
+    else:
+        cpus = info['cpus']
+
+        for i, v in cpus.items():
+            print("   CPU %d: %s (%.1f bogomips)" % (i, v['model'], v['bogo']), file=fd)
+            print("          %s" % cpus[i]['flags'], file=fd)
+
+    if 'graphics' in info and info['graphics']:
+        print("   Graphics: %s" % info['graphics'], file=fd)
+
+    if 'build' in info and info['build']:
+        print("   Build: %s" % describeBuild(info['build']), file=fd)
+
+    if 'tuning' in info and info['tuning']:
+        print("   Tuning: %s" % describeTuning(info['tuning']), file=fd)
+
+    if 'energy' in info and info['energy']:
+        print("   Energy: %s" % describeEnergyMeter(info['energy']), file=fd)
+
+    if cgroupLimited(info):
+        print("   Cgroup v%d: %s (%s usable)" % (
+            info['cgroup']['version'], describeCgroupLimits(info['cgroup']),
+            number(info['effectiveCpus'], "CPU")
+        ), file=fd)
+
+    print("   %s; runlevel %s\n" % (info['load'], info['runlevel']), file=fd)
+
+
+def logResults(results, outFd):
+    for bench in results['list']:
+        bresult = results[bench]
+
+        print("%-40s %12.1f %-5s (%.1f s, %d samples)%s" % (
+            bresult['msg'],
+            bresult['score'],
+            bresult['scorelabel'],
+            bresult['time'],
+            bresult['iterations'],
+            "  95%% CI %s" % describeInterval(bresult['ci']) if 'ci' in bresult and bresult['ci'] else ""
+        ), file=outFd)
+
+
+def describeInterval(ci):
+    return "%.1f - %.1f" % (ci[0], ci[1])
+
+
+def logThrottle(results, outFd):
+    throttled = [results[b] for b in results['list']
+                 if 'cgroupThrottle' in results[b] and results[b]['cgroupThrottle']['throttled'] > 0]
+    if not throttled:
+        return
+    print("CFS throttling during run:", file=outFd)
+    for bresult in throttled:
+        print("   %-37s %8d of %8d periods, %10.1f ms" % (
+            bresult['msg'],
+            bresult['cgroupThrottle']['throttled'],
+            bresult['cgroupThrottle']['periods'],
+            bresult['cgroupThrottle']['throttledUsec'] / 1000.0
+        ), file=outFd)
+    print(file=outFd)
+
+
+def logThermal(results, outFd):
+    thermal = [results[b] for b in results['list']
+               if 'thermal' in results[b] and results[b]['thermal'] and results[b]['thermal']['throttledPasses'] > 0]
+    if not thermal:
+        return
+    print("Thermal/frequency throttling during run:", file=outFd)
+    for bresult in thermal:
+        print("   %-37s %s" % (bresult['msg'], describeThermal(bresult['thermal'])), file=outFd)
+    print(file=outFd)
+
+
+def logFairness(results, outFd):
+    fair = [results[b] for b in results['list'] if 'fairness' in results[b] and results[b]['fairness']]
+    if not fair:
+        return
+    print("Copy fairness (worst pass):", file=outFd)
+    for bresult in fair:
+        print("   %-37s %s" % (bresult['msg'], describeFairness(bresult['fairness'])), file=outFd)
+    print("Launch skew: spread of the times the copies were started by the harness, not of when they", file=outFd)
+    print("began their work; exec and page-in delays show in the end skew and the min/max ratio.", file=outFd)
+    print(file=outFd)
+
+
+def logRusage(results, outFd):
+    used = [results[b] for b in results['list'] if 'rusage' in results[b] and results[b]['rusage']]
+    if not used:
+        return
+    print("Resource usage (average per pass):", file=outFd)
+    for bresult in used:
+        print("   %-37s %s" % (bresult['msg'], describeRusage(bresult['rusage'])), file=outFd)
+    print(file=outFd)
+
+
+def logEnergy(results, outFd):
+    metered = [results[b] for b in results['list'] if 'energy' in results[b] and results[b]['energy']]
+    if not metered:
+        return
+    print("Energy (average per pass):", file=outFd)
+    for bresult in metered:
+        print("   %-37s %s" % (bresult['msg'], describeEnergy(bresult['energy'], bresult['scorelabel'])), file=outFd)
+    for cat, energy in results.get('energy', {}).items():
+        print("   %-37s %s" % (config.testCats[cat]['name'] + " Index",
+                                describeEnergy(energy, "index")), file=outFd)
+    print(file=outFd)
+
+
+def logInterference(results, outFd):
+    victims = [results[b] for b in results['list'] if 'interference' in results[b]]
+    if not victims:
+        return
+    print("Interference (victim slowdown vs. isolated run):", file=outFd)
+    for bresult in victims:
+        print("   %-37s %s" % (bresult['msg'], describeInterference(bresult['interference'])), file=outFd)
+    print(file=outFd)
+
+
+def logPassRules(results, outFd):
+    rules = [results[b] for b in results['list'] if 'passRule' in results[b]]
+    if not rules:
+        return
+    print("Pass selection:", file=outFd)
+    for bresult in rules:
+        print("   %-37s %s" % (bresult['msg'], describePassRule(bresult['passRule'])), file=outFd)
+    print(file=outFd)
+
+
+def logIndexCat(results, cat, outFd):
+    total = results['numIndex'][cat] if 'numIndex' in results and cat in results['numIndex'] else None
+    indexed = results['indexed'][cat] if 'indexed' in results and cat in results['indexed'] else None
+    iscore = results['index'][cat] if 'index' in results and cat in results['index'] else None
+    full = bool(total == indexed)
+
+    if indexed is None or indexed == 0:
+        print("No index results avaliable for %s\n" % config.testCats[cat]['name'], file=outFd)
+        return
+
+    head = config.testCats[cat]['name'] + (" Index Values" if full else " Partial Index")
+    print("%-40s %12s %12s %8s" % (head, "BASELINE", "RESULT", "INDEX"), file=outFd)
+
+    for bench in results['list']:
+        bresult = results[bench]
+        if bresult['cat'] != cat:
+            continue
+
+        if 'iscore' in bresult and 'index' in bresult:
+            print("%-40s %12.1f %12.1f %8.1f" % (
+                bresult['msg'], bresult['iscore'],
+                bresult['score'], bresult['index']
+            ), file=outFd)
+        else:
+            print("%-40s %12s %12.1f %8s" % (
+                bresult['msg'], "---",
+                bresult['score'], "---"
+            ), file=outFd)
+
+    title = config.testCats[cat]['name'] + " Index Score"
+    if not full:
+        title += " (Partial Only)"
+    print("%-40s %12s %12s %8s" % ("", "", "", "========"), file=outFd)
+    print("%-66s %8.1f" % (title, iscore), file=outFd)
+    ci = results['indexCi'][cat] if 'indexCi' in results and cat in results['indexCi'] else None
+    if ci:
+        print("%-51s %23s" % ("95% confidence interval", describeInterval(ci)), file=outFd)
+
+    print(file=outFd)
+
+
+def logIndex(results, outFd):
+    count = results['indexed']
+    for cat in count.keys():
+        logIndexCat(results, cat, outFd)
+
+
+def logMix(results, outFd):
+    if 'mix' not in results:
+        return
+    print("%-40s %6s %12s %8s" % ("Mix component", "COPIES", "RESULT", "INDEX"), file=outFd)
+    for bench, n in results['mix']:
+        bresult = results[bench]
+        print("%-40s %6d %12.1f %8s" % (
+            bresult['msg'], n, bresult['score'],
+            "%.1f" % bresult['index'] if 'index' in bresult else "---"
+        ), file=outFd)
+    print("%-40s %6s %12s %8s" % ("", "", "", "========"), file=outFd)
+    print("%-60s %8s" % ("Consolidation Score",
+                         "%.1f" % results['mixIndex'] if results['mixIndex'] is not None else "---"), file=outFd)
+    print(file=outFd)
+
+
+def summarizeRun(systemInfo, results, verbose, reportFd):
+    print("------------------------------------------------------------------------", file=reportFd)
+    print("Benchmark Run: %s %s - %s" % (
+        time.strftime("%Y-%m-%d", time.localtime(results['start'])),
+        time.strftime("%H:%M:%S", time.localtime(results['start'])),
+        time.strftime("%H:%M:%S", time.localtime(results['end']))
+    ), file=reportFd)
+    if 'mix' in results:
+        print("%s in system; running mix %s (%s)" % (
+            number(systemInfo['numCpus'], "CPU"), describeMix(results['mix']),
+            number(results['copies'], "parallel copy", "parallel copies")
+        ), file=reportFd)
+    else:
+        print("%s in system; running %s of tests" % (
+            number(systemInfo['numCpus'], "CPU"),
+            number(results['copies'], "parallel copy", "parallel copies")
+        ), file=reportFd)
+    if results['build']:
+        print("Build %s: %s" % (results['build']['name'], describeBuild(results['build']['manifest'])), file=reportFd)
+    if cgroupLimited(systemInfo):
+        print("Run under cgroup limits: %s" % describeCgroupLimits(systemInfo['cgroup']), file=reportFd)
+    print(file=reportFd)
+
+    logResults(results, reportFd)
+    logThrottle(results, reportFd)
+    logThermal(results, reportFd)
+    logFairness(results, reportFd)
+    logRusage(results, reportFd)
+    logEnergy(results, reportFd)
+    logInterference(results, reportFd)
+    logPassRules(results, reportFd)
+
+    logIndex(results, reportFd)
+    logMix(results, reportFd)
+
+
+def summarizeShellSweep(sweep, reportFd):
+    print("------------------------------------------------------------------------", file=reportFd)
+    print("Shell workload sweep: %s bundle (%s), %d s per level" % (
+        sweep['bundle'], ", ".join(sweep['scripts']), sweep['duration']), file=reportFd)
+    print(file=reportFd)
+    print("%6s  %-20s %10s %9s %9s %9s %8s" % ("Conc.", "Script", "Runs/min", "p50 ms", "p95 ms", "p99 ms",
+                                             "Scaling"), file=reportFd)
+
+    def ms(v):
+        return "%.1f" % (v * 1000) if v is not None else "---"
+
+    for level in sweep['levels']:
+        for name, s in level['scripts'].items():
+            print("%6d  %-20s %10.1f %9s %9s %9s" % (
+                level['concurrency'], name[:20], s['perMin'], ms(s['p50']), ms(s['p95']), ms(s['p99'])
+            ), file=reportFd)
+        print("%6d  %-20s %10.1f %9s %9s %9s %8s" % (
+            level['concurrency'], "(all)", level['perMin'], ms(level['p50']), ms(level['p95']), ms(level['p99']),
+            "%.2f" % level['scaling'] if level['scaling'] is not None else "---"
+        ), file=reportFd)
+    print(file=reportFd)
+    print("Scaling: throughput relative to N x the single-worker throughput.", file=reportFd)
+    top = sweep['levels'][-1] if sweep['levels'] else None
+    if top and 'harnessCpu' in top and top['harnessCpu'] is not None:
+        print("Harness: %.1f%% of the CPU time at %d concurrent went to the workers, not the scripts." % (
+            top['harnessCpu'] * 100, top['concurrency']), file=reportFd)
+    print(file=reportFd)
+
+
+def summarizeShellSweepHtml(sweep, fd):
+    print("<p><hr/></p>", file=fd)
+    print("<h3>Shell workload sweep: %s bundle; %d s per level</h3>" % (sweep['bundle'], sweep['duration']), file=fd)
+    print("<p><table width=\"100%\">", file=fd)
+    print("<tr>", file=fd)
+    for head in ("Concurrency", "Script", "Runs/min", "p50 ms", "p95 ms", "p99 ms", "Scaling"):
+        print("    <th align=%s>%s</th>" % ("left" if head == "Script" else "right", head), file=fd)
+    print("</tr>", file=fd)
+
+    def ms(v):
+        return "%.1f" % (v * 1000) if v is not None else "---"
+
+    for level in sweep['levels']:
+        rows = [(name, s, "") for name, s in level['scripts'].items()]
+        rows.append(("<b>all</b>", level, "%.2f" % level['scaling'] if level['scaling'] is not None else "---"))
+        for name, s, scaling in rows:
+            print("<tr>", file=fd)
+            print("    <td align=right><tt>%d</tt></td>" % level['concurrency'], file=fd)
+            print("    <td>%s</td>" % name, file=fd)
+            print("    <td align=right><tt>%.1f</tt></td>" % s['perMin'], file=fd)
+            for k in ('p50', 'p95', 'p99'):
+                print("    <td align=right><tt>%s</tt></td>" % ms(s[k]), file=fd)
+            print("    <td align=right><tt>%s</tt></td>" % scaling, file=fd)
+            print("</tr>", file=fd)
+    print("</table></p>\n", file=fd)
+
+
+def summarizeCompile(bench, reportFd):
+    print("------------------------------------------------------------------------", file=reportFd)
+    print("Compile throughput: generated C project, %d files; median of %s" % (
+        bench['files'], number(bench['passes'], "clean build")), file=reportFd)
+    print(file=reportFd)
+    print("%-12s %6s %12s %12s %8s" % ("Compiler", "Jobs", "Wall time", "Files/min", "Speedup"), file=reportFd)
+    for build in bench['builds']:
+        print("%-12s %6d %10.2f s %12.1f %8s" % (
+            build['compiler'][:12], build['jobs'], build['wall'], build['filesPerMin'],
+            "%.2f" % build['speedup'] if build['speedup'] is not None else "---"
+        ), file=reportFd)
+    print(file=reportFd)
+
+
+def summarizeCompileHtml(bench, fd):
+    print("<p><hr/></p>", file=fd)
+    print("<h3>Compile throughput: generated C project, %d files; median of %s</h3>" % (
+        bench['files'], number(bench['passes'], "clean build")), file=fd)
+    print("<p><table width=\"100%\">", file=fd)
+    print("<tr>", file=fd)
+    print("    <th align=left>Compiler</th>", file=fd)
+    for head in ("Jobs", "Wall time", "Files/min", "Speedup"):
+        print("    <th align=right>%s</th>" % head, file=fd)
+    print("</tr>", file=fd)
+    for build in bench['builds']:
+        print("<tr>", file=fd)
+        print("    <td><b>%s</b></td>" % build['compiler'], file=fd)
+        print("    <td align=right><tt>%d</tt></td>" % build['jobs'], file=fd)
+        print("    <td align=right><tt>%.2f s</tt></td>" % build['wall'], file=fd)
+        print("    <td align=right><tt>%.1f</tt></td>" % build['filesPerMin'], file=fd)
+        print("    <td align=right><tt>%s</tt></td>" % (
+            "%.2f" % build['speedup'] if build['speedup'] is not None else "---"), file=fd)
+        print("</tr>", file=fd)
+    print("</table></p>\n", file=fd)
+
+
+def scalingText(value):
+    return "%.2f" % value if value is not None else "---"
+
+
+def summarizeSyscalls(breakdown, reportFd):
+    print("------------------------------------------------------------------------", file=reportFd)
+    print("System call costs: ns per call in one copy; median of %s, %d s per call" % (
+        number(breakdown['passes'], "pass", "passes"), breakdown['callTime']), file=reportFd)
+    print(file=reportFd)
+    print("%-24s" % "Call" + "".join("%16s" % number(lv['copies'], "copy", "copies")
+                                    for lv in breakdown['levels']), file=reportFd)
+    for call in breakdown['calls']:
+        print("%-24s" % call['desc'] + "".join("%10.1f %5s" % (
+            lv['ns'][call['name']], scalingText(lv['scaling'][call['name']])
+        ) for lv in breakdown['levels']), file=reportFd)
+    print(file=reportFd)
+    print("Second figure: cost relative to one copy (1.00 = perfect scaling).", file=reportFd)
+    print(file=reportFd)
+
+
+def summarizeSyscallsHtml(breakdown, fd):
+    print("<p><hr/></p>", file=fd)
+    print("<h3>System call costs: ns per call in one copy; median of %s</h3>" % (
+        number(breakdown['passes'], "pass", "passes")), file=fd)
+    print("<p><table width=\"100%\">", file=fd)
+    print("<tr>", file=fd)
+    print("    <th align=left>Call</th>", file=fd)
+    for lv in breakdown['levels']:
+        print("    <th align=right>%s ns</th>" % number(lv['copies'], "copy", "copies"), file=fd)
+        print("    <th align=right>Scaling</th>", file=fd)
+    print("</tr>", file=fd)
+    for call in breakdown['calls']:
+        print("<tr>", file=fd)
+        print("    <td><b>%s</b></td>" % call['desc'], file=fd)
+        for lv in breakdown['levels']:
+            print("    <td align=right><tt>%.1f</tt></td>" % lv['ns'][call['name']], file=fd)
+            print("    <td align=right><tt>%s</tt></td>" % scalingText(lv['scaling'][call['name']]), file=fd)
+        print("</tr>", file=fd)
+    print("</table></p>\n", file=fd)
+
+
+def replayRows(diff):
+    for t in diff['tests']:
+        msg = config.testParams[t['test']]['logmsg'] if t['test'] in config.testParams else t['test']
+        yield (msg, t['copies'] or 0,
+               "%.1f" % t['bundle'] if t['bundle'] is not None else "---",
+               "%.1f" % t['replay'] if t['replay'] is not None else "---",
+               "%+.1f%%" % (t['delta'] * 100) if t['delta'] is not None else "---")
+
+
+def summarizeReplay(diff, reportFd):
+    print("------------------------------------------------------------------------", file=reportFd)
+    print("Replay of %s (recorded %s)" % (
+        diff['bundle'], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(diff['created']))), file=reportFd)
+    if diff['planChanged']:
+        print("   WARNING: the replayed plan differs from the recorded one", file=reportFd)
+    for key, was, now in diff['system']:
+        print("   System %s: %s, was %s" % (key, now, was), file=reportFd)
+    print(file=reportFd)
+    print("%-40s %6s %12s %12s %8s" % ("Test", "Copies", "Bundle", "Replay", "Delta"), file=reportFd)
+    for msg, copies, old, new, delta in replayRows(diff):
+        print("%-40s %6d %12s %12s %8s" % (msg[:40], copies, old, new, delta), file=reportFd)
+    print(file=reportFd)
+
+
+def summarizeReplayHtml(diff, fd):
+    print("<p><hr/></p>", file=fd)
+    print("<h3>Replay of %s</h3>" % diff['bundle'], file=fd)
+    notes = ["System %s: %s, was %s" % (key, now, was) for key, was, now in diff['system']]
+    if diff['planChanged']:
+        notes.insert(0, "<b>The replayed plan differs from the recorded one.</b>")
+    for note in notes:
+        print("<p>%s</p>" % note, file=fd)
+    print("<p><table width=\"100%\">", file=fd)
+    print("<tr>", file=fd)
+    print("    <th align=left>Test</th>", file=fd)
+    for head in ("Copies", "Bundle", "Replay", "Delta"):
+        print("    <th align=right>%s</th>" % head, file=fd)
+    print("</tr>", file=fd)
+    for msg, copies, old, new, delta in replayRows(diff):
+        print("<tr>", file=fd)
+        print("    <td><b>%s</b></td>" % msg, file=fd)
+        print("    <td align=right><tt>%d</tt></td>" % copies, file=fd)
+        for v in (old, new, delta):
+            print("    <td align=right><tt>%s</tt></td>" % v, file=fd)
+        print("</tr>", file=fd)
+    print("</table></p>\n", file=fd)
+
+
+def matrixRows(matrix):
+    rows = []
+    seen = set()
+    for results in matrix:
+        for bench in results['list']:
+            if bench not in seen:
+                seen.add(bench)
+                rows.append((bench, results['list'][bench]['msg']))
+    return rows
+
+
+def matrixDelta(value, base):
+    if value is None or not base:
+        return None
+    return (value / base - 1.0) * 100
+
+
+def summarizeMatrix(matrix, reportFd):
+    names = [r['build']['name'] for r in matrix]
+    print("------------------------------------------------------------------------", file=reportFd)
+    print("Compiler matrix: %s; deltas relative to %s" % (
+        number(matrix[0]['copies'], "parallel copy", "parallel copies"), names[0]), file=reportFd)
+    print(file=reportFd)
+
+    head = "%-40s %12s" % ("Test", names[0][:12])
+    for name in names[1:]:
+        head += " %12s %8s" % (name[:12], "delta")
+    print(head, file=reportFd)
+
+    def row(label, values):
+        line = "%-40s %12s" % (label[:40], "%.1f" % values[0] if values[0] is not None else "---")
+        for v in values[1:]:
+            d = matrixDelta(v, values[0])
+            line += " %12s %8s" % ("%.1f" % v if v is not None else "---", "%+.1f%%" % d if d is not None else "---")
+        print(line, file=reportFd)
+
+    for bench, msg in matrixRows(matrix):
+        row(msg, [r[bench]['score'] if bench in r and 'score' in r[bench] else None for r in matrix])
+
+    cats = []
+    for results in matrix:
+        cats.extend(c for c in results.get('index', {}) if c not in cats)
+    for cat in cats:
+        row(config.testCats[cat]['name'] + " Index", [r.get('index', {}).get(cat) for r in matrix])
+    print(file=reportFd)
+
+
+def summarizeMatrixHtml(matrix, fd):
+    names = [r['build']['name'] for r in matrix]
+    print("<h3>Compiler matrix: %s</h3>" % number(matrix[0]['copies'], "parallel process", "parallel processes"),
+          file=fd)
+    print("<p><table>", file=fd)
+    print("<tr>", file=fd)
+    print("    <th align=left>Test</th>", file=fd)
+    print("    <th align=right>%s</th>" % names[0], file=fd)
+    for name in names[1:]:
+        print("    <th align=right>%s</th>" % name, file=fd)
+        print("    <th align=right>Delta</th>", file=fd)
+    print("</tr>", file=fd)
+
+    def row(label, values, bold=False):
+        b, eb = ("<b>", "</b>") if bold else ("", "")
+        print("<tr>", file=fd)
+        print("    <td>%s%s%s</td>" % (b, label, eb), file=fd)
+        print("    <td align=right><tt>%s</tt></td>" % ("%.1f" % values[0] if values[0] is not None else "---"), file=fd)
+        for v in values[1:]:
+            d = matrixDelta(v, values[0])
+            print("    <td align=right><tt>%s</tt></td>" % ("%.1f" % v if v is not None else "---"), file=fd)
+            print("    <td align=right><tt>%s</tt></td>" % ("%+.1f%%" % d if d is not None else "---"), file=fd)
+        print("</tr>", file=fd)
+
+    for bench, msg in matrixRows(matrix):
+        row(msg, [r[bench]['score'] if bench in r and 'score' in r[bench] else None for r in matrix])
+
+    cats = []
+    for results in matrix:
+        cats.extend(c for c in results.get('index', {}) if c not in cats)
+    for cat in cats:
+        row(config.testCats[cat]['name'] + " Index", [r.get('index', {}).get(cat) for r in matrix], bold=True)
+    print("</table></p>\n", file=fd)
+
+
+def runHeaderHtml(systemInfo, reportFd):
+    title = "Benchmark of %s / %s on %s" % (
+        systemInfo['name'], systemInfo['system'],
+        time.strftime("%Y-%m-%d", time.localtime())
+    )
+    print("""
+<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN"
+"http://www.w3.org/TR/html4/loose.dtd">
+<html>
+<head>
+  <meta http-equiv="Content-Type" content="text/html; charset=utf-8">
+  <meta name="keywords" content="linux, benchmarks, benchmarking">
+  <title>$title</title>
+  <style type="text/css">
+    table {
+      margin: 1em 1em 1em 0;
+      background: #f9f9f9;
+      border: 1px #aaaaaa solid;
+      border-collapse: collapse;
+    }
+
+    table th, table td {
+      border: 1px #aaaaaa solid;
+      padding: 0.2em;
+    }
+
+    table th {
+      background: #f2f2f2;
+      text-align: center;
+    }
+  </style>
+</head>
+<body>""", file=reportFd)
+
+    print("<h2>%s</h2>" % title, file=reportFd)
+    print("<p><b>BYTE UNIX Benchmarks (Version %s)</b></p>\n" % config.version, file=reportFd)
+
+
+def displaySystemHtml(info, fd):
+    print("<h3>Test System Information</h3>", file=fd)
+    print("<p><table>", file=fd)
+
+    print("<tr>", file=fd)
+    print("    <td><b>System:</b></td>", file=fd)
+    print("    <td colspan=2>%s: %s</td>" % (info['name'], info['system']), file=fd)
+    print("</tr><tr>", file=fd)
+    print("    <td><b>OS:</b></td>", file=fd)
+    print("    <td colspan=2>%s -- %s -- %s</td>" % (info['os'], info['osRel'], info['osVer']), file=fd)
+    print("</tr><tr>", file=fd)
+    print("    <td><b>Machine:</b></td>", file=fd)
+    print("    <td colspan=2>%s: %s</td>" % (info['mach'], info['platform']), file=fd)
+    print("</tr><tr>", file=fd)
+    print("    <td><b>Language:</b></td>", file=fd)
+    print("    <td colspan=2>%s</td>" % info['language'], file=fd)
+    print("</tr>", file=fd)
+
+    if 'cpus' not in info:
+        print("<tr>", file=fd)
+        print("    <td><b>CPUs:</b></td>", file=fd)
+        print("    <td colspan=2>no details available</td>", file=fd)
+        print("</tr>", file=fd)
+    else:
+        cpus = info['cpus']
+        for i, v in enumerate(cpus):
+            print("<tr>", file=fd)
+            if i == 0:
+                print("    <td rowspan=%d><b>CPUs:</b></td>" % (i + 1), file=fd)
+            print("    <td><b>%d:</b></td>" % i, file=fd)
+            print("    <td>%s (%.1f bogomips)<br />" % (cpus[i]['model'], cpus[i]['bogo']), file=fd)
+            print("    %s</td>" % cpus[i]['flags'], file=fd)
+            print("</tr>", file=fd)
+
+    if "graphics" in info and info['graphics']:
+        print("<tr>", file=fd)
+        print("    <td><b>Graphics:</b></td>", file=fd)
+        print("    <td colspan=2>%s</td>" % info['graphics'], file=fd)
+        print("</tr>", file=fd)
+
+    if 'build' in info and info['build']:
+        print("<tr>", file=fd)
+        print("    <td><b>Build:</b></td>", file=fd)
+        print("    <td colspan=2>%s</td>" % describeBuild(info['build']), file=fd)
+        print("</tr>", file=fd)
+
+    if 'tuning' in info and info['tuning']:
+        print("<tr>", file=fd)
+        print("    <td><b>Tuning:</b></td>", file=fd)
+        print("    <td colspan=2>%s</td>" % describeTuning(info['tuning']), file=fd)
+        print("</tr>", file=fd)
+
+    if 'energy' in info and info['energy']:
+        print("<tr>", file=fd)
+        print("    <td><b>Energy:</b></td>", file=fd)
+        print("    <td colspan=2>%s</td>" % describeEnergyMeter(info['energy']), file=fd)
+        print("</tr>", file=fd)
+
+    if cgroupLimited(info):
+        print("<tr>", file=fd)
+        print("    <td><b>Cgroup:</b></td>", file=fd)
+        print("    <td colspan=2>v%d: %s (%s usable)</td>" % (
+            info['cgroup']['version'], describeCgroupLimits(info['cgroup']),
+            number(info['effectiveCpus'], "CPU")
+        ), file=fd)
+        print("</tr>", file=fd)
+
+    print("<tr>", file=fd)
+    print("    <td><b>Uptime:</b></td>", file=fd)
+    print("    <td colspan=2>%s; runlevel %s</td>" % (info['load'], info['runlevel']), file=fd)
+    print("</tr>", file=fd)
+
+    print("</table></p>\n", file=fd)
+
+
+def logCatResultHtml(results, cat, fd):
+    numIndex = results['numIndex'][cat] if 'numIndex' in results and cat in results['numIndex'] else None
+    indexed = results['indexed'][cat] if 'indexed' in results and cat in results['indexed'] else None
+    iscore = results['index'][cat] if "index" in results and cat in results['index'] else None
+    full = indexed is not None and indexed == numIndex
+
+    if "numCat" not in results or cat not in results['numCat'] or results['numCat'][cat] == 0:
+        return
+
+    warn = ""
+    if indexed and indexed == 0:
+        warn = " - no index results available"
+    elif not full:
+        warn = " - not all index tests were run;" + \
+               " only a partial index score is available"
+    print("<h4>%s%s</h4>" % (config.testCats[cat]['name'], warn), file=fd)
+
+    print("<p><table width=\"100%\"", file=fd)
+
+    print("<tr>", file=fd)
+    print("    <th align=left>Test</th>", file=fd)
+    print("    <th align=right>Score</th>", file=fd)
+    print("    <th align=left>Unit</th>", file=fd)
+    print("    <th align=right>Time</th>", file=fd)
+    print("    <th align=right>Iters.</th>", file=fd)
+    print("    <th align=right>95% CI</th>", file=fd)
+    print("    <th align=right>Baseline</th>", file=fd)
+    print("    <th align=right>Index</th>", file=fd)
+    print("</tr>", file=fd)
+
+    for bench in results['list']:
+        bresult = results[bench]
+        if bresult['cat'] != cat:
+            continue
+
+        print("<tr>", file=fd)
+        print("    <td><b>%s</b></td>" % bresult['msg'], file=fd)
+        print("    <td align=right><tt>%.1f</tt></td>" % bresult['score'], file=fd)
+        print("    <td align=left><tt>%s</tt></td>" % bresult['scorelabel'], file=fd)
+        print("    <td align=right><tt>%.1f s</tt></td>" % bresult['time'], file=fd)
+        print("    <td align=right><tt>%d</tt></td>" % bresult['iterations'], file=fd)
+        print("    <td align=right><tt>%s</tt></td>" % (
+            describeInterval(bresult['ci']) if 'ci' in bresult and bresult['ci'] else "---"), file=fd)
+
+        if "index" in bresult and bresult['index']:
+            print("    <td align=right><tt>%.1f</tt></td>" % bresult['iscore'], file=fd)
+            print("    <td align=right><tt>%.1f</tt></td>" % bresult['index'], file=fd)
+
+        print("</tr>", file=fd)
+
+    if indexed and indexed > 0:
+        title = config.testCats[cat]['name'] + " Index Score"
+        if not full:
+            title += " (Partial Only)"
+        ci = results['indexCi'][cat] if 'indexCi' in results and cat in results['indexCi'] else None
+        print("<tr>", file=fd)
+        print("    <td colspan=7><b>%s:</b></td>" % title, file=fd)
+        print("    <td align=right><b><tt>%.1f</tt></b></td>" % iscore, file=fd)
+        print("</tr>", file=fd)
+        if ci:
+            print("<tr>", file=fd)
+            print("    <td colspan=7>95% confidence interval:</td>", file=fd)
+            print("    <td align=right><tt>%s</tt></td>" % describeInterval(ci), file=fd)
+            print("</tr>", file=fd)
+
+    print("</table></p>\n", file=fd)
+
+
+def logResultsHtml(results, fd):
+    for cat in config.testCats.keys():
+        logCatResultHtml(results, cat, fd)
+
+
+def logNotesHtml(results, fd):
+    notes = []
+    for bench in results['list']:
+        bresult = results[bench]
+        if 'cgroupThrottle' in bresult and bresult['cgroupThrottle']['throttled'] > 0:
+            notes.append("%s: CFS throttled %d of %d periods (%.1f ms)" % (
+                bresult['msg'],
+                bresult['cgroupThrottle']['throttled'],
+                bresult['cgroupThrottle']['periods'],
+                bresult['cgroupThrottle']['throttledUsec'] / 1000.0
+            ))
+        if 'thermal' in bresult and bresult['thermal'] and bresult['thermal']['throttledPasses'] > 0:
+            notes.append("%s: %s" % (bresult['msg'], describeThermal(bresult['thermal'])))
+        if 'fairness' in bresult and bresult['fairness']:
+            notes.append("%s: copy fairness %s" % (bresult['msg'], describeFairness(bresult['fairness'])))
+        if 'rusage' in bresult and bresult['rusage']:
+            notes.append("%s: %s" % (bresult['msg'], describeRusage(bresult['rusage'])))
+        if 'energy' in bresult and bresult['energy']:
+            notes.append("%s: energy %s" % (bresult['msg'], describeEnergy(bresult['energy'], bresult['scorelabel'])))
+        if 'interference' in bresult:
+            notes.append("%s: interference %s" % (bresult['msg'], describeInterference(bresult['interference'])))
+        if 'passRule' in bresult:
+            notes.append("%s: %s" % (bresult['msg'], describePassRule(bresult['passRule'])))
+    for cat, energy in results.get('energy', {}).items():
+        notes.append("%s Index: energy %s" % (config.testCats[cat]['name'], describeEnergy(energy, "index")))
+    if not notes:
+        return
+
+    print("<h4>Notes</h4>", file=fd)
+    print("<ul>", file=fd)
+    for note in notes:
+        print("    <li>%s</li>" % note, file=fd)
+    print("</ul>\n", file=fd)
+
+
+def summarizeRunHtml(systemInfo, results, verbose, reportFd):
+    time_ = results['end'] - results['start']
+    print("<p><hr/></p>", file=reportFd)
+    print("<h3>Benchmark Run: %s; %s%s</h3>" % (
+        number(systemInfo['numCpus'], "CPU"),
+        number(results['copies'], "parallel process", "parallel processes"),
+        "; mix " + describeMix(results['mix']) if 'mix' in results else ""
+    ), file=reportFd)
+    print("<p>Time: %s - %s; %dm %02ds</p>" % (
+        time.strftime("%H:%M:%S", time.localtime(results['start'])),
+        time.strftime("%H:%M:%S", time.localtime(results['end'])),
+        int(time_ // 60), time_ % 60
+    ), file=reportFd)
+    if results['build']:
+        print("<p>Build %s: %s</p>" % (results['build']['name'], describeBuild(results['build']['manifest'])),
+              file=reportFd)
+    if cgroupLimited(systemInfo):
+        print("<p>Run under cgroup limits: %s</p>" % describeCgroupLimits(systemInfo['cgroup']), file=reportFd)
+    print(file=reportFd)
+
+    logResultsHtml(results, reportFd)
+    if 'mix' in results:
+        print("<p><b>Consolidation Score: %s</b> (copy-weighted geometric mean of the component indexes)</p>" % (
+            "%.1f" % results['mixIndex'] if results['mixIndex'] is not None else "---"), file=reportFd)
+    logNotesHtml(results, reportFd)
+
+
+def runFooterHtml(reportFd):
+    print("""
+<p><hr/></p>
+<div><b>No Warranties:</b> This information is provided free of charge and "as
+is" without any warranty, condition, or representation of any kind,
+either express or implied, including but not limited to, any warranty
+respecting non-infringement, and the implied warranties of conditions
+of merchantability and fitness for a particular purpose. All logos or
+trademarks on this site are the property of their respective owner. In
+no event shall the author be liable for any
+direct, indirect, special, incidental, consequential or other damages
+howsoever caused whether arising in contract, tort, or otherwise,
+arising out of or in connection with the use or performance of the
+information contained on this web site.</div>
+</body>
+</html>""", file=reportFd)
@@ -0,0 +1,147 @@
+"""Typed benchmark results for library users.
+
+The benchmark code itself passes plain dicts around; these classes are
+built from them at the API boundary (see api.Runner).
+"""
+
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .scoring import passScore
+
+# Slots keep the per-pass objects small on long runs; dataclass only
+# supports them from Python 3.10 on.
+_dataclass = dataclass(slots=True) if sys.version_info >= (3, 10) else dataclass
+
+
+@_dataclass
+class PassResult:
+    bench: str
+    copies: int
+    number: int
+    count: float
+    timebase: int
+    label: str
+    time: float
+    elapsed: float
+    score: float
+    warmup: bool = False
+    dropReason: Optional[str] = None
+    thermal: Optional[dict] = None
+    cgroupThrottle: Optional[dict] = None
+    copyResults: List[dict] = field(default_factory=list)
+    fairness: Optional[dict] = None
+    rusage: Optional[dict] = None
+    energy: Optional[dict] = None
+
+    @classmethod
+    def fromDict(cls, bench, copies, number, presult, warmup=False):
+        return cls(
+            bench=bench,
+            copies=copies,
+            number=number,
+            count=float(presult['COUNT0']),
+            timebase=int(presult['COUNT1']),
+            label=presult['COUNT2'],
+            time=float(presult['TIME']) if presult['TIME'] else float(presult['elapsed']),
+            elapsed=float(presult['elapsed']),
+            score=passScore(presult),
+            warmup=warmup,
+            dropReason=presult.get('dropReason'),
+            thermal=presult.get('thermal'),
+            cgroupThrottle=presult.get('cgroupThrottle'),
+            copyResults=presult.get('copyResults', []),
+            fairness=presult.get('fairness'),
+            rusage=presult.get('rusage'),
+            energy=presult.get('energy'),
+        )
+
+
+@_dataclass
+class BenchResult:
+    name: str
+    msg: str
+    cat: str
+    copies: int
+    score: Optional[float] = None
+    scoreLabel: Optional[str] = None
+    time: Optional[float] = None
+    iterations: int = 0
+    ci: Optional[Tuple[float, float]] = None
+    baseline: Optional[float] = None
+    index: Optional[float] = None
+    passes: List[PassResult] = field(default_factory=list)
+    warmup: List[PassResult] = field(default_factory=list)
+    passRule: Optional[dict] = None
+    thermal: Optional[dict] = None
+    cgroupThrottle: Optional[dict] = None
+    fairness: Optional[dict] = None
+    rusage: Optional[dict] = None
+    energy: Optional[dict] = None
+    interference: Optional[dict] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def fromDict(cls, bresult, copies):
+        return cls(
+            name=bresult['name'],
+            msg=bresult['msg'],
+            cat=bresult['cat'],
+            copies=copies,
+            score=bresult.get('score'),
+            scoreLabel=bresult.get('scorelabel'),
+            time=bresult.get('time'),
+            iterations=bresult.get('iterations', 0),
+            ci=tuple(bresult['ci']) if bresult.get('ci') else None,
+            baseline=bresult.get('iscore'),
+            index=bresult.get('index'),
+            passes=[PassResult.fromDict(bresult['name'], copies, i + 1, p)
+                    for i, p in enumerate(bresult['passes'])],
+            warmup=[PassResult.fromDict(bresult['name'], copies, i + 1, p, warmup=True)
+                    for i, p in enumerate(bresult.get('warmup', []))],
+            passRule=bresult.get('passRule'),
+            thermal=bresult.get('thermal'),
+            cgroupThrottle=bresult.get('cgroupThrottle'),
+            fairness=bresult.get('fairness'),
+            rusage=bresult.get('rusage'),
+            energy=bresult.get('energy'),
+            interference=dict(bresult['interference'],
+                              loaded=cls.fromDict(bresult['interference']['loaded'], copies))
+            if 'interference' in bresult else None,
+            error=bresult.get('error'),
+        )
+
+
+@_dataclass
+class RunResult:
+    copies: int
+    start: float
+    end: float
+    benches: Dict[str, BenchResult] = field(default_factory=dict)
+    index: Dict[str, float] = field(default_factory=dict)
+    indexCi: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    energy: Dict[str, dict] = field(default_factory=dict)
+    build: Optional[str] = None
+    tuning: Optional[dict] = None
+    graphics: Optional[str] = None
+    mix: Optional[List[Tuple[str, int]]] = None
+    mixIndex: Optional[float] = None
+
+    @classmethod
+    def fromDict(cls, results):
+        return cls(
+            copies=results['copies'],
+            start=results['start'],
+            end=results['end'],
+            benches={b: BenchResult.fromDict(results['list'][b], results['list'][b].get('copies', results['copies']))
+                     for b in results['list']},
+            index=dict(results.get('index', {})),
+            indexCi={c: tuple(ci) for c, ci in results.get('indexCi', {}).items() if ci},
+            energy=dict(results.get('energy', {})),
+            build=results['build']['name'] if results['build'] else None,
+            tuning=results['tuning'],
+            graphics=results.get('graphics'),
+            mix=results.get('mix'),
+            mixIndex=results.get('mixIndex'),
+        )
@@ -0,0 +1,420 @@
+"""Combining pass results into benchmark scores and index values."""
+
+import math
+import os
+import random
+
+from . import config
+from .utils import abortRun, number, printLog
+
+
+def readResultsFromFile(file):
+    if not os.path.exists(file):
+        return None
+
+    fd = open(file, "r")
+    try:
+        results = {}
+        line = fd.readline()
+        while line:
+            line = line.strip()
+            if not line:
+                line = fd.readline()
+                continue
+            if line.startswith("#"):
+                line = fd.readline()
+                continue
+            name, time, slab, sum, score, iters = line.split('|')
+            bresult = {
+                'score': score,
+                'scorelabel': slab,
+                'time': time,
+                'iterations': iters,
+            }
+            results[name] = bresult
+            line = fd.readline()
+
+        fd.close()
+        return results
+    except BaseException as e:
+        if not fd.closed:
+            fd.close()
+        raise e
+
+
+def passScore(presult):
+    count = float(presult['COUNT0'])
+    timebase = int(presult['COUNT1'])
+    time = float(presult['TIME']) if presult['TIME'] else float(presult['elapsed'])
+    return count / (time / timebase) if timebase > 0 else count
+
+
+def copyFairness(perCopy):
+    rates = [c['count'] / c['time'] if c['time'] else c['count'] for c in perCopy]
+    ends = [c['offset'] + c['elapsed'] for c in perCopy]
+    squares = sum(r * r for r in rates)
+    return {
+        # Jain's index: 1.0 when every copy got the same rate, 1/n when one
+        # copy got everything.
+        'jain': sum(rates) ** 2 / (len(rates) * squares) if squares else 1.0,
+        'minMax': min(rates) / max(rates) if max(rates) else 1.0,
+        # Offsets are launch times as the harness saw them, not when a
+        # copy began its work; exec and page-in delays show up in the
+        # end skew and the rates.
+        'launchSkew': max(c['offset'] for c in perCopy),
+        'endSkew': max(ends) - min(ends),
+        'straggler': rates.index(min(rates)),
+    }
+
+
+def summarizeFairness(pres):
+    passes = [p['fairness'] for p in pres if 'fairness' in p and p['fairness']]
+    if not passes:
+        return None
+    return {
+        'passes': len(passes),
+        'jain': min(f['jain'] for f in passes),
+        'minMax': min(f['minMax'] for f in passes),
+        'launchSkew': max(f['launchSkew'] for f in passes),
+        'endSkew': max(f['endSkew'] for f in passes),
+    }
+
+
+def describeFairness(fairness):
+    return "Jain %.3f, min/max %.2f, launch skew %.1f ms, end skew %.1f ms" % (
+        fairness['jain'], fairness['minMax'], fairness['launchSkew'] * 1000, fairness['endSkew'] * 1000)
+
+
+def passRusage(perCopy, workers):
+    usage = [c['rusage'] for c in perCopy if c['rusage']]
+    if not usage:
+        return None
+    total = {k: sum(u[k] for u in usage) for k in ('utime', 'stime', 'minflt', 'majflt', 'nvcsw', 'nivcsw')}
+    total['maxrss'] = max(u['maxrss'] for u in usage)
+    wall = max(c['offset'] + c['elapsed'] for c in perCopy)
+    # 1.0 when every worker kept a CPU busy for the whole pass.
+    total['cpuEfficiency'] = (total['utime'] + total['stime']) / (wall * workers) if wall > 0 else None
+    return total
+
+
+def summarizeRusage(pres):
+    passes = [p['rusage'] for p in pres if 'rusage' in p and p['rusage']]
+    if not passes:
+        return None
+    summary = {k: sum(r[k] for r in passes) / len(passes)
+               for k in ('utime', 'stime', 'minflt', 'majflt', 'nvcsw', 'nivcsw')}
+    summary['maxrss'] = max(r['maxrss'] for r in passes)
+    effs = [r['cpuEfficiency'] for r in passes if r['cpuEfficiency'] is not None]
+    summary['cpuEfficiency'] = sum(effs) / len(effs) if effs else None
+    summary['minCpuEfficiency'] = min(effs) if effs else None
+    return summary
+
+
+def describeRusage(rusage):
+    parts = []
+    if rusage['cpuEfficiency'] is not None:
+        parts.append("CPU efficiency %.0f%%" % (rusage['cpuEfficiency'] * 100))
+    parts.append("user %.2f s, sys %.2f s" % (rusage['utime'], rusage['stime']))
+    parts.append("max RSS %.1f MB" % (rusage['maxrss'] / 1024.0))
+    parts.append("%d/%d major/minor faults" % (rusage['majflt'], rusage['minflt']))
+    parts.append("%d/%d vol/invol switches" % (rusage['nvcsw'], rusage['nivcsw']))
+    return ", ".join(parts)
+
+
+def welchT(a, b):
+    ma = sum(a) / len(a)
+    mb = sum(b) / len(b)
+    va = sum((x - ma) ** 2 for x in a) / (len(a) - 1) if len(a) > 1 else 0.0
+    vb = sum((x - mb) ** 2 for x in b) / (len(b) - 1) if len(b) > 1 else 0.0
+    se = math.sqrt(va / len(a) + vb / len(b))
+    if se == 0:
+        return 0.0 if ma == mb else math.inf
+    return abs(ma - mb) / se
+
+
+def detectSteadyState(scores, threshold=3.0, minPasses=3):
+    # Repeatedly split the series at the strongest mean shift; while that
+    # shift is significant, everything before it is still settling.
+    start = 0
+    while len(scores) - start >= minPasses + 1:
+        tail = scores[start:]
+        best = None
+        bestT = 0.0
+        for k in range(1, len(tail) - minPasses + 1):
+            t = welchT(tail[:k], tail[k:])
+            if t > bestT:
+                best, bestT = k, t
+        if best is None or bestT < threshold:
+            break
+        start += best
+    return start
+
+
+def geoMean(scores):
+    return math.exp(sum(math.log(x) for x in scores) / len(scores))
+
+
+def median(scores):
+    scores = sorted(scores)
+    mid = len(scores) // 2
+    return scores[mid] if len(scores) % 2 else (scores[mid - 1] + scores[mid]) / 2
+
+
+def mean(scores):
+    return sum(scores) / len(scores)
+
+
+def selectLegacy(pres, dropRule):
+    # The original UnixBench rule: the lowest third by count is dumped.
+    pres = sorted(pres, key=lambda x: float(x['COUNT0']))
+    ndump = len(pres) // 3 if dropRule == "lowest-third" else 0
+    return pres[ndump:], [(p, dropRule) for p in pres[:ndump]]
+
+
+def selectAll(pres, dropRule):
+    return list(pres), []
+
+
+def selectTrimmed(pres, dropRule):
+    pres = sorted(pres, key=passScore)
+    ntrim = int(len(pres) * 0.2)
+    if ntrim == 0:
+        return pres, []
+    return pres[ntrim:-ntrim], [(p, "trimmed") for p in pres[:ntrim] + pres[-ntrim:]]
+
+
+def selectMad(pres, dropRule):
+    # Reject passes more than 3 scaled MADs from the median, either side.
+    scores = [passScore(p) for p in pres]
+    med = median(scores)
+    mad = median([abs(x - med) for x in scores]) * 1.4826
+    if mad == 0:
+        return list(pres), []
+    kept = [p for p, x in zip(pres, scores) if abs(x - med) <= 3 * mad]
+    return kept, [(p, "outlier") for p, x in zip(pres, scores) if abs(x - med) > 3 * mad]
+
+
+# Pass selection and the statistic applied to the selected pass scores.
+aggregators = {
+    'legacy': (selectLegacy, geoMean),
+    'median': (selectAll, median),
+    'trimmed-mean': (selectTrimmed, mean),
+    'mad': (selectMad, geoMean),
+}
+
+
+def aggregateScore(pres, aggregate, dropRule):
+    select, statistic = aggregators[aggregate]
+    kept, dropped = select(pres, dropRule)
+    return (statistic([passScore(p) for p in kept]) if kept else None), kept, dropped
+
+
+def percentileRange(values, level=0.95):
+    values = sorted(values)
+    tail = (1.0 - level) / 2
+    return values[int(len(values) * tail)], values[min(len(values) - 1, int(len(values) * (1.0 - tail)))]
+
+
+def bootstrapScores(bench, pres, aggregate, dropRule, rounds):
+    # Seeded by the test name, so a rerun over the same passes (a replay)
+    # gets the same interval.
+    if rounds <= 0 or len(pres) < 2:
+        return None
+    rnd = random.Random(bench)
+    reps = []
+    for i in range(rounds):
+        score, kept, dropped = aggregateScore([rnd.choice(pres) for p in pres], aggregate, dropRule)
+        reps.append(score)
+    return reps
+
+
+def leastThrottled(pres):
+    def key(p):
+        t = p['thermal'] if 'thermal' in p and p['thermal'] else {}
+        return (t.get('throttleEvents') or 0, -(t.get('minFreqRatio') or 1.0), t.get('maxTemp') or 0.0)
+    return min(pres, key=key)
+
+
+def combinePassResults(bench, tdata, bresult, logFile, runOpts=None):
+    bresult['cat'] = tdata['cat']
+
+    dropRule = runOpts['dropRule'] if runOpts and 'dropRule' in runOpts else "lowest-third"
+    steadyState = runOpts['steadyState'] if runOpts and 'steadyState' in runOpts else False
+    aggregate = runOpts['aggregate'] if runOpts and 'aggregate' in runOpts else "legacy"
+    rounds = runOpts['bootstrap'] if runOpts and 'bootstrap' in runOpts else 1000
+
+    pres: dict = bresult['passes']
+
+    for i, presult in enumerate(pres):
+        if 'invalid' in presult and presult['invalid']:
+            printLog(logFile, "*Invalid score (%s, pass %d): %12.1f\n" % (
+                presult['invalid'], i + 1, float(presult['COUNT0'])))
+            presult['dropReason'] = presult['invalid']
+    pres = [p for p in pres if not ('invalid' in p and p['invalid'])]
+    keptInvalid = False
+    if not pres and bresult['passes']:
+        # Every pass was invalid; score the least throttled one rather
+        # than leaving the test without a result.
+        presult = leastThrottled(bresult['passes'])
+        del presult['dropReason']
+        printLog(logFile, "*All passes invalid; keeping pass %d (%s): %12.1f\n" % (
+            bresult['passes'].index(presult) + 1, presult['invalid'], float(presult['COUNT0'])))
+        pres = [presult]
+        keptInvalid = True
+    ninvalid = len(bresult['passes']) - len(pres)
+
+    nunsteady = 0
+    if steadyState and len(pres) > 0:
+        nunsteady = detectSteadyState([passScore(p) for p in pres])
+        for presult in pres[:nunsteady]:
+            printLog(logFile, "*Unsteady score: %12.1f\n" % float(presult['COUNT0']))
+            presult['dropReason'] = "unsteady"
+        pres = pres[nunsteady:]
+
+    score, kept, dropped = aggregateScore(pres, aggregate, dropRule) if pres else (None, [], [])
+    bresult['passRule'] = {
+        'warmup': len(bresult['warmup']) if 'warmup' in bresult else 0,
+        'invalid': ninvalid,
+        'keptInvalid': keptInvalid,
+        'steadyState': steadyState,
+        'unsteady': nunsteady,
+        'aggregate': aggregate,
+        'drop': dropRule,
+        'dropped': len(dropped),
+    }
+
+    for presult, reason in dropped:
+        printLog(logFile, "*Dump score: %12.1f\n" % float(presult['COUNT0']))
+        presult['dropReason'] = reason
+    for presult in sorted(kept, key=lambda x: float(x['COUNT0'])):
+        printLog(logFile, "Count score: %12.1f\n" % float(presult['COUNT0']))
+
+    if kept:
+        bresult['score'] = score
+        bresult['scorelabel'] = kept[-1]['COUNT2']
+        bresult['time'] = sum(float(p['TIME']) if p['TIME'] else float(p['elapsed']) for p in kept) / len(kept)
+        bresult['iterations'] = len(kept)
+        bresult['bootstrap'] = bootstrapScores(bench, pres, aggregate, dropRule, rounds)
+        bresult['ci'] = percentileRange(bresult['bootstrap']) if bresult['bootstrap'] else None
+    else:
+        bresult['error'] = "No measured results"
+
+
+def describePassRule(rule):
+    parts = []
+    if rule['warmup']:
+        parts.append("%s excluded" % number(rule['warmup'], "warm-up pass", "warm-up passes"))
+    if rule['invalid']:
+        parts.append("%d invalid" % rule['invalid'])
+    if 'keptInvalid' in rule and rule['keptInvalid']:
+        parts.append("all passes invalid, least throttled one kept")
+    if rule['steadyState']:
+        parts.append("%d before steady state" % rule['unsteady'])
+    aggregate = rule['aggregate'] if 'aggregate' in rule else "legacy"
+    if aggregate == "median":
+        parts.append("median of all passes")
+    elif aggregate == "trimmed-mean":
+        parts.append("20%% trimmed mean (%d trimmed)" % rule['dropped'])
+    elif aggregate == "mad":
+        parts.append("outliers beyond 3 MAD rejected (%d)" % rule['dropped'])
+    elif rule['drop'] == "lowest-third":
+        parts.append("lowest third dropped (%d)" % rule['dropped'])
+    else:
+        parts.append("no passes dropped")
+    return ", ".join(parts)
+
+
+def readIndexBase():
+    index = readResultsFromFile(os.path.join(config.BINDIR, "index.base"))
+    if not index:
+        return None
+    # Programs shipped with this package carry their own baselines; the
+    # UnixBench tree's index.base takes precedence.
+    extra = readResultsFromFile(os.path.join(config.PKGSRCDIR, "index.base")) or {}
+    for bench, iresult in extra.items():
+        index.setdefault(bench, iresult)
+    return index
+
+
+def indexResults(results):
+    index = readIndexBase()
+    if not index:
+        return
+
+    numCat = {}
+    for bench in results['list']:
+        bresult = results[bench]
+        if bresult['cat'] in numCat:
+            numCat[bresult['cat']] += 1
+        else:
+            numCat[bresult['cat']] = 0
+    results['numCat'] = numCat
+
+    numIndex = {}
+    indexed = {}
+    sum = {}
+    reps = {}
+    for bench in sorted(index.keys()):
+        tdata = config.testParams[bench]
+        if not tdata:
+            abortRun(f"unknown benchmark \"{bench}\" in {config.BINDIR}/index.base")
+
+        cat = tdata['cat']
+        if cat not in numIndex:
+            numIndex[cat] = 0
+        numIndex[cat] += 1
+
+        if bench not in results or not results[bench]:
+            continue
+
+        iresult = index[bench]
+        bresult = results[bench]
+        ratio = bresult['score'] / float(iresult['score'])
+
+        bresult['iscore'] = float(iresult['score'])
+        bresult['index'] = ratio * 10
+
+        if cat not in sum:
+            sum[cat] = 0.0
+        sum[cat] += math.log(ratio)
+        boot = bresult['bootstrap'] if 'bootstrap' in bresult else None
+        reps.setdefault(cat, []).append([x / float(iresult['score']) for x in boot] if boot else ratio)
+        if cat not in indexed:
+            indexed[cat] = 0
+        indexed[cat] += 1
+
+    results['indexed'] = indexed
+    results['numIndex'] = numIndex
+    results['index'] = {}
+    results['indexCi'] = {}
+    for c in sorted(indexed.keys()):
+        if indexed[c] > 0:
+            results['index'][c] = math.exp(sum[c] / indexed[c]) * 10
+            results['indexCi'][c] = indexInterval(reps[c])
+
+
+def indexInterval(ratios):
+    # Replicate i of the category index combines replicate i of every test;
+    # a test without replicates contributes its ratio to each of them.
+    rounds = max((len(r) for r in ratios if isinstance(r, list)), default=0)
+    if not rounds:
+        return None
+    index = []
+    for i in range(rounds):
+        logs = [math.log(r[i] if isinstance(r, list) else r) for r in ratios]
+        index.append(math.exp(sum(logs) / len(logs)) * 10)
+    return percentileRange(index)
+
+
+def mixIndex(results):
+    # Consolidation score: geometric mean of the component index values,
+    # weighted by how many copies of each component ran.
+    weights = 0
+    product = 0.0
+    for bench in results['list']:
+        bresult = results[bench]
+        if 'index' not in bresult or not bresult['index']:
+            continue
+        weights += bresult['copies']
+        product += bresult['copies'] * math.log(bresult['index'])
+    return math.exp(product / weights) if weights else None
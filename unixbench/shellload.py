@@ -0,0 +1,220 @@
+"""Shell-script workload engine.
+
+Runs a bundle of shell scripts from N concurrent workers for a fixed time
+and records every invocation's latency, for a sweep of concurrency levels
+(1 up to twice the CPU count by default).  Each worker runs the bundle's
+scripts round-robin, so the mix per worker stays the same at every level.
+
+A bundle is a directory of scripts; files ending in .sh are run with
+/bin/sh, other executable files directly.  Scripts run in a private
+scratch directory with UB_DATA (a text file of words), UB_WORKER and
+UB_BUNDLE set.  The builtin bundle is sort/grep/awk/od pipelines in the
+spirit of the classic tst.sh.
+"""
+
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import time
+
+from . import config
+from .progress import progressBench, progressBenchDone
+from .utils import printLog
+
+builtinScripts = {
+    'sort.sh': 'sort "$UB_DATA" | uniq -c | sort -rn | head -n 20 > top.txt\n',
+    'grep.sh': 'grep -c "e[a-m]" "$UB_DATA" > /dev/null\ngrep -v a "$UB_DATA" | wc -l > count.txt\n',
+    'awk.sh': 'awk \'{ n[$1]++ } END { for (w in n) print w, n[w] }\' "$UB_DATA" | sort > words.txt\n',
+    'od.sh': 'od -x "$UB_DATA" | head -n 500 | tee od.out | wc -l > /dev/null\nrm -f od.out\n',
+}
+
+
+def sweepLevels(numCpus):
+    levels = []
+    n = 1
+    while n < 2 * numCpus:
+        levels.append(n)
+        n *= 2
+    levels.append(2 * numCpus)
+    return levels
+
+
+def writeBuiltinBundle(directory):
+    os.makedirs(directory, exist_ok=True)
+    for name, text in builtinScripts.items():
+        with open(os.path.join(directory, name), "w") as fd:
+            fd.write(text)
+    return directory
+
+
+def writeShellData(path, size=256 * 1024):
+    # Fixed seed: the same input on every host and run.
+    rnd = random.Random(42)
+    words = ["".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for i in range(rnd.randint(2, 9)))
+             for j in range(2000)]
+    with open(path, "w") as fd:
+        written = 0
+        while written < size:
+            line = " ".join(rnd.choice(words) for i in range(8)) + "\n"
+            fd.write(line)
+            written += len(line)
+    return path
+
+
+def loadBundle(directory):
+    scripts = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or name.startswith("."):
+            continue
+        if name.endswith(".sh"):
+            scripts.append((name, ["/bin/sh", path]))
+        elif os.access(path, os.X_OK):
+            scripts.append((name, [path]))
+    if not scripts:
+        raise RuntimeError(f"Run: no scripts in shell bundle \"{directory}\"")
+    return scripts
+
+
+def shellWorker(worker, scripts, env, scratch, deadline, resultFile):
+    # One process per worker, starting scripts with posix_spawn: threads
+    # of the harness would queue on the GIL and on Python's fork path and
+    # cap the sweep before the system under test does.
+    os.makedirs(scratch, exist_ok=True)
+    os.chdir(scratch)
+    env = dict(env, UB_WORKER=str(worker))
+    devnull = os.open(os.devnull, os.O_RDWR)
+    actions = [(os.POSIX_SPAWN_DUP2, devnull, fd) for fd in (0, 1, 2)]
+    i = worker
+    with open(resultFile, "w") as out:
+        while time.monotonic() < deadline:
+            name, argv = scripts[i % len(scripts)]
+            i += 1
+            start = time.monotonic()
+            pid = os.posix_spawn(argv[0], argv, env, file_actions=actions)
+            status = os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+            out.write("%s %.9f\n" % (name, time.monotonic() - start))
+            if status != 0:
+                out.write("!%s exited with status %d\n" % (name, status))
+                break
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        out.write("#cpu %.6f %.6f\n" % (own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime))
+
+
+def readWorkerResults(resultFile, samples, errors):
+    cpu = (0.0, 0.0)
+    with open(resultFile, "r") as fd:
+        for line in fd:
+            if line.startswith("!"):
+                errors.append(line[1:].strip())
+            elif line.startswith("#cpu "):
+                cpu = tuple(float(x) for x in line.split()[1:3])
+            else:
+                name, lat = line.rsplit(" ", 1)
+                samples[name].append(float(lat))
+    return cpu
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+
+def runShellLevel(scripts, env, concurrency, duration):
+    samples = {name: [] for name, argv in scripts}
+    errors = []
+    scratchBase = os.path.join(config.TMPDIR, "shell")
+    os.makedirs(scratchBase, exist_ok=True)
+    ctx = multiprocessing.get_context("fork")
+    start = time.monotonic()
+    deadline = start + duration
+    workers = []
+    try:
+        for w in range(concurrency):
+            resultFile = os.path.join(scratchBase, "worker-%d.out" % w)
+            proc = ctx.Process(target=shellWorker, daemon=True,
+                               args=(w, scripts, env, os.path.join(scratchBase, str(w)), deadline, resultFile))
+            proc.start()
+            workers.append((proc, resultFile))
+        for proc, resultFile in workers:
+            proc.join()
+        elapsed = time.monotonic() - start
+        harnessCpu = scriptCpu = 0.0
+        for proc, resultFile in workers:
+            if proc.exitcode != 0 or not os.path.exists(resultFile):
+                errors.append("worker exited with status %s" % proc.exitcode)
+                continue
+            own, children = readWorkerResults(resultFile, samples, errors)
+            harnessCpu += own
+            scriptCpu += children
+    finally:
+        for proc, resultFile in workers:
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        shutil.rmtree(scratchBase, ignore_errors=True)
+    if errors:
+        raise RuntimeError("shell workload: %s" % errors[0])
+
+    level = {
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        # Share of the CPU time spent in the workers themselves rather
+        # than in the scripts; it should stay small at every level.
+        'harnessCpu': harnessCpu / (harnessCpu + scriptCpu) if harnessCpu + scriptCpu else None,
+        'scripts': {},
+    }
+    for name, lat in samples.items():
+        level['scripts'][name] = {
+            'runs': len(lat),
+            'perMin': len(lat) * 60.0 / elapsed,
+            'mean': sum(lat) / len(lat) if lat else None,
+            'p50': percentile(lat, 50),
+            'p95': percentile(lat, 95),
+            'p99': percentile(lat, 99),
+        }
+    every = [x for lat in samples.values() for x in lat]
+    level['runs'] = len(every)
+    level['perMin'] = len(every) * 60.0 / elapsed
+    level['p50'] = percentile(every, 50)
+    level['p95'] = percentile(every, 95)
+    level['p99'] = percentile(every, 99)
+    return level
+
+
+def runShellSweep(levels, bundle, duration, logFile, progress=None):
+    bundleDir = bundle if bundle else writeBuiltinBundle(os.path.join(config.TMPDIR, "shell-bundle"))
+    scripts = loadBundle(bundleDir)
+    env = dict(os.environ,
+               UB_DATA=writeShellData(os.path.join(config.TMPDIR, "shell-data.txt")),
+               UB_BUNDLE=bundleDir)
+
+    sweep = {
+        'bundle': bundle if bundle else "builtin",
+        'scripts': [name for name, argv in scripts],
+        'duration': duration,
+        'start': time.time(),
+        'levels': [],
+    }
+    try:
+        for n in levels:
+            progressBench(progress, "shell-sweep", n)
+            level = runShellLevel(scripts, env, n, duration)
+            sweep['levels'].append(level)
+            single = sweep['levels'][0] if sweep['levels'][0]['concurrency'] == 1 else None
+            level['scaling'] = level['perMin'] / (single['perMin'] * n) if single and single['perMin'] else None
+            printLog(logFile, "# shell sweep: %d concurrent, %d runs, %.1f/min, harness %s of the CPU time\n" % (
+                n, level['runs'], level['perMin'],
+                "%.1f%%" % (level['harnessCpu'] * 100) if level['harnessCpu'] is not None else "---"))
+            progressBenchDone(progress)
+    finally:
+        os.unlink(env['UB_DATA'])
+        if not bundle:
+            shutil.rmtree(bundleDir, ignore_errors=True)
+    sweep['end'] = time.time()
+    return sweep
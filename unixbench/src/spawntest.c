@@ -0,0 +1,306 @@
+/*******************************************************************************
+ *  The BYTE UNIX Benchmarks - Release 5.1.3 (Python-scripted Run)
+ *
+ *  spawntest - process creation benchmarks
+ *
+ *      spawntest fork|forkexec|vfork|spawn|clone SECONDS THREADS [MB]
+ *
+ *  The parent first maps and touches MB (default 0) of anonymous memory
+ *  in 4K pages, standing in for the heap of a large launcher process,
+ *  then THREADS threads create children as fast as they can and wait for
+ *  each one.  The children that exec run this program again with "exit",
+ *  which returns at once.  The total is printed on stderr as
+ *  "COUNT|n|1|lps", followed by "TIME|seconds" for the timed part only.
+ *
+ *      fork      fork() and _exit() in the child
+ *      forkexec  fork() and exec in the child
+ *      vfork     vfork() and exec in the child
+ *      spawn     posix_spawn()
+ *      clone     clone(CLONE_VM | CLONE_VFORK) and exec on a private stack
+ ******************************************************************************/
+
+#define _GNU_SOURCE
+#include <errno.h>
+#include <limits.h>
+#include <pthread.h>
+#include <sched.h>
+#include <signal.h>
+#include <spawn.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+#define MB (1024UL * 1024UL)
+#define CLONE_STACK (64 * 1024)
+
+struct worker {
+	pthread_t tid;
+	unsigned long count;
+	char *stack;
+};
+
+extern char **environ;
+
+static volatile sig_atomic_t stop;
+static char self[PATH_MAX];
+static char *const childArgv[] = { "spawntest", "exit", NULL };
+static pid_t (*spawnFunc)(struct worker *);
+
+static void onAlarm(int sig)
+{
+	(void)sig;
+	stop = 1;
+}
+
+static double now(void)
+{
+	struct timespec ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static pid_t doFork(struct worker *w)
+{
+	pid_t pid = fork();
+
+	(void)w;
+	if (pid == 0)
+		_exit(0);
+	return pid;
+}
+
+static pid_t doForkExec(struct worker *w)
+{
+	pid_t pid = fork();
+
+	(void)w;
+	if (pid == 0) {
+		execve(self, childArgv, environ);
+		_exit(127);
+	}
+	return pid;
+}
+
+static pid_t doVfork(struct worker *w)
+{
+	pid_t pid = vfork();
+
+	(void)w;
+	if (pid == 0) {
+		execve(self, childArgv, environ);
+		_exit(127);
+	}
+	return pid;
+}
+
+static pid_t doSpawn(struct worker *w)
+{
+	pid_t pid;
+	int err;
+
+	(void)w;
+	if ((err = posix_spawn(&pid, self, NULL, NULL, childArgv, environ))) {
+		errno = err;
+		return -1;
+	}
+	return pid;
+}
+
+static int cloneChild(void *arg)
+{
+	(void)arg;
+	execve(self, childArgv, environ);
+	_exit(127);
+}
+
+static pid_t doClone(struct worker *w)
+{
+	/* The child borrows the address space until it execs, like vfork,
+	 * but runs on its own stack rather than the parent's. */
+	return clone(cloneChild, w->stack + CLONE_STACK, CLONE_VM | CLONE_VFORK | SIGCHLD, NULL);
+}
+
+static void *runWorker(void *arg)
+{
+	struct worker *w = arg;
+	int status;
+
+	while (!stop) {
+		pid_t pid = spawnFunc(w);
+
+		if (pid < 0) {
+			if (errno == EAGAIN || errno == EINTR)
+				continue;
+			perror("spawntest");
+			exit(1);
+		}
+		while (waitpid(pid, &status, 0) < 0 && errno == EINTR)
+			;
+		if (!WIFEXITED(status) || WEXITSTATUS(status) != 0) {
+			fprintf(stderr, "spawntest: child failed\n");
+			exit(1);
+		}
+		w->count++;
+	}
+	return NULL;
+}
+
+static unsigned long readBytes(const char *path)
+{
+	FILE *fd = fopen(path, "r");
+	unsigned long bytes;
+
+	if (!fd)
+		return ULONG_MAX;
+	/* "max" (cgroup v2 without a limit) does not parse. */
+	if (fscanf(fd, "%lu", &bytes) != 1)
+		bytes = ULONG_MAX;
+	fclose(fd);
+	return bytes;
+}
+
+static unsigned long cgroupLeftMB(const char *limitFile, const char *usageFile)
+{
+	unsigned long limit = readBytes(limitFile), usage = readBytes(usageFile);
+
+	if (limit == ULONG_MAX)
+		return ULONG_MAX;
+	if (usage == ULONG_MAX)
+		usage = 0;
+	return limit > usage ? (limit - usage) / MB : 0;
+}
+
+static unsigned long availableMB(void)
+{
+	FILE *fd = fopen("/proc/meminfo", "r");
+	char line[256];
+	unsigned long kb = 0, mb, left;
+
+	if (fd) {
+		while (fgets(line, sizeof(line), fd))
+			if (sscanf(line, "MemAvailable: %lu kB", &kb) == 1)
+				break;
+		fclose(fd);
+	}
+	mb = kb ? kb / 1024 : ULONG_MAX;
+	/* A container's memory limit is usually far below the host's
+	 * MemAvailable; v1 reports "no limit" as a huge number. */
+	left = cgroupLeftMB("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current");
+	if (left < mb)
+		mb = left;
+	left = cgroupLeftMB("/sys/fs/cgroup/memory/memory.limit_in_bytes",
+			    "/sys/fs/cgroup/memory/memory.usage_in_bytes");
+	if (left < mb)
+		mb = left;
+	return mb;
+}
+
+int main(int argc, char *argv[])
+{
+	struct sigaction sa;
+	struct worker *workers;
+	unsigned long total = 0;
+	size_t rssMB = 0;
+	char *rss = NULL;
+	double start, elapsed;
+	int seconds, threads, i;
+	const char *test;
+	ssize_t len;
+
+	if (argc == 2 && !strcmp(argv[1], "exit"))
+		return 0;
+	if (argc < 4) {
+		fprintf(stderr, "Usage: %s fork|forkexec|vfork|spawn|clone seconds threads [MB]\n", argv[0]);
+		exit(2);
+	}
+	test = argv[1];
+	seconds = atoi(argv[2]);
+	threads = atoi(argv[3]);
+	if (threads < 1)
+		threads = 1;
+	if (argc > 4)
+		rssMB = atol(argv[4]);
+
+	if (!strcmp(test, "fork")) {
+		spawnFunc = doFork;
+	} else if (!strcmp(test, "forkexec")) {
+		spawnFunc = doForkExec;
+	} else if (!strcmp(test, "vfork")) {
+		spawnFunc = doVfork;
+	} else if (!strcmp(test, "spawn")) {
+		spawnFunc = doSpawn;
+	} else if (!strcmp(test, "clone")) {
+		spawnFunc = doClone;
+	} else {
+		fprintf(stderr, "spawntest: unknown test \"%s\"\n", test);
+		exit(2);
+	}
+
+	if ((len = readlink("/proc/self/exe", self, sizeof(self) - 1)) < 0) {
+		perror("spawntest: /proc/self/exe");
+		exit(1);
+	}
+	self[len] = '\0';
+
+	if (rssMB) {
+		/* Touching more than is available would only measure swapping
+		 * or end in the OOM killer. */
+		unsigned long avail = availableMB();
+
+		if (rssMB > avail) {
+			fprintf(stderr, "spawntest: %zu MB resident set exceeds the %lu MB available\n",
+				rssMB, avail);
+			exit(1);
+		}
+		rss = mmap(NULL, rssMB * MB, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+		if (rss == MAP_FAILED) {
+			perror("spawntest: mmap");
+			exit(1);
+		}
+		/* 4K pages whatever the THP setting, so fork() has a page table
+		 * entry to copy for every page. */
+		madvise(rss, rssMB * MB, MADV_NOHUGEPAGE);
+		memset(rss, 1, rssMB * MB);
+	}
+
+	memset(&sa, 0, sizeof(sa));
+	sa.sa_handler = onAlarm;
+	sigaction(SIGALRM, &sa, NULL);
+
+	workers = calloc(threads, sizeof(*workers));
+	for (i = 0; i < threads; i++) {
+		workers[i].stack = malloc(CLONE_STACK);
+		if (!workers[i].stack) {
+			perror("spawntest: malloc");
+			exit(1);
+		}
+	}
+
+	start = now();
+	alarm(seconds);
+	for (i = 0; i < threads; i++) {
+		if (pthread_create(&workers[i].tid, NULL, runWorker, &workers[i])) {
+			fprintf(stderr, "spawntest: cannot create thread %d\n", i);
+			exit(1);
+		}
+	}
+	for (i = 0; i < threads; i++) {
+		pthread_join(workers[i].tid, NULL);
+		total += workers[i].count;
+	}
+	elapsed = now() - start;
+
+	fprintf(stderr, "COUNT|%lu|1|lps\n", total);
+	fprintf(stderr, "TIME|%.6f\n", elapsed);
+	for (i = 0; i < threads; i++)
+		free(workers[i].stack);
+	if (rss)
+		munmap(rss, rssMB * MB);
+	free(workers);
+	return 0;
+}
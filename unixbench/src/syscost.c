@@ -0,0 +1,188 @@
+/*******************************************************************************
+ *  The BYTE UNIX Benchmarks - Release 5.1.3 (Python-scripted Run)
+ *
+ *  syscost - per-system-call cost breakdown
+ *
+ *      syscost SECONDS [CALL ...]
+ *
+ *  Runs each CALL (all of them by default) in a tight loop for SECONDS
+ *  and prints "CALL|name|count|seconds" on stderr for each.  The clock is
+ *  read once per batch, so its own cost is spread over BATCH calls.
+ *
+ *      getpid       getpid() via syscall(2), bypassing any libc caching
+ *      clock-vdso   clock_gettime(CLOCK_MONOTONIC) through the vDSO
+ *      clock-sys    clock_gettime(CLOCK_MONOTONIC) as a real system call
+ *      read         1-byte read() from /dev/null
+ *      write        1-byte write() to /dev/null
+ *      open         open() and close() of /dev/null
+ *      stat         stat() of /dev/null
+ *      mmap         mmap() and munmap() of one anonymous page
+ *      yield        sched_yield()
+ *      epoll        epoll_wait() with a zero timeout on an empty set
+ ******************************************************************************/
+
+#define _GNU_SOURCE
+#include <fcntl.h>
+#include <sched.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/epoll.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <sys/syscall.h>
+#include <time.h>
+#include <unistd.h>
+
+#define BATCH 1000
+
+static int nullFd;
+static int epollFd;
+static size_t pageSize;
+
+static void doGetpid(void)
+{
+	syscall(SYS_getpid);
+}
+
+static void doClockVdso(void)
+{
+	struct timespec ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+}
+
+static void doClockSys(void)
+{
+	struct timespec ts;
+
+	syscall(SYS_clock_gettime, CLOCK_MONOTONIC, &ts);
+}
+
+static void doRead(void)
+{
+	char c;
+
+	if (read(nullFd, &c, 1) < 0)
+		exit(1);
+}
+
+static void doWrite(void)
+{
+	if (write(nullFd, "x", 1) != 1)
+		exit(1);
+}
+
+static void doOpen(void)
+{
+	int fd = open("/dev/null", O_RDONLY);
+
+	if (fd < 0)
+		exit(1);
+	close(fd);
+}
+
+static void doStat(void)
+{
+	struct stat st;
+
+	if (stat("/dev/null", &st))
+		exit(1);
+}
+
+static void doMmap(void)
+{
+	void *p = mmap(NULL, pageSize, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+
+	if (p == MAP_FAILED)
+		exit(1);
+	munmap(p, pageSize);
+}
+
+static void doYield(void)
+{
+	sched_yield();
+}
+
+static void doEpoll(void)
+{
+	struct epoll_event ev;
+
+	epoll_wait(epollFd, &ev, 1, 0);
+}
+
+static const struct call {
+	const char *name;
+	void (*func)(void);
+} calls[] = {
+	{ "getpid", doGetpid },
+	{ "clock-vdso", doClockVdso },
+	{ "clock-sys", doClockSys },
+	{ "read", doRead },
+	{ "write", doWrite },
+	{ "open", doOpen },
+	{ "stat", doStat },
+	{ "mmap", doMmap },
+	{ "yield", doYield },
+	{ "epoll", doEpoll },
+	{ NULL, NULL }
+};
+
+static double now(void)
+{
+	struct timespec ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static void runCall(const struct call *c, double seconds)
+{
+	unsigned long count = 0;
+	double start = now(), elapsed;
+	int i;
+
+	do {
+		for (i = 0; i < BATCH; i++)
+			c->func();
+		count += BATCH;
+		elapsed = now() - start;
+	} while (elapsed < seconds);
+	fprintf(stderr, "CALL|%s|%lu|%.6f\n", c->name, count, elapsed);
+}
+
+int main(int argc, char *argv[])
+{
+	const struct call *c;
+	double seconds;
+	int i;
+
+	if (argc < 2) {
+		fprintf(stderr, "Usage: %s seconds [call ...]\n", argv[0]);
+		exit(2);
+	}
+	seconds = atof(argv[1]);
+	pageSize = sysconf(_SC_PAGESIZE);
+	nullFd = open("/dev/null", O_RDWR);
+	epollFd = epoll_create1(0);
+	if (nullFd < 0 || epollFd < 0) {
+		perror("syscost");
+		exit(1);
+	}
+
+	if (argc == 2) {
+		for (c = calls; c->name; c++)
+			runCall(c, seconds);
+		return 0;
+	}
+	for (i = 2; i < argc; i++) {
+		for (c = calls; c->name && strcmp(c->name, argv[i]); c++)
+			;
+		if (!c->name) {
+			fprintf(stderr, "syscost: unknown call \"%s\"\n", argv[i]);
+			exit(2);
+		}
+		runCall(c, seconds);
+	}
+	return 0;
+}
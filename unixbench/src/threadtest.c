@@ -0,0 +1,226 @@
+/*******************************************************************************
+ *  The BYTE UNIX Benchmarks - Release 5.1.3 (Python-scripted Run)
+ *
+ *  threadtest - thread and futex benchmarks
+ *
+ *      threadtest mutexturn|futex|condvar|lock|create SECONDS THREADS
+ *
+ *      mutexturn  turn flag passed under a mutex, in pairs; the waiting
+ *                 side polls with sched_yield and never blocks
+ *      futex      ping-pong with raw FUTEX_WAIT/FUTEX_WAKE, in pairs
+ *      condvar    ping-pong with condition-variable signalling, in pairs
+ *      lock       all threads increment a counter under one mutex
+ *      create     every thread creates and joins no-op threads
+ *
+ *  The paired tests run THREADS/2 independent pairs (at least one) and
+ *  count round trips.  For futex and condvar, which sleep until woken,
+ *  the per-pair wakeup latency is pairs / score; mutexturn measures lock
+ *  and yield throughput instead.
+ *  The total is printed on stderr as "COUNT|n|1|lps".
+ ******************************************************************************/
+
+#define _GNU_SOURCE
+#include <errno.h>
+#include <limits.h>
+#include <linux/futex.h>
+#include <pthread.h>
+#include <sched.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+
+struct pair {
+	pthread_mutex_t mutex;
+	pthread_cond_t cond;
+	int turn;
+};
+
+struct worker {
+	pthread_t tid;
+	struct pair *pair;
+	int side;
+	unsigned long count;
+};
+
+static volatile sig_atomic_t stop;
+static pthread_mutex_t shared = PTHREAD_MUTEX_INITIALIZER;
+static unsigned long sharedCounter;
+static void *(*testFunc)(void *);
+
+static void onAlarm(int sig)
+{
+	(void)sig;
+	stop = 1;
+}
+
+static long futex(int *uaddr, int op, int val)
+{
+	return syscall(SYS_futex, uaddr, op, val, NULL, NULL, 0);
+}
+
+static void *mutexTurn(void *arg)
+{
+	struct worker *w = arg;
+	struct pair *p = w->pair;
+
+	while (!stop) {
+		int mine;
+
+		pthread_mutex_lock(&p->mutex);
+		mine = p->turn == w->side;
+		if (mine) {
+			p->turn = !w->side;
+			w->count++;
+		}
+		pthread_mutex_unlock(&p->mutex);
+		if (!mine)
+			sched_yield();
+	}
+	return NULL;
+}
+
+static void *futexPingPong(void *arg)
+{
+	struct worker *w = arg;
+	struct pair *p = w->pair;
+
+	while (!stop) {
+		while (__atomic_load_n(&p->turn, __ATOMIC_ACQUIRE) != w->side && !stop)
+			futex(&p->turn, FUTEX_WAIT_PRIVATE, !w->side);
+		__atomic_store_n(&p->turn, !w->side, __ATOMIC_RELEASE);
+		futex(&p->turn, FUTEX_WAKE_PRIVATE, 1);
+		w->count++;
+	}
+	/* Release a partner still waiting for its turn. */
+	__atomic_store_n(&p->turn, !w->side, __ATOMIC_RELEASE);
+	futex(&p->turn, FUTEX_WAKE_PRIVATE, INT_MAX);
+	return NULL;
+}
+
+static void *condvarPingPong(void *arg)
+{
+	struct worker *w = arg;
+	struct pair *p = w->pair;
+
+	pthread_mutex_lock(&p->mutex);
+	while (!stop) {
+		while (p->turn != w->side && !stop)
+			pthread_cond_wait(&p->cond, &p->mutex);
+		p->turn = !w->side;
+		w->count++;
+		pthread_cond_signal(&p->cond);
+	}
+	pthread_cond_broadcast(&p->cond);
+	pthread_mutex_unlock(&p->mutex);
+	return NULL;
+}
+
+static void *contendedLock(void *arg)
+{
+	struct worker *w = arg;
+
+	while (!stop) {
+		pthread_mutex_lock(&shared);
+		sharedCounter++;
+		pthread_mutex_unlock(&shared);
+		w->count++;
+	}
+	return NULL;
+}
+
+static void *noop(void *arg)
+{
+	return arg;
+}
+
+static void *createJoin(void *arg)
+{
+	struct worker *w = arg;
+	pthread_t tid;
+	int err;
+
+	while (!stop) {
+		if ((err = pthread_create(&tid, NULL, noop, NULL))) {
+			if (err == EAGAIN)
+				continue;
+			fprintf(stderr, "threadtest: pthread_create failed\n");
+			exit(1);
+		}
+		pthread_join(tid, NULL);
+		w->count++;
+	}
+	return NULL;
+}
+
+int main(int argc, char *argv[])
+{
+	struct sigaction sa;
+	struct worker *workers;
+	struct pair *pairs;
+	unsigned long total = 0;
+	int seconds, threads, paired = 1, i;
+	const char *test;
+
+	if (argc < 4) {
+		fprintf(stderr, "Usage: %s mutexturn|futex|condvar|lock|create seconds threads\n", argv[0]);
+		exit(2);
+	}
+	test = argv[1];
+	seconds = atoi(argv[2]);
+	threads = atoi(argv[3]);
+
+	if (!strcmp(test, "mutexturn")) {
+		testFunc = mutexTurn;
+	} else if (!strcmp(test, "futex")) {
+		testFunc = futexPingPong;
+	} else if (!strcmp(test, "condvar")) {
+		testFunc = condvarPingPong;
+	} else if (!strcmp(test, "lock")) {
+		testFunc = contendedLock;
+		paired = 0;
+	} else if (!strcmp(test, "create")) {
+		testFunc = createJoin;
+		paired = 0;
+	} else {
+		fprintf(stderr, "threadtest: unknown test \"%s\"\n", test);
+		exit(2);
+	}
+	if (paired)
+		threads = threads < 2 ? 2 : threads & ~1;
+	else if (threads < 1)
+		threads = 1;
+
+	memset(&sa, 0, sizeof(sa));
+	sa.sa_handler = onAlarm;
+	sigaction(SIGALRM, &sa, NULL);
+
+	workers = calloc(threads, sizeof(*workers));
+	pairs = calloc(threads / 2 + 1, sizeof(*pairs));
+	for (i = 0; i < threads / 2 + 1; i++) {
+		pthread_mutex_init(&pairs[i].mutex, NULL);
+		pthread_cond_init(&pairs[i].cond, NULL);
+	}
+
+	alarm(seconds);
+	for (i = 0; i < threads; i++) {
+		workers[i].pair = &pairs[i / 2];
+		workers[i].side = i % 2;
+		if (pthread_create(&workers[i].tid, NULL, testFunc, &workers[i])) {
+			fprintf(stderr, "threadtest: cannot create thread %d\n", i);
+			exit(1);
+		}
+	}
+	for (i = 0; i < threads; i++) {
+		pthread_join(workers[i].tid, NULL);
+		total += workers[i].count;
+	}
+
+	/* Each round trip is one hand-off by each side of a pair. */
+	fprintf(stderr, "COUNT|%lu|1|lps\n", paired ? total / 2 : total);
+	free(pairs);
+	free(workers);
+	return 0;
+}
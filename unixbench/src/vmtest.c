@@ -0,0 +1,262 @@
+/*******************************************************************************
+ *  The BYTE UNIX Benchmarks - Release 5.1.3 (Python-scripted Run)
+ *
+ *  vmtest - virtual memory benchmarks
+ *
+ *      vmtest fault4k|faultthp|mmap|mprotect|fork|madvise SECONDS THREADS [MB]
+ *
+ *  All THREADS run in one process, so they share an address space and
+ *  contend on the mm locks the way the copies of a busy server would.
+ *  The total operation count is printed on stderr in the usual
+ *  "COUNT|n|1|unit" form; madvise also prints the time spent inside
+ *  madvise() so its score is reclaim throughput rather than wall rate.
+ *
+ *      fault4k   first-touch faults on 4K pages (THP disabled)
+ *      faultthp  first-touch faults on 2M-aligned THP regions
+ *      mmap      mmap/touch/munmap churn of 64K mappings
+ *      mprotect  read-only/read-write toggling of 64K chunks
+ *      fork      fork()+_exit() with MB (default 16) of resident memory
+ *      madvise   MADV_DONTNEED of MB (default 64) of dirty memory
+ ******************************************************************************/
+
+#define _GNU_SOURCE
+#include <errno.h>
+#include <pthread.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+#define KB 1024UL
+#define MB (1024UL * KB)
+#define HUGE_SIZE (2 * MB)
+#define CHUNK (64 * KB)
+
+struct worker {
+	pthread_t tid;
+	unsigned long count;
+	double busy;
+};
+
+static volatile sig_atomic_t stop;
+static size_t pageSize;
+static size_t regionMB;
+static void (*testFunc)(struct worker *);
+
+static void onAlarm(int sig)
+{
+	(void)sig;
+	stop = 1;
+}
+
+static double now(void)
+{
+	struct timespec ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static char *mapAnon(size_t len)
+{
+	void *p = mmap(NULL, len, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+
+	if (p == MAP_FAILED) {
+		perror("vmtest: mmap");
+		exit(1);
+	}
+	return p;
+}
+
+static void fault4k(struct worker *w)
+{
+	size_t len = regionMB * MB;
+
+	while (!stop) {
+		char *p = mapAnon(len);
+#ifdef MADV_NOHUGEPAGE
+		madvise(p, len, MADV_NOHUGEPAGE);
+#endif
+		for (size_t off = 0; off < len && !stop; off += pageSize) {
+			p[off] = 1;
+			w->count++;
+		}
+		munmap(p, len);
+	}
+}
+
+static void faultThp(struct worker *w)
+{
+	size_t len = regionMB * MB;
+
+	while (!stop) {
+		char *base = mapAnon(len + HUGE_SIZE);
+		char *p = (char *)(((unsigned long)base + HUGE_SIZE - 1) & ~(HUGE_SIZE - 1));
+#ifdef MADV_HUGEPAGE
+		madvise(p, len, MADV_HUGEPAGE);
+#endif
+		for (size_t off = 0; off < len && !stop; off += HUGE_SIZE) {
+			p[off] = 1;
+			w->count++;
+		}
+		munmap(base, len + HUGE_SIZE);
+	}
+}
+
+static void mmapChurn(struct worker *w)
+{
+	while (!stop) {
+		char *p = mapAnon(CHUNK);
+
+		p[0] = 1;
+		munmap(p, CHUNK);
+		w->count++;
+	}
+}
+
+static void mprotectToggle(struct worker *w)
+{
+	size_t len = 64 * CHUNK;
+	char *p = mapAnon(len);
+	unsigned long i = 0;
+
+	memset(p, 1, len);
+	while (!stop) {
+		char *chunk = p + (i++ % 64) * CHUNK;
+
+		if (mprotect(chunk, CHUNK, PROT_READ) || mprotect(chunk, CHUNK, PROT_READ | PROT_WRITE)) {
+			perror("vmtest: mprotect");
+			exit(1);
+		}
+		chunk[0]++;
+		w->count += 2;
+	}
+	munmap(p, len);
+}
+
+static void forkRss(struct worker *w)
+{
+	while (!stop) {
+		pid_t pid = fork();
+
+		if (pid < 0) {
+			if (errno == EAGAIN || errno == EINTR)
+				continue;
+			perror("vmtest: fork");
+			exit(1);
+		}
+		if (pid == 0)
+			_exit(0);
+		while (waitpid(pid, NULL, 0) < 0 && errno == EINTR)
+			;
+		w->count++;
+	}
+}
+
+static void madviseReclaim(struct worker *w)
+{
+	size_t len = regionMB * MB;
+	char *p = mapAnon(len);
+
+	while (!stop) {
+		double start;
+
+		memset(p, 1, len);
+		start = now();
+		madvise(p, len, MADV_DONTNEED);
+		w->busy += now() - start;
+		w->count += len / KB;
+	}
+	munmap(p, len);
+}
+
+static void *runWorker(void *arg)
+{
+	testFunc(arg);
+	return NULL;
+}
+
+int main(int argc, char *argv[])
+{
+	struct sigaction sa;
+	struct worker *workers;
+	unsigned long total = 0;
+	double busy = 0;
+	char *rss = NULL;
+	int seconds, threads, i;
+	const char *test;
+
+	if (argc < 4) {
+		fprintf(stderr, "Usage: %s fault4k|faultthp|mmap|mprotect|fork|madvise seconds threads [MB]\n",
+			argv[0]);
+		exit(2);
+	}
+	test = argv[1];
+	seconds = atoi(argv[2]);
+	threads = atoi(argv[3]);
+	if (threads < 1)
+		threads = 1;
+	pageSize = sysconf(_SC_PAGESIZE);
+
+	if (!strcmp(test, "fault4k")) {
+		testFunc = fault4k;
+		regionMB = 64;
+	} else if (!strcmp(test, "faultthp")) {
+		testFunc = faultThp;
+		regionMB = 256;
+	} else if (!strcmp(test, "mmap")) {
+		testFunc = mmapChurn;
+	} else if (!strcmp(test, "mprotect")) {
+		testFunc = mprotectToggle;
+	} else if (!strcmp(test, "fork")) {
+		testFunc = forkRss;
+		regionMB = 16;
+	} else if (!strcmp(test, "madvise")) {
+		testFunc = madviseReclaim;
+		regionMB = 64;
+	} else {
+		fprintf(stderr, "vmtest: unknown test \"%s\"\n", test);
+		exit(2);
+	}
+	if (argc > 4)
+		regionMB = atoi(argv[4]);
+
+	if (testFunc == forkRss) {
+		/* The parent's resident set is what fork() has to copy. */
+		rss = mapAnon(regionMB * MB);
+		memset(rss, 1, regionMB * MB);
+	}
+
+	memset(&sa, 0, sizeof(sa));
+	sa.sa_handler = onAlarm;
+	sigaction(SIGALRM, &sa, NULL);
+
+	workers = calloc(threads, sizeof(*workers));
+	alarm(seconds);
+	for (i = 0; i < threads; i++) {
+		if (pthread_create(&workers[i].tid, NULL, runWorker, &workers[i])) {
+			fprintf(stderr, "vmtest: cannot create thread %d\n", i);
+			exit(1);
+		}
+	}
+	for (i = 0; i < threads; i++) {
+		pthread_join(workers[i].tid, NULL);
+		total += workers[i].count;
+		busy += workers[i].busy;
+	}
+
+	if (testFunc == madviseReclaim) {
+		fprintf(stderr, "COUNT|%lu|1|KBps\n", total);
+		fprintf(stderr, "TIME|%.6f\n", busy / threads);
+	} else {
+		fprintf(stderr, "COUNT|%lu|1|lps\n", total);
+	}
+	if (rss)
+		munmap(rss, regionMB * MB);
+	free(workers);
+	return 0;
+}
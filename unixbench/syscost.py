@@ -0,0 +1,86 @@
+"""Per-system-call cost breakdown.
+
+Runs the syscost program, which times each of a fixed set of system calls
+in turn, as N parallel copies for each copy count, and reports the
+nanoseconds per call seen by one copy.  Scaling is the per-call cost at N
+copies relative to one copy; 1.00 means the call scales perfectly.
+"""
+
+import json
+import os
+import statistics
+import time
+
+from . import config
+from .execute import runCommands
+from .progress import progressBench, progressBenchDone
+from .utils import abortRun, printLog
+
+syscalls = (
+    ('getpid', "getpid"),
+    ('clock-vdso', "clock_gettime (vDSO)"),
+    ('clock-sys', "clock_gettime (syscall)"),
+    ('read', "read /dev/null"),
+    ('write', "write /dev/null"),
+    ('open', "open+close"),
+    ('stat', "stat"),
+    ('mmap', "mmap+munmap 4K"),
+    ('yield', "sched_yield"),
+    ('epoll', "epoll_wait(0)"),
+)
+
+# Seconds each call is timed for, per pass.
+callTime = 1
+
+
+def parseCallCosts(output):
+    costs = {}
+    for line in output.split("\n"):
+        fields = line.strip().split("|")
+        if len(fields) == 4 and fields[0] == "CALL":
+            costs[fields[1]] = float(fields[3]) * 1e9 / int(fields[2])
+    return costs
+
+
+def runSyscostPass(prog, copies):
+    perCopy = []
+    for c, output in runCommands(["\"%s\" %d 2>&1" % (prog, callTime)] * copies):
+        if c['proc'].returncode != 0:
+            abortRun("syscost failed: %s" % output.strip().split("\n")[0])
+        perCopy.append(parseCallCosts(output))
+    return {name: statistics.mean(p[name] for p in perCopy) for name, desc in syscalls}
+
+
+def runSyscallBreakdown(levels, passes, logFile, progress=None):
+    prog = os.path.join(config.BINDIR, "syscost")
+    breakdown = {
+        'calls': [{'name': name, 'desc': desc} for name, desc in syscalls],
+        'passes': passes,
+        'callTime': callTime,
+        'start': time.time(),
+        'levels': [],
+    }
+    for n in levels:
+        progressBench(progress, "syscalls", n)
+        samples = [runSyscostPass(prog, n) for i in range(passes)]
+        level = {'copies': n, 'ns': {}, 'scaling': {}}
+        single = [lv for lv in breakdown['levels'] if lv['copies'] == 1]
+        for name, desc in syscalls:
+            level['ns'][name] = statistics.median(s[name] for s in samples)
+            if single:
+                level['scaling'][name] = level['ns'][name] / single[0]['ns'][name]
+            elif n == 1:
+                level['scaling'][name] = 1.0
+            else:
+                level['scaling'][name] = None
+        breakdown['levels'].append(level)
+        printLog(logFile, "# syscalls: %d copies: %s\n" % (
+            n, ", ".join("%s %.1f ns" % (name, level['ns'][name]) for name, desc in syscalls)))
+        progressBenchDone(progress)
+    breakdown['end'] = time.time()
+    return breakdown
+
+
+def writeBreakdown(path, breakdown):
+    with open(path, "w", encoding="utf-8") as fd:
+        json.dump(breakdown, fd, indent=2, sort_keys=True)
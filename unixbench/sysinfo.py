@@ -0,0 +1,477 @@
+"""System information: CPUs, cgroup limits and thermal/frequency sampling."""
+
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+from . import config
+from .utils import formatCpuList, getCmdOutput, parseCpuList, readSysFile
+
+
+def processCpuFlags(flagStr):
+    names = []
+    for f in flagStr.split(" "):
+        if f in config.x86CpuFlags:
+            names.append(config.x86CpuFlags[f])
+    return ", ".join(names)
+
+
+def getCpuInfo():
+    if sys.platform == "linux":
+        cpuinfo = "/proc/cpuinfo"
+        kvRegex = re.compile(r'(.+):(.*)')
+        cpus = {}
+        cpu = 0
+        try:
+            if os.path.exists(cpuinfo):
+                with open(cpuinfo, "r") as fd:
+                    line = fd.readline()
+                    while line:
+                        line = line.strip()
+                        if not line:
+                            line = fd.readline()
+                            continue
+                        linePart = kvRegex.findall(line)
+                        if len(linePart) < 1:
+                            line = fd.readline()
+                            continue
+                        field = linePart[0][0].strip()
+                        value = linePart[0][1].strip()
+                        if "processor" in field:
+                            cpu = int(value.strip())
+                            if cpu not in cpus:
+                                cpus[cpu] = {}
+                        elif "model name" in field:
+                            cpus[cpu]['model'] = value
+                        elif "bogomips" in field:
+                            cpus[cpu]['bogo'] = float(value)
+                        elif "flags" in field:
+                            cpus[cpu]['flags'] = processCpuFlags(value)
+                        line = fd.readline()
+            else:
+                raise RuntimeError("cpuinfo not exists")
+        except BaseException:
+            print("cannot read cpuinfo")
+            return None
+        return cpus
+    elif sys.platform == "win32":
+        raise NotImplementedError("not supported platform 'win32'")
+
+
+def getCgroupMounts():
+    # Map each v1 controller (and "unified" for v2) to its mount point.
+    mounts = {}
+    mountinfo = readSysFile("/proc/self/mountinfo")
+    if not mountinfo:
+        return mounts
+    for line in mountinfo.split("\n"):
+        if " - " not in line:
+            continue
+        pre, post = line.split(" - ", 1)
+        preParts = pre.split()
+        postParts = post.split()
+        if len(preParts) < 5 or len(postParts) < 3:
+            continue
+        mountPoint = preParts[4]
+        fsType = postParts[0]
+        if fsType == "cgroup2":
+            mounts.setdefault('unified', mountPoint)
+        elif fsType == "cgroup":
+            for opt in postParts[2].split(","):
+                if opt in ("cpu", "cpuacct", "cpuset", "memory"):
+                    mounts.setdefault(opt, mountPoint)
+    return mounts
+
+
+def getCgroupPaths():
+    # Map each v1 controller (and "unified" for v2) to our cgroup path.
+    paths = {}
+    cgroup = readSysFile("/proc/self/cgroup")
+    if not cgroup:
+        return paths
+    for line in cgroup.split("\n"):
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        hid, controllers, path = parts
+        if hid == "0" and controllers == "":
+            paths['unified'] = path
+        else:
+            for c in controllers.split(","):
+                paths[c] = path
+    return paths
+
+
+def cgroupFile(cgroup, controller, name):
+    if controller not in cgroup['mounts']:
+        return None
+    mount = cgroup['mounts'][controller]
+    path = cgroup['paths'].get(controller, "/")
+    # Inside a cgroup namespace our path may not exist below the mount point,
+    # in which case the mount root is our own cgroup.
+    for candidate in (os.path.join(mount, path.lstrip("/"), name), os.path.join(mount, name)):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def getCgroupInfo():
+    if sys.platform != "linux":
+        return None
+
+    mounts = getCgroupMounts()
+    paths = getCgroupPaths()
+    if not mounts:
+        return None
+
+    cgroup = {
+        'mounts': mounts,
+        'paths': paths,
+        'cpuQuota': None,
+        'cpuset': None,
+        'memoryMax': None,
+        'memoryUsageFile': None,
+    }
+    if 'unified' in mounts and 'cpu' not in mounts and 'memory' not in mounts:
+        cgroup['version'] = 2
+        cpuMax = readSysFile(cgroupFile(cgroup, 'unified', "cpu.max") or "")
+        if cpuMax:
+            quota, period = (cpuMax.split() + ["100000"])[:2]
+            if quota != "max" and int(period) > 0:
+                cgroup['cpuQuota'] = int(quota) / int(period)
+        cpuset = readSysFile(cgroupFile(cgroup, 'unified', "cpuset.cpus.effective") or "")
+        if cpuset:
+            cgroup['cpuset'] = parseCpuList(cpuset)
+        memMax = readSysFile(cgroupFile(cgroup, 'unified', "memory.max") or "")
+        if memMax and memMax != "max":
+            cgroup['memoryMax'] = int(memMax)
+        cgroup['memoryUsageFile'] = cgroupFile(cgroup, 'unified', "memory.current")
+        cgroup['statFile'] = cgroupFile(cgroup, 'unified', "cpu.stat")
+    else:
+        cgroup['version'] = 1
+        quota = readSysFile(cgroupFile(cgroup, 'cpu', "cpu.cfs_quota_us") or "")
+        period = readSysFile(cgroupFile(cgroup, 'cpu', "cpu.cfs_period_us") or "")
+        if quota and period and int(quota) > 0 and int(period) > 0:
+            cgroup['cpuQuota'] = int(quota) / int(period)
+        cpuset = readSysFile(cgroupFile(cgroup, 'cpuset', "cpuset.effective_cpus") or "")
+        if not cpuset:
+            cpuset = readSysFile(cgroupFile(cgroup, 'cpuset', "cpuset.cpus") or "")
+        if cpuset:
+            cgroup['cpuset'] = parseCpuList(cpuset)
+        memMax = readSysFile(cgroupFile(cgroup, 'memory', "memory.limit_in_bytes") or "")
+        # v1 reports "unlimited" as a huge page-aligned number.
+        if memMax and int(memMax) < (1 << 62):
+            cgroup['memoryMax'] = int(memMax)
+        cgroup['memoryUsageFile'] = cgroupFile(cgroup, 'memory', "memory.usage_in_bytes")
+        cgroup['statFile'] = cgroupFile(cgroup, 'cpu', "cpu.stat")
+
+    return cgroup
+
+
+def getEffectiveCpus(info):
+    numCpus = info['numCpus'] if 'numCpus' in info else None
+    cpus = None
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    cgroup = info['cgroup'] if 'cgroup' in info else None
+    if cgroup:
+        if cgroup['cpuset']:
+            cpus = min(cpus, len(cgroup['cpuset'])) if cpus else len(cgroup['cpuset'])
+        if cgroup['cpuQuota']:
+            quota = max(1, int(math.ceil(cgroup['cpuQuota'])))
+            cpus = min(cpus, quota) if cpus else quota
+    if numCpus and cpus:
+        cpus = min(cpus, numCpus)
+    return cpus if cpus else numCpus
+
+
+def cgroupLimited(info):
+    cgroup = info['cgroup'] if 'cgroup' in info else None
+    if not cgroup:
+        return False
+    if cgroup['cpuQuota'] or cgroup['memoryMax']:
+        return True
+    return bool(cgroup['cpuset'] and 'numCpus' in info and len(cgroup['cpuset']) < info['numCpus'])
+
+
+def describeCgroupLimits(cgroup):
+    limits = []
+    if cgroup['cpuQuota']:
+        limits.append("cpu quota %.2f CPUs" % cgroup['cpuQuota'])
+    if cgroup['cpuset']:
+        limits.append("cpuset %s" % formatCpuList(cgroup['cpuset']))
+    if cgroup['memoryMax']:
+        limits.append("memory %.1f MiB" % (cgroup['memoryMax'] / (1 << 20)))
+    return ", ".join(limits) if limits else "no limits"
+
+
+def availableMemory(cgroup):
+    # Bytes a new process can touch without swapping: MemAvailable, or
+    # what is left under the cgroup memory limit if that is less.
+    avail = None
+    m = re.search(r'^MemAvailable:\s+(\d+) kB', readSysFile("/proc/meminfo") or "", re.M)
+    if m:
+        avail = int(m.group(1)) * 1024
+    if cgroup and cgroup['memoryMax']:
+        usage = readSysFile(cgroup['memoryUsageFile'] or "")
+        left = max(0, cgroup['memoryMax'] - (int(usage) if usage and usage.isdigit() else 0))
+        avail = min(avail, left) if avail is not None else left
+    return avail
+
+
+def readCgroupThrottle(cgroup):
+    if not cgroup or not cgroup['statFile']:
+        return None
+    stat_ = readSysFile(cgroup['statFile'])
+    if not stat_:
+        return None
+    values = {}
+    for line in stat_.split("\n"):
+        kv = line.split()
+        if len(kv) == 2:
+            values[kv[0]] = int(kv[1])
+    throttle = {
+        'periods': values.get('nr_periods', 0),
+        'throttled': values.get('nr_throttled', 0),
+    }
+    if 'throttled_usec' in values:
+        throttle['throttledUsec'] = values['throttled_usec']
+    else:
+        # v1 reports throttled_time in nanoseconds.
+        throttle['throttledUsec'] = values.get('throttled_time', 0) // 1000
+    return throttle
+
+
+def diffCgroupThrottle(before, after):
+    if before is None or after is None:
+        return None
+    return {k: after[k] - before[k] for k in before.keys()}
+
+
+def getThermalZones():
+    zones = []
+    base = "/sys/class/thermal"
+    if not os.path.isdir(base):
+        return zones
+    for name in sorted(os.listdir(base)):
+        if not name.startswith("thermal_zone"):
+            continue
+        path = os.path.join(base, name)
+        zone = {
+            'name': readSysFile(os.path.join(path, "type")) or name,
+            'temp': os.path.join(path, "temp"),
+            'trip': None,
+        }
+        # The lowest passive/hot trip point is where the kernel starts
+        # throttling this zone.
+        for entry in sorted(os.listdir(path)):
+            m = re.match(r'trip_point_(\d+)_type$', entry)
+            if not m or readSysFile(os.path.join(path, entry)) not in ("passive", "hot"):
+                continue
+            trip = readSysFile(os.path.join(path, "trip_point_%s_temp" % m.group(1)))
+            if trip and trip.lstrip("-").isdigit() and int(trip) > 0:
+                trip = int(trip) / 1000.0
+                zone['trip'] = trip if zone['trip'] is None else min(zone['trip'], trip)
+        if readSysFile(zone['temp']) is not None:
+            zones.append(zone)
+    return zones
+
+
+def getCpuFreqFiles():
+    files = []
+    base = "/sys/devices/system/cpu"
+    if not os.path.isdir(base):
+        return files
+    for name in sorted(os.listdir(base)):
+        if not re.match(r'cpu\d+$', name):
+            continue
+        cur = os.path.join(base, name, "cpufreq", "scaling_cur_freq")
+        maxFreq = readSysFile(os.path.join(base, name, "cpufreq", "cpuinfo_max_freq"))
+        if os.path.exists(cur) and maxFreq:
+            files.append({'cpu': int(name[3:]), 'cur': cur, 'max': int(maxFreq)})
+    return files
+
+
+def readThrottleCounters():
+    # Kernel view of the package/core thermal throttle MSR counters
+    # (what turbostat reports), only present on x86.
+    total = None
+    base = "/sys/devices/system/cpu"
+    if not os.path.isdir(base):
+        return None
+    for name in os.listdir(base):
+        if not re.match(r'cpu\d+$', name):
+            continue
+        for counter in ("core_throttle_count", "package_throttle_count"):
+            val = readSysFile(os.path.join(base, name, "thermal_throttle", counter))
+            if val and val.isdigit():
+                total = (total or 0) + int(val)
+    return total
+
+
+def sampleThermal(mon):
+    sample = {'time': time.time(), 'temps': {}, 'freqRatio': None, 'freqMHz': None}
+    for zone in mon['zones']:
+        val = readSysFile(zone['temp'])
+        if val and val.lstrip("-").isdigit():
+            sample['temps'][zone['name']] = int(val) / 1000.0
+    ratios = []
+    freqs = []
+    for f in mon['freqFiles']:
+        val = readSysFile(f['cur'])
+        if val and val.isdigit():
+            freqs.append(int(val) / 1000.0)
+            ratios.append(int(val) / f['max'])
+    if ratios:
+        sample['freqRatio'] = sum(ratios) / len(ratios)
+        sample['freqMHz'] = sum(freqs) / len(freqs)
+    return sample
+
+
+def thermalMonitorLoop(mon):
+    while not mon['stop'].wait(mon['interval']):
+        mon['samples'].append(sampleThermal(mon))
+
+
+def startThermalMonitor(interval=1.0):
+    zones = getThermalZones()
+    freqFiles = getCpuFreqFiles()
+    counters = readThrottleCounters()
+    if not zones and not freqFiles and counters is None:
+        return None
+    mon = {
+        'zones': zones,
+        'freqFiles': freqFiles,
+        'interval': interval,
+        'counters': counters,
+        'samples': [],
+        'stop': threading.Event(),
+    }
+    mon['samples'].append(sampleThermal(mon))
+    mon['thread'] = threading.Thread(target=thermalMonitorLoop, args=(mon,), daemon=True)
+    mon['thread'].start()
+    return mon
+
+
+def stopThermalMonitor(mon, minFreqRatio=None):
+    if not mon:
+        return None
+    mon['stop'].set()
+    mon['thread'].join()
+    mon['samples'].append(sampleThermal(mon))
+
+    summary = {
+        'samples': len(mon['samples']),
+        'maxTemp': None,
+        'hotZone': None,
+        'minFreqRatio': None,
+        'avgFreqMHz': None,
+        'throttleEvents': None,
+        'throttled': False,
+        'reasons': [],
+    }
+    trips = {z['name']: z['trip'] for z in mon['zones']}
+    freqs = []
+    for sample in mon['samples']:
+        for name, temp in sample['temps'].items():
+            if summary['maxTemp'] is None or temp > summary['maxTemp']:
+                summary['maxTemp'] = temp
+                summary['hotZone'] = name
+            if trips[name] is not None and temp >= trips[name]:
+                reason = "%s reached %.1fC (trip %.1fC)" % (name, temp, trips[name])
+                if not any(r.startswith(name + " reached") for r in summary['reasons']):
+                    summary['reasons'].append(reason)
+        if sample['freqRatio'] is not None:
+            freqs.append(sample['freqMHz'])
+            if summary['minFreqRatio'] is None or sample['freqRatio'] < summary['minFreqRatio']:
+                summary['minFreqRatio'] = sample['freqRatio']
+    if freqs:
+        summary['avgFreqMHz'] = sum(freqs) / len(freqs)
+
+    counters = readThrottleCounters()
+    if mon['counters'] is not None and counters is not None:
+        summary['throttleEvents'] = counters - mon['counters']
+        if summary['throttleEvents'] > 0:
+            summary['reasons'].append("%d thermal throttle events" % summary['throttleEvents'])
+    if minFreqRatio and summary['minFreqRatio'] is not None and summary['minFreqRatio'] < minFreqRatio:
+        summary['reasons'].append("frequency dropped to %.0f%% of max" % (summary['minFreqRatio'] * 100))
+
+    summary['throttled'] = len(summary['reasons']) > 0
+    return summary
+
+
+def summarizeThermal(pres):
+    passes = [p['thermal'] for p in pres if 'thermal' in p and p['thermal']]
+    if not passes:
+        return None
+    temps = [t['maxTemp'] for t in passes if t['maxTemp'] is not None]
+    ratios = [t['minFreqRatio'] for t in passes if t['minFreqRatio'] is not None]
+    events = [t['throttleEvents'] for t in passes if t['throttleEvents'] is not None]
+    return {
+        'passes': len(pres),
+        'throttledPasses': len([t for t in passes if t['throttled']]),
+        'rerunPasses': len([p for p in pres if 'rerunOf' in p]),
+        'maxTemp': max(temps) if temps else None,
+        'minFreqRatio': min(ratios) if ratios else None,
+        'throttleEvents': sum(events) if events else None,
+    }
+
+
+def describeThermal(thermal):
+    parts = ["%d/%d passes throttled" % (thermal['throttledPasses'], thermal['passes'])]
+    if thermal['rerunPasses']:
+        parts.append("%d re-run" % thermal['rerunPasses'])
+    if thermal['maxTemp'] is not None:
+        parts.append("max %.1fC" % thermal['maxTemp'])
+    if thermal['minFreqRatio'] is not None:
+        parts.append("min freq %.0f%%" % (thermal['minFreqRatio'] * 100))
+    if thermal['throttleEvents']:
+        parts.append("%d throttle events" % thermal['throttleEvents'])
+    return ", ".join(parts)
+
+
+def getSystemInfo(graphics=None):
+    info = {
+        'name': getCmdOutput("hostname"),
+        'os': getCmdOutput("uname -o"),
+        'osRel': getCmdOutput("uname -r"),
+        'osVer': getCmdOutput("uname -v"),
+        'mach': getCmdOutput("uname -m"),
+        'platform': getCmdOutput("uname -i"),
+    }
+    if not info['os']:
+        info['os'] = getCmdOutput("uname -s")
+
+    info['system'] = info['os']
+    if os.path.exists("/etc/SuSE-release"):
+        info['system'] = getCmdOutput("cat /etc/SuSE-release")
+    elif os.path.exists("/etc/release"):
+        info['system'] = getCmdOutput("cat /etc/release")
+
+    lang = getCmdOutput("printenv LANG")
+    map = getCmdOutput("locale -k LC_CTYPE | grep charmap")
+    map = re.sub(r'.*=', '', map)
+    coll = getCmdOutput("locale -k LC_COLLATE | grep collate-codeset")
+    coll = re.sub(r'.*=', '', coll)
+    info['language'] = "%s (charmap=%s, collate=%s)" % (lang, map, coll)
+
+    cpus = getCpuInfo()
+    if cpus:
+        info['cpus'] = cpus
+        info['numCpus'] = len(cpus)
+
+    info['cgroup'] = getCgroupInfo()
+    info['effectiveCpus'] = getEffectiveCpus(info)
+
+    # A private X server started for the run describes its own renderer;
+    # 3dinfo would probe whatever display the user had.
+    info['graphics'] = graphics if graphics else getCmdOutput("3dinfo | cut -f1 -d\'(\'")
+
+    info['runlevel'] = getCmdOutput("runlevel | cut -f2 -d\"(\"")
+    info['load'] = getCmdOutput("uptime")
+    info['numUsers'] = getCmdOutput("who | wc -l")
+
+    return info
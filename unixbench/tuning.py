@@ -0,0 +1,204 @@
+"""Benchmark environment tuning profiles.
+
+A profile is a list of settings applied before the tests run.  Every
+setting records its previous value so restoreTuning() can put the
+system back, which also happens on aborts, signals and interpreter exit.
+Settings that cannot be applied (not root, knob missing) are recorded
+as skipped rather than failing the run.
+"""
+
+import atexit
+import glob
+import os
+import re
+import signal
+
+from .utils import formatCpuList, readSysFile
+
+profiles = {
+    'default': {},
+    'stable': {
+        'governor': "performance",
+        'turbo': False,
+        'aslr': 0,
+        'thp': "never",
+        'thpDefrag': "never",
+        'nice': -10,
+    },
+}
+
+
+def readSelected(path):
+    # sysfs choice files look like "always madvise [never]".
+    val = readSysFile(path)
+    if val is None:
+        return None
+    m = re.search(r'\[(\w+)\]', val)
+    return m.group(1) if m else val
+
+
+def writeSysFile(path, value):
+    with open(path, "w") as fd:
+        fd.write(str(value))
+
+
+def sysfsSetting(name, paths, value, read=readSysFile):
+    paths = [p for p in paths if os.path.exists(p)]
+    setting = {'name': name, 'value': value, 'old': None, 'applied': False, 'error': None, 'paths': paths}
+    if not paths:
+        setting['error'] = "not available"
+        return setting
+    setting['old'] = {p: read(p) for p in paths}
+    try:
+        for p in paths:
+            writeSysFile(p, value)
+        setting['applied'] = True
+    except OSError as e:
+        setting['error'] = e.strerror
+        restoreSetting(setting)
+    return setting
+
+
+def turboSetting(enabled):
+    # intel_pstate inverts the sense of the knob.
+    if os.path.exists("/sys/devices/system/cpu/intel_pstate/no_turbo"):
+        return sysfsSetting('turbo', ["/sys/devices/system/cpu/intel_pstate/no_turbo"], 0 if enabled else 1)
+    return sysfsSetting('turbo', ["/sys/devices/system/cpu/cpufreq/boost"], 1 if enabled else 0)
+
+
+def niceSetting(value):
+    setting = {'name': 'nice', 'value': value, 'old': os.getpriority(os.PRIO_PROCESS, 0), 'applied': False,
+               'error': None, 'paths': []}
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, value)
+        setting['applied'] = True
+    except OSError as e:
+        setting['error'] = e.strerror
+    return setting
+
+
+def schedName(policy):
+    for name in ("other", "batch", "idle", "fifo", "rr"):
+        if getattr(os, "SCHED_" + name.upper(), None) == policy:
+            return name
+    return str(policy)
+
+
+def schedSetting(policyName, priority=0):
+    policy = getattr(os, "SCHED_" + policyName.upper())
+    setting = {'name': 'sched', 'value': "%s/%d" % (policyName, priority), 'old': None, 'applied': False,
+               'error': None, 'paths': []}
+    try:
+        setting['old'] = (os.sched_getscheduler(0), os.sched_getparam(0).sched_priority)
+        os.sched_setscheduler(0, policy, os.sched_param(priority))
+        setting['applied'] = True
+    except OSError as e:
+        setting['error'] = e.strerror
+    return setting
+
+
+def affinitySetting(cpus):
+    setting = {'name': 'cpus', 'value': formatCpuList(cpus), 'old': None, 'applied': False, 'error': None,
+               'paths': []}
+    try:
+        setting['old'] = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, cpus)
+        setting['applied'] = True
+    except OSError as e:
+        setting['error'] = e.strerror
+    return setting
+
+
+def restoreSetting(setting):
+    if setting['old'] is None:
+        return
+    try:
+        if setting['name'] == 'nice':
+            os.setpriority(os.PRIO_PROCESS, 0, setting['old'])
+        elif setting['name'] == 'sched':
+            os.sched_setscheduler(0, setting['old'][0], os.sched_param(setting['old'][1]))
+        elif setting['name'] == 'cpus':
+            os.sched_setaffinity(0, setting['old'])
+        else:
+            for p, old in setting['old'].items():
+                if old is not None:
+                    writeSysFile(p, old)
+    except OSError as e:
+        setting['restoreError'] = e.strerror
+
+
+def applyTuning(profile, isolateCpus=None, sched=None):
+    if profile not in profiles:
+        raise RuntimeError(f"Run: unknown profile \"{profile}\"")
+    want = profiles[profile]
+    tuning = {'profile': profile, 'settings': [], 'restored': False}
+
+    cpuFiles = sorted(glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_governor"))
+    if 'governor' in want:
+        tuning['settings'].append(sysfsSetting('governor', cpuFiles, want['governor']))
+    if 'turbo' in want:
+        tuning['settings'].append(turboSetting(want['turbo']))
+    if 'aslr' in want:
+        tuning['settings'].append(sysfsSetting('aslr', ["/proc/sys/kernel/randomize_va_space"], want['aslr']))
+    if 'thp' in want:
+        tuning['settings'].append(sysfsSetting('thp', ["/sys/kernel/mm/transparent_hugepage/enabled"],
+                                               want['thp'], readSelected))
+    if 'thpDefrag' in want:
+        tuning['settings'].append(sysfsSetting('thpDefrag', ["/sys/kernel/mm/transparent_hugepage/defrag"],
+                                               want['thpDefrag'], readSelected))
+    if 'nice' in want:
+        tuning['settings'].append(niceSetting(want['nice']))
+    if sched:
+        tuning['settings'].append(schedSetting(*sched))
+    if isolateCpus:
+        tuning['settings'].append(affinitySetting(isolateCpus))
+
+    atexit.register(restoreTuning, tuning)
+    tuning['signals'] = installSignalHandlers()
+    return tuning
+
+
+def restoreTuning(tuning):
+    if not tuning or tuning['restored']:
+        return
+    tuning['restored'] = True
+    for setting in reversed(tuning['settings']):
+        if setting['applied']:
+            restoreSetting(setting)
+    for sig, handler in tuning['signals'].items():
+        signal.signal(sig, handler)
+
+
+def signalExit(signum, frame):
+    # Turn termination signals into an exception so the callers'
+    # finally blocks (and restoreTuning) get to run.
+    raise SystemExit(128 + signum)
+
+
+def installSignalHandlers():
+    old = {}
+    for sig in (signal.SIGTERM, signal.SIGHUP):
+        try:
+            old[sig] = signal.signal(sig, signalExit)
+        except ValueError:
+            # Not the main thread; leave signal handling alone.
+            break
+    return old
+
+
+def describeTuning(tuning):
+    parts = []
+    for setting in tuning['settings']:
+        if setting['applied']:
+            old = setting['old']
+            if isinstance(old, dict):
+                olds = sorted(set(str(v) for v in old.values()))
+                old = olds[0] if len(olds) == 1 else "mixed"
+            elif isinstance(old, list):
+                old = formatCpuList(old)
+            elif isinstance(old, tuple):
+                old = "%s/%d" % (schedName(old[0]), old[1])
+            parts.append("%s %s (was %s)" % (setting['name'], setting['value'], old))
+        else:
+            parts.append("%s skipped (%s)" % (setting['name'], setting['error']))
+    return "profile %s: %s" % (tuning['profile'], ", ".join(parts) if parts else "no changes")
@@ -0,0 +1,125 @@
+"""Small helpers shared by the benchmark modules."""
+
+import os
+import re
+import subprocess
+import time
+
+from . import config
+
+
+def command(cmd):
+    process = subprocess.Popen(cmd,
+                               bufsize=0,
+                               stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               shell=True)
+    pid = process.pid
+    return pid, process
+
+
+def getCmdOutput(cmd):
+    timeout = 300
+    pid, process = command(cmd)
+    if process.wait(timeout) != 0:
+        process.terminate()
+        raise RuntimeError(f"Process '{process.pid}' ran timeout({timeout}s)")
+    stdout = process.stdout.read().strip()
+    return stdout.decode('utf-8')
+
+
+def logFile_(sysInfo):
+    count = 1
+    ymd = time.strftime("%Y-%m-%d")
+
+    while True:
+        log = os.path.join(config.RESULTDIR, "%s-%s-%02d" % (sysInfo['name'], ymd, count))
+        if os.path.exists(log):
+            count += 1
+            continue
+        return log
+
+
+def printLog(logFile, *args):
+    fd = open(logFile, 'a', encoding="utf-8")
+    if not fd:
+        raise RuntimeError(f"can't append to {logFile}")
+    if fd.writable():
+        fd.write(" ".join(args))
+        fd.close()
+    else:
+        fd.close()
+        raise RuntimeError(f"can't write to file {logFile}")
+
+
+def number(n, what, plural=None):
+    plural = what + "s" if not plural else plural
+    if not n:
+        return f"unknown {plural}"
+    else:
+        return "%d %s" % (n, what if n == 1 else plural)
+
+
+def mergeParams(def_, vals):
+    params = {}
+    for k in def_.keys():
+        params[k] = def_[k]
+    for k in vals.keys():
+        params[k] = vals[k]
+    return params
+
+
+def readSysFile(path):
+    try:
+        with open(path, "r") as fd:
+            return fd.read().strip()
+    except OSError:
+        return None
+
+
+def parseCpuList(cpuStr):
+    cpus = []
+    for part in cpuStr.strip().split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def formatCpuList(cpus):
+    ranges = []
+    for c in sorted(cpus):
+        if ranges and ranges[-1][1] == c - 1:
+            ranges[-1][1] = c
+        else:
+            ranges.append([c, c])
+    return ",".join(str(lo) if lo == hi else "%d-%d" % (lo, hi) for lo, hi in ranges)
+
+
+def formatDuration(secs):
+    secs = int(round(secs))
+    if secs >= 3600:
+        return "%dh%02dm%02ds" % (secs // 3600, secs % 3600 // 60, secs % 60)
+    return "%dm%02ds" % (secs // 60, secs % 60)
+
+
+def parseDuration(text):
+    m = re.fullmatch(r'\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*(?:(\d+)s?)?\s*', text)
+    if not m or not any(m.groups()):
+        raise RuntimeError(f"Run: bad duration \"{text}\"")
+    h, mi, sec = (int(g) if g else 0 for g in m.groups())
+    return h * 3600 + mi * 60 + sec
+
+
+class BenchmarkError(RuntimeError):
+    pass
+
+
+def abortRun(err):
+    raise BenchmarkError(err)
@@ -0,0 +1,119 @@
+"""Private virtual X server for headless graphics runs.
+
+The 2D and 3D tests need an X display.  With --headless an Xvfb server
+is started on a free display number for the duration of the run, GL is
+forced to Mesa's software rasterizer, and the renderer glxinfo reports
+is recorded as the system's graphics.  The server is stopped and DISPLAY
+restored afterwards, also on aborts and interpreter exit.
+"""
+
+import atexit
+import os
+import re
+import select
+import shutil
+import subprocess
+
+from . import config
+from .utils import abortRun
+
+xServer = "Xvfb"
+screen = "1280x1024x24"
+
+# Seconds to wait for the server to accept connections.
+startTimeout = 30
+
+softwareEnv = {
+    'LIBGL_ALWAYS_SOFTWARE': "1",
+}
+
+
+def needsDisplay(tests):
+    return any(config.testParams[t]['cat'] in ('2d', '3d') for t in tests if t in config.testParams)
+
+
+def readDisplayNumber(fd):
+    # -displayfd: the server writes the display number it picked once
+    # it is ready for clients.
+    data = b""
+    while not data.endswith(b"\n"):
+        ready, _, _ = select.select([fd], [], [], startTimeout)
+        if not ready:
+            return None
+        chunk = os.read(fd, 64)
+        if not chunk:
+            return None
+        data += chunk
+    return data.decode().strip()
+
+
+def getRenderer(env):
+    if not shutil.which("glxinfo"):
+        return None
+    try:
+        res = subprocess.run(["glxinfo", "-B"], env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             timeout=startTimeout)
+    except subprocess.TimeoutExpired:
+        return None
+    m = re.search(r'OpenGL renderer string:\s*(.+)', res.stdout.decode("utf-8", "replace"))
+    return m.group(1).strip() if m else None
+
+
+def startXServer():
+    if not shutil.which(xServer):
+        abortRun(f"--headless needs {xServer} on the PATH")
+    readFd, writeFd = os.pipe()
+    try:
+        proc = subprocess.Popen([xServer, "-displayfd", str(writeFd), "-screen", "0", screen,
+                                 "-nolisten", "tcp", "+extension", "GLX", "-noreset"],
+                                pass_fds=(writeFd,), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, start_new_session=True)
+        # Our copy of the write end must go, or a server that dies
+        # before writing never gives readDisplayNumber its EOF.
+        os.close(writeFd)
+        writeFd = None
+        number = readDisplayNumber(readFd)
+    finally:
+        os.close(readFd)
+        if writeFd is not None:
+            os.close(writeFd)
+    if not number or not number.isdigit():
+        proc.kill()
+        proc.wait()
+        abortRun(f"{xServer} did not start")
+
+    display = {
+        'server': xServer,
+        'display': ":" + number,
+        'screen': screen,
+        'proc': proc,
+        'env': {k: os.environ.get(k) for k in ['DISPLAY'] + list(softwareEnv)},
+        'stopped': False,
+    }
+    os.environ['DISPLAY'] = display['display']
+    os.environ.update(softwareEnv)
+    display['renderer'] = getRenderer(dict(os.environ))
+    atexit.register(stopXServer, display)
+    return display
+
+
+def stopXServer(display):
+    if not display or display['stopped']:
+        return
+    display['stopped'] = True
+    display['proc'].terminate()
+    try:
+        display['proc'].wait(10)
+    except subprocess.TimeoutExpired:
+        display['proc'].kill()
+        display['proc'].wait()
+    for k, v in display['env'].items():
+        if v is None:
+            os.environ.pop(k, None)
+        else:
+            os.environ[k] = v
+
+
+def describeDisplay(display):
+    return "%s on %s %s (%s, software rendering)" % (
+        display['renderer'] or "unknown renderer", display['server'], display['display'], display['screen'])